@@ -1,16 +1,23 @@
 import streamlit as st
+import streamlit.components.v1 as components
 import pandas as pd
 import numpy as np
 from datetime import datetime
 import plotly.express as px
 from streamlit_folium import st_folium
 try:
-    from config import APP_CONFIG
+    from config import APP_CONFIG, MAP_CACHE_CONFIG, FIGURE_CACHE_CONFIG, TILE_CONFIG
     from data.data_loader import DataLoader
     from data.data_processor import DataProcessor
+    from data.anomaly import AnomalyDetector
+    from data.simulation import CrowdSimulator
+    from data.parallel import ParallelExecutor
     from components.maps import MapVisualizer
+    from components.tiles import TileRenderer, TileServer
+    from utils.cache import LRUCache
     from components.analytics import AnalyticsVisualizer
     from components.recommendations import RecommendationEngine
+    from data.search_index import SearchIndex, build_search_index
     from utils.helpers import *
 except ImportError as ie:
     st.error(f"Failed to import a required module: {ie}. "
@@ -71,6 +78,7 @@ def load_all_data(use_snowflake=False):
     df_tourism = loader.load_tourism_data()
     df_sites = loader.load_cultural_sites_data()
     df_festivals = loader.load_festival_data()
+    df_events = loader.load_cultural_events_data()
     if 'latitude' not in df_arts.columns or 'longitude' not in df_arts.columns:
         if 'state' in df_arts.columns:
             df_arts['latitude'] = df_arts['state'].map(
@@ -117,7 +125,55 @@ def load_all_data(use_snowflake=False):
          st.error("`df_sites` is missing 'site_name' or 'site' column. Recommendations might fail.")
          df_sites['site_name'] = 'Unknown Site'
 
-    return df_arts, df_tourism, df_sites, df_festivals
+    # Runs only when the data is (re)loaded: rows whose text changed are re-indexed, removed rows tombstoned
+    build_search_index(df_arts, df_sites, df_festivals, df_tourism, index=get_search_index(use_snowflake))
+    # Each frame is hashed once per load; the stamp travels with the cached copies handed to every rerun and
+    # keys the figure cache, which would otherwise hash the copies again on each rerun
+    for df in (df_arts, df_tourism, df_sites, df_festivals, df_events):
+        df.attrs['data_version'] = dataframe_fingerprint(df)
+    return df_arts, df_tourism, df_sites, df_festivals, df_events
+
+
+@st.cache_resource
+def get_recommendation_engine():
+    return RecommendationEngine()
+
+
+@st.cache_resource
+def get_data_processor():
+    return DataProcessor()
+
+
+@st.cache_resource
+def get_map_visualizer():
+    render_cache = LRUCache(MAP_CACHE_CONFIG['max_mb'] * 2 ** 20, MAP_CACHE_CONFIG['spill_dir'],
+                            MAP_CACHE_CONFIG['max_spill_mb'] * 2 ** 20)
+    return MapVisualizer(render_cache=render_cache)
+
+
+@st.cache_resource
+def get_analytics_visualizer():
+    return AnalyticsVisualizer(figure_cache=LRUCache(FIGURE_CACHE_CONFIG['max_mb'] * 2 ** 20))
+
+
+@st.cache_resource
+def get_crowd_simulator(df_sites, df_tourism):
+    # Runs serially inside the app; starting a process pool from the Streamlit server on every run
+    # costs more than it saves at this size
+    return CrowdSimulator(df_sites, df_tourism, executor=ParallelExecutor(n_workers=1))
+
+
+@st.cache_resource
+def get_tile_server():
+    return TileServer(TILE_CONFIG['tile_dir'], TILE_CONFIG['host'], TILE_CONFIG['port'],
+                      TILE_CONFIG['public_url']).start()
+
+
+@st.cache_resource
+def get_search_index(use_snowflake=False):
+    # One long-lived index per data source, kept current by load_all_data
+    return SearchIndex()
+
 
 def main():
     st.markdown('<h1 class="main-header">🎭 India Cultural Heritage Explorer</h1>', unsafe_allow_html=True)
@@ -144,11 +200,11 @@ def main():
         st.markdown("---")
         st.markdown("### 📊 Quick Stats")
 
-    df_arts, df_tourism, df_sites, df_festivals = load_all_data(use_snowflake)
-    processor = DataProcessor()
-    map_viz = MapVisualizer()
-    analytics_viz = AnalyticsVisualizer()
-    recommender = RecommendationEngine()
+    df_arts, df_tourism, df_sites, df_festivals, df_events = load_all_data(use_snowflake)
+    processor = get_data_processor()
+    map_viz = get_map_visualizer()
+    analytics_viz = get_analytics_visualizer()
+    recommender = get_recommendation_engine()
 
     with st.sidebar:
         col1, col2 = st.columns(2)
@@ -161,14 +217,29 @@ def main():
                       len(df_festivals['festival'].unique()) if 'festival' in df_festivals.columns else len(
                           df_festivals))
 
+        st.markdown("---")
+        st.markdown("### 🔎 Search")
+        query = st.text_input("Art forms, sites, festivals", placeholder="e.g. kathak, hampi, diwali")
+        if query:
+            search_index = get_search_index(use_snowflake)
+            if not search_index.sources:
+                # The resource cache was cleared while the data stayed cached
+                build_search_index(df_arts, df_sites, df_festivals, df_tourism, index=search_index)
+            results = search_index.search(query, k=8)
+            if results.empty:
+                st.caption("No matches found")
+            for _, result in results.iterrows():
+                st.markdown(f"**{result['title']}** · {result['source'].replace('_', ' ')}")
+
     if page == "🏠 Dashboard":
         show_dashboard(df_arts, df_tourism, df_sites, df_festivals, processor, analytics_viz)
     elif page == "🗺️ Interactive Maps":
-        show_maps(df_arts, df_tourism, df_sites, processor, map_viz)
+        show_maps(df_arts, df_tourism, df_sites, df_festivals, processor, map_viz, recommender)
     elif page == "📊 Analytics":
         show_analytics(df_arts, df_tourism, df_sites, df_festivals, processor, analytics_viz)
     elif page == "🎯 Recommendations":
-        show_recommendations(df_arts, df_sites, df_tourism, processor, recommender, analytics_viz)
+        show_recommendations(df_arts, df_sites, df_tourism, df_festivals, df_events, processor, recommender,
+                             analytics_viz)
     elif page == "📈 Insights":
         show_insights(df_arts, df_tourism, df_sites, df_festivals, processor)
 
@@ -220,10 +291,12 @@ def show_dashboard(df_arts, df_tourism, df_sites, df_festivals, processor, analy
     col1, col2 = st.columns(2)
 
     with col1:
-        st.plotly_chart(analytics_viz.create_art_forms_distribution(df_arts), use_container_width=True)
+        st.plotly_chart(analytics_viz.create_art_forms_distribution(
+            df_arts, data_version=df_arts.attrs.get('data_version')), use_container_width=True)
 
     with col2:
-        st.plotly_chart(analytics_viz.create_risk_assessment_chart(df_arts), use_container_width=True)
+        st.plotly_chart(analytics_viz.create_risk_assessment_chart(
+            df_arts, data_version=df_arts.attrs.get('data_version')), use_container_width=True)
 
     try:
         heritage_index = processor.calculate_heritage_index(df_arts, df_sites, df_festivals)
@@ -232,7 +305,64 @@ def show_dashboard(df_arts, df_tourism, df_sites, df_festivals, processor, analy
         st.warning(f"Could not calculate or display Heritage Index: {e}")
 
 
-def show_maps(df_arts, df_tourism, df_sites, processor, map_viz):
+def viewport_from(output, padding=0.25):
+    # st_folium reports the visible box as Leaflet corners; a margin around it keeps small pans covered
+    if not output or not output.get('bounds') or not output['bounds'].get('_southWest'):
+        return None
+    south_west, north_east = output['bounds']['_southWest'], output['bounds']['_northEast']
+    lat_margin = (north_east['lat'] - south_west['lat']) * padding
+    lon_margin = (north_east['lng'] - south_west['lng']) * padding
+    return {
+        'zoom': int(output.get('zoom') or 5),
+        'center': (round(output['center']['lat'], 4), round(output['center']['lng'], 4)),
+        'bounds': (round(south_west['lat'] - lat_margin, 4), round(south_west['lng'] - lon_margin, 4),
+                   round(north_east['lat'] + lat_margin, 4), round(north_east['lng'] + lon_margin, 4))
+    }
+
+
+def show_viewport_map(key, map_viz, map_type, make_layer):
+    # Only the points inside the last reported view are sent; the base map stays mounted in the browser
+    # and just its data layer is replaced after each pan or zoom
+    view = st.session_state.get(f"{key}_view") or {'zoom': map_viz.zoom_start, 'center': None,
+                                                     'bounds': map_viz.view_bounds(map_viz.zoom_start, width=1000,
+                                                                                   height=600)}
+    layer = make_layer(view['zoom'], view['bounds'])
+    output = st_folium(map_viz.create_viewport_map(map_type), key=key, height=600, width=1000,
+                       center=view['center'], zoom=view['zoom'], feature_group_to_add=layer,
+                       returned_objects=['bounds', 'zoom', 'center'])
+    st.caption(f"{layer.n_points:,} markers sent for the current view")
+
+    new_view = viewport_from(output)
+    if new_view is not None and new_view != view:
+        st.session_state[f"{key}_view"] = new_view
+        st.rerun()
+
+
+def show_cached_map(map_viz, map_type, filters, frames, build, height=600):
+    components.html(map_viz.render_html(map_type, filters, frames, build), height=height, width=1000)
+
+
+def tiles_available(map_type, df):
+    # Tiles are rendered by load.py; they are only served when they were drawn from the data on screen,
+    # so Snowflake tiles never stand in for the mock data or an older load
+    renderer = TileRenderer(TILE_CONFIG['tile_dir'], TILE_CONFIG['min_zoom'], TILE_CONFIG['max_zoom'])
+    if not renderer.is_current(map_type, df):
+        return False
+    try:
+        get_tile_server()
+    except OSError as e:
+        st.warning(f"Could not start the tile server: {e}")
+        return False
+    return True
+
+
+def show_tiled_map(map_viz, map_type, height=600):
+    m = map_viz.create_tiled_map(map_type, get_tile_server().url(map_type), TILE_CONFIG['min_zoom'],
+                                 TILE_CONFIG['max_zoom'])
+    components.html(m.get_root().render(), height=height, width=1000)
+
+
+def show_maps(df_arts, df_tourism, df_sites, df_festivals, processor, map_viz, recommender):
     st.markdown('<h2 class="sub-header">🗺️ Interactive Cultural Maps</h2>', unsafe_allow_html=True)
 
     map_type = st.selectbox(
@@ -254,10 +384,20 @@ def show_maps(df_arts, df_tourism, df_sites, processor, map_viz):
             )
             filtered_arts = df_arts[df_arts['category'].isin(category_filter)]
         else:
+            category_filter = []
             filtered_arts = df_arts
 
-        m = map_viz.create_art_forms_map(filtered_arts)
-        st_folium(m, height=600, width=1000)
+        # Pre-rendered tiles hold every art form, so they only stand in for the unfiltered map
+        if len(filtered_arts) == len(df_arts) and tiles_available('art_forms', df_arts) and \
+                st.checkbox("Use pre-rendered tiles", value=True, key="arts_tiles"):
+            show_tiled_map(map_viz, 'art_forms')
+        elif st.checkbox("Load only the visible area", value=len(filtered_arts) > map_viz.fast_marker_threshold,
+                         key="arts_viewport"):
+            show_viewport_map("arts_map", map_viz, 'art_forms',
+                              lambda zoom, bounds: map_viz.create_art_forms_layer(filtered_arts, zoom, bounds))
+        else:
+            show_cached_map(map_viz, 'art_forms', sorted(category_filter), [df_arts],
+                            lambda: map_viz.create_art_forms_map(filtered_arts))
 
     elif map_type == "Heritage Sites":
         create_info_box(
@@ -275,10 +415,36 @@ def show_maps(df_arts, df_tourism, df_sites, processor, map_viz):
             else:
                 filtered_sites = df_sites
         else:
+            unesco_filter = "All"
             filtered_sites = df_sites
 
-        m = map_viz.create_heritage_sites_map(filtered_sites)
-        st_folium(m, height=600, width=1000)
+        # Pre-rendered tiles hold every site, so they only stand in for the unfiltered map
+        if unesco_filter == "All" and tiles_available('heritage_sites', df_sites) and \
+                st.checkbox("Use pre-rendered tiles", value=True, key="sites_tiles"):
+            show_tiled_map(map_viz, 'heritage_sites')
+        elif st.checkbox("Load only the visible area", value=len(filtered_sites) > map_viz.fast_marker_threshold,
+                         key="sites_viewport"):
+            show_viewport_map("sites_map", map_viz, 'heritage_sites',
+                              lambda zoom, bounds: map_viz.create_heritage_sites_layer(filtered_sites, zoom, bounds))
+        else:
+            show_cached_map(map_viz, 'heritage_sites', unesco_filter, [df_sites],
+                            lambda: map_viz.create_heritage_sites_map(filtered_sites))
+
+        with st.expander("📍 Explore Around a Site"):
+            col1, col2 = st.columns([3, 1])
+            with col1:
+                center_name = st.selectbox("Site", df_sites['site_name'].sort_values(), key="nearby_site")
+            with col2:
+                radius_km = st.slider("Radius (km)", 10, 300, 50, 10, key="nearby_radius")
+            try:
+                nearby_sites, nearby_arts = recommender.find_nearby(center_name, df_sites, df_arts, radius_km)
+                center_site = df_sites[df_sites['site_name'] == center_name].iloc[0]
+                st.markdown(f"**{len(nearby_sites)}** heritage sites and **{len(nearby_arts)}** art forms "
+                            f"within {radius_km} km")
+                m = map_viz.create_nearby_map(center_site, nearby_sites, nearby_arts, radius_km)
+                st_folium(m, height=450, width=1000, key="nearby_map")
+            except Exception as e:
+                st.warning(f"Could not search around this site: {e}")
 
     elif map_type == "Tourism Heatmap":
         create_info_box(
@@ -286,8 +452,28 @@ def show_maps(df_arts, df_tourism, df_sites, processor, map_viz):
             "Visualize tourism concentration across cultural sites. Warmer colors indicate higher visitor density.",
             "#e74c3c"
         )
-        m = map_viz.create_tourism_heatmap(df_tourism)
-        st_folium(m, height=600, width=1000)
+        cube = map_viz.get_tourism_cube(df_tourism, df_sites)
+        months = [str(month) for month in cube.months]
+        if cube.n_cells == 0 or not months:
+            st.warning("No located sites: the tourism data has no coordinates, site names that match the heritage "
+                       "catalog, or known states, so there is nothing to place on the map.")
+        else:
+            if cube.state_located_sites or cube.unlocated_sites:
+                st.caption(f"{cube.state_located_sites:,} sites shown at their state's centre and "
+                           f"{cube.unlocated_sites:,} sites left off the map for lack of a location.")
+            col1, col2 = st.columns([3, 1])
+            with col1:
+                start, end = st.select_slider("Period", options=months, value=(months[0], months[-1])) \
+                    if len(months) > 1 else (None, None)
+            with col2:
+                heatmap_view = st.radio("Show", ["Period total", "Month by month"], key="heatmap_view")
+
+            if heatmap_view == "Period total":
+                show_cached_map(map_viz, 'tourism_heatmap', (start, end), [df_tourism, df_sites],
+                                lambda: map_viz.create_tourism_heatmap(df_tourism, df_sites, start, end))
+            else:
+                show_cached_map(map_viz, 'tourism_timelapse', (start, end), [df_tourism, df_sites],
+                                lambda: map_viz.create_tourism_timelapse(df_tourism, df_sites, start, end))
 
     else:
         create_info_box(
@@ -296,9 +482,12 @@ def show_maps(df_arts, df_tourism, df_sites, processor, map_viz):
             "#27ae60"
         )
         try:
-            routes = processor.recommend_cultural_routes(df_sites, df_arts)
-            m = map_viz.create_cultural_route_map(routes, df_sites)
-            st_folium(m, height=600, width=1000)
+            def build_route_map():
+                cultural_index = recommender.get_cultural_index(df_arts, df_festivals)
+                routes = processor.recommend_cultural_routes(df_sites, df_arts, cultural_index)
+                return map_viz.create_cultural_route_map(routes, df_sites)
+
+            show_cached_map(map_viz, 'cultural_routes', None, [df_sites, df_arts], build_route_map)
         except Exception as e:
             st.error(f"Could not generate cultural routes: {e}")
 
@@ -309,7 +498,18 @@ def show_analytics(df_arts, df_tourism, df_sites, df_festivals, processor, analy
     tab1, tab2, tab3, tab4 = st.tabs(["Tourism Trends", "Sustainability", "Digital Presence", "Festival Impact"])
 
     with tab1:
-        st.plotly_chart(analytics_viz.create_tourism_trends(df_tourism), use_container_width=True)
+        # Narrowing the range re-renders that window from the full-resolution daily totals
+        tourism_version = df_tourism.attrs.get('data_version')
+        dates = analytics_viz.daily_visitors(df_tourism, tourism_version)['date']
+        start, end = None, None
+        if len(dates) > 1:
+            start, end = st.slider("Date range", min_value=dates.iloc[0].date(), max_value=dates.iloc[-1].date(),
+                                   value=(dates.iloc[0].date(), dates.iloc[-1].date()), key="trend_range")
+        fig = analytics_viz.create_tourism_trends(df_tourism, start, end, data_version=tourism_version)
+        st.plotly_chart(fig, use_container_width=True)
+        if fig.layout.meta and fig.layout.meta['points'] < fig.layout.meta['total']:
+            st.caption(f"Showing {fig.layout.meta['points']:,} of {fig.layout.meta['total']:,} dates; "
+                       f"narrow the date range to see every point")
         if 'date' in df_tourism.columns:
             try:
                 seasonal_patterns, growth_trends = processor.identify_tourism_patterns(df_tourism)
@@ -322,18 +522,27 @@ def show_analytics(df_arts, df_tourism, df_sites, df_festivals, processor, analy
     with tab2:
         try:
             sustainability_metrics = processor.calculate_sustainability_metrics(df_tourism, df_sites)
-            st.plotly_chart(analytics_viz.create_sustainability_matrix(sustainability_metrics), use_container_width=True)
+            fig = analytics_viz.create_sustainability_matrix(sustainability_metrics)
+            st.plotly_chart(fig, use_container_width=True)
+            # Large catalogs keep site details out of the figure; they are looked up here instead
+            if fig.layout.meta:
+                query = st.text_input("Look up a site (name, or #number from the hover)", key="sustainability_lookup")
+                if query:
+                    st.dataframe(analytics_viz.lookup_sites(sustainability_metrics, query), use_container_width=True)
         except Exception as e:
             st.warning(f"Could not display sustainability metrics: {e}")
 
     with tab3:
-        st.plotly_chart(analytics_viz.create_digital_presence_chart(df_sites), use_container_width=True)
+        st.plotly_chart(analytics_viz.create_digital_presence_chart(
+            df_sites, data_version=df_sites.attrs.get('data_version')), use_container_width=True)
 
     with tab4:
-        st.plotly_chart(analytics_viz.create_festival_impact_chart(df_festivals), use_container_width=True)
+        st.plotly_chart(analytics_viz.create_festival_impact_chart(
+            df_festivals, data_version=df_festivals.attrs.get('data_version')), use_container_width=True)
 
 
-def show_recommendations(df_arts, df_sites, df_tourism, processor, recommender, analytics_viz):
+def show_recommendations(df_arts, df_sites, df_tourism, df_festivals, df_events, processor, recommender,
+                         analytics_viz):
     st.markdown('<h2 class="sub-header">🎯 Personalized Recommendations</h2>', unsafe_allow_html=True)
 
     tab1, tab2, tab3 = st.tabs(["Plan Your Journey", "Hidden Gems", "Sustainable Tourism"])
@@ -353,34 +562,62 @@ def show_recommendations(df_arts, df_sites, df_tourism, processor, recommender,
         with col3:
             season = st.selectbox("Travel Season", ["Winter", "Spring", "Monsoon", "Autumn"])
             group_size = st.number_input("Group Size", 1, 20, 2)
+            fixed_dates = st.checkbox("I have fixed travel dates")
+            start_date = st.date_input("Start Date") if fixed_dates else None
         user_preferences = {
             'duration': duration, 'budget': budget, 'interest': interest,
-            'travel_style': travel_style, 'season': season, 'group_size': group_size
+            'travel_style': travel_style, 'season': season, 'group_size': group_size,
+            'start_date': start_date
         }
         if st.button("Generate Itinerary", type="primary"):
             try:
-                route = recommender.generate_personalized_route(user_preferences, df_sites, df_arts)
+                calendar = recommender.get_event_calendar(df_festivals, df_events, df_tourism, start_date, duration)
+                route = recommender.generate_personalized_route(user_preferences, df_sites, df_arts, df_festivals,
+                                                                calendar=calendar)
                 st.markdown("### 🎒 Your Personalized Cultural Journey")
+                if route['planned_days'] < route['total_duration']:
+                    if route['matching_sites'] < route['total_duration']:
+                        st.warning(f"Only {route['matching_sites']} sites match these preferences, so the itinerary "
+                                   f"covers {route['planned_days']} of {route['total_duration']} days. Try a broader "
+                                   f"interest or budget.")
+                    else:
+                        st.warning(f"{route['matching_sites']:,} sites match these preferences, but only "
+                                   f"{route['planned_days']} of them lie within {route['cluster_radius_km']:,.0f} km of a "
+                                   f"common starting site, so the itinerary covers {route['planned_days']} of "
+                                   f"{route['total_duration']} days.")
+                over_limit = [day['day'] for day in route['days'] if day.get('over_limit')]
+                if over_limit:
+                    st.warning(f"No site was within {route['max_daily_km']:,.0f} km on day(s) "
+                               f"{', '.join(map(str, over_limit))}, so those days take the nearest site and exceed "
+                               f"the daily travel limit.")
                 col1, col2 = st.columns([2, 1])
                 with col1:
                     st.markdown(f"**Duration:** {route.get('total_duration', 'N/A')} days")
                     formatted_cost = format_currency(route.get('estimated_cost', 0))
                     st.markdown(f"**Estimated Cost:** {formatted_cost} per person")
                     st.markdown(f"**Best Time to Visit:** {route.get('best_time', 'N/A')}")
+                    st.markdown(f"**Total Travel:** {route.get('total_travel_km', 0):,.0f} km")
                     st.markdown("#### 📍 Recommended Sites:")
-                    for i, site in enumerate(route.get('sites', []), 1):
+                    for site, day in zip(route.get('sites', []), route.get('days', [])):
                         st.markdown(f"""
                         <div class="recommendation-card">
-                            <h4>{i}. {site.get('site_name', 'Unknown Site')}</h4>
+                            <h4>Day {day.get('day')}: {site.get('site_name', 'Unknown Site')}</h4>
                             <p><strong>Location:</strong> {site.get('state', 'N/A')}</p>
                             <p><strong>Type:</strong> {site.get('type', 'N/A')}</p>
                             <p><strong>Accessibility:</strong> {'⭐' * int(site.get('accessibility_score', 0) * 5)}</p>
+                            <p><strong>Travel:</strong> {day.get('travel_km', 0):.0f} km (~{day.get('travel_hours', 0)} h){' ⚠️ over the daily travel limit' if day.get('over_limit') else ''}</p>
+                            <p><strong>Date:</strong> {day['date']:%a %d %b %Y}{' ⚠️ expected crowd peak' if day.get('crowd_peak') else ''}</p>
+                            <p><strong>Happening:</strong> {', '.join(day.get('festivals', [])) or 'No festivals scheduled'}</p>
                         </div>
                         """, unsafe_allow_html=True)
                 with col2:
                     st.markdown("#### 🎭 Special Experiences:")
                     for exp in route.get('special_experiences', []):
                         st.markdown(f"- {exp}")
+                    if route.get('seasonal_festivals'):
+                        st.markdown("#### 🎉 Festivals During Your Trip:")
+                        for festival in route['seasonal_festivals']:
+                            st.markdown(f"- {festival}")
             except Exception as e:
                 st.error(f"Could not generate itinerary: {e}")
                 st.exception(e)
@@ -447,7 +684,8 @@ def show_recommendations(df_arts, df_sites, df_tourism, processor, recommender,
 def show_insights(df_arts, df_tourism, df_sites, df_festivals, processor):
     st.markdown('<h2 class="sub-header">📈 Data-Driven Insights</h2>', unsafe_allow_html=True)
 
-    tab1, tab2, tab3 = st.tabs(["Key Findings", "Trend Analysis", "Action Items"])
+    tab1, tab2, tab3, tab4, tab5 = st.tabs(
+        ["Key Findings", "Trend Analysis", "Anomalies", "Crowd Simulation", "Action Items"])
 
     with tab1:
         st.markdown("### 🔍 Key Findings")
@@ -490,10 +728,131 @@ def show_insights(df_arts, df_tourism, df_sites, df_festivals, processor):
                     st.plotly_chart(fig, use_container_width=True)
             except Exception as e:
                 st.error(f"Could not perform trend analysis: {e}")
+
+            try:
+                st.markdown("#### 🔮 Visitor Forecast (Next 12 Months)")
+                site_matrix = processor.site_month_matrix(df_tourism)
+                forecast, backtest = processor.get_forecast(site_matrix, horizon=12)
+
+                selected_site = st.selectbox("Select Site", site_matrix.index, key="forecast_site")
+                history = site_matrix.loc[selected_site].dropna()
+                site_forecast = forecast[forecast['site'] == selected_site]
+                plot_df = pd.concat([
+                    pd.DataFrame({'date': history.index.to_timestamp(how='end').normalize(),
+                                  'visitors': history.values, 'series': 'Actual'}),
+                    pd.DataFrame({'date': site_forecast['date'], 'visitors': site_forecast['forecast'],
+                                  'series': 'Forecast'})
+                ])
+                fig = px.line(plot_df, x='date', y='visitors', color='series',
+                              labels={'date': 'Month', 'visitors': 'Total Visitors', 'series': ''},
+                              color_discrete_sequence=['#27ae60', '#8e44ad'])
+                st.plotly_chart(fig, use_container_width=True)
+
+                site_mape = backtest.set_index('site').loc[selected_site, 'mape']
+                n_origins = int(backtest['n_origins'].iloc[0])
+                origins_label = f"averaged over {n_origins} forecast origins" if n_origins > 1 else "single forecast origin"
+                st.caption(f"12-month backtest error (MAPE, {origins_label}): {site_mape:.1%} for this site, "
+                           f"{backtest['mape'].mean():.1%} across all {len(backtest)} sites")
+            except Exception as e:
+                st.warning(f"Could not generate visitor forecasts: {e}")
         else:
             st.warning("Cannot perform trend analysis - 'date' column missing or not in datetime format in tourism data.")
 
     with tab3:
+        st.markdown("### ⚠️ Visitor Anomalies")
+        if 'date' in df_tourism.columns and pd.api.types.is_datetime64_any_dtype(df_tourism['date']):
+            try:
+                threshold = st.slider("Detection Threshold (standard deviations)", 2.0, 5.0, 3.0, 0.5)
+                site_matrix = processor.site_month_matrix(df_tourism)
+                anomalies = AnomalyDetector(threshold=threshold).detect(site_matrix)
+
+                col1, col2, col3 = st.columns(3)
+                col1.metric("Anomalies Flagged", len(anomalies))
+                col2.metric("Spikes", int((anomalies['anomaly_type'] == 'Spike').sum()))
+                col3.metric("Drops", int((anomalies['anomaly_type'] == 'Drop').sum()))
+
+                if not anomalies.empty:
+                    anomalies['date'] = anomalies['period'].dt.to_timestamp()
+                    fig = px.scatter(anomalies, x='date', y='site', color='anomaly_type',
+                                     size=anomalies['anomaly_score'].abs(), hover_data=['visitors', 'expected_visitors'],
+                                     labels={'date': 'Month', 'site': 'Site', 'anomaly_type': 'Type'},
+                                     color_discrete_map={'Spike': '#e67e22', 'Drop': '#2980b9'})
+                    st.plotly_chart(fig, use_container_width=True)
+                    st.dataframe(
+                        anomalies.sort_values('anomaly_score', key=np.abs, ascending=False)
+                        [['site', 'period', 'visitors', 'expected_visitors', 'anomaly_score', 'anomaly_type']]
+                        .astype({'period': str}),
+                        use_container_width=True
+                    )
+                else:
+                    st.info("No unusual visitor spikes or drops detected at this threshold.")
+            except Exception as e:
+                st.error(f"Could not run anomaly detection: {e}")
+        else:
+            st.warning("Cannot detect anomalies - 'date' column missing or not in datetime format in tourism data.")
+
+    with tab4:
+        st.markdown("### 🧪 Hidden Gems Promotion Simulator")
+        st.caption("Simulates a year of monthly demand and moves visitors from overcrowded sites "
+                   "to nearby under-utilized sites under the chosen policy.")
+        if 'crowding_index' in df_tourism.columns and 'date' in df_tourism.columns:
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                crowding_threshold = st.slider("Overcrowding Threshold", 0.5, 1.0, 0.85, 0.05)
+                target_utilization = st.slider("Target Utilization", 0.3, 0.8, 0.6, 0.05)
+            with col2:
+                shift_share = st.slider("Share of Excess Visitors Targeted", 0.0, 1.0, 0.3, 0.05)
+                uptake_mean = st.slider("Expected Promotion Uptake", 0.0, 1.0, 0.5, 0.05)
+            with col3:
+                radius_km = st.slider("Max Distance to Alternative Site (km)", 50, 1000, 300, 50)
+                n_scenarios = st.select_slider("Scenarios", [500, 1000, 2000, 5000], value=2000)
+            policy = {
+                'crowding_threshold': crowding_threshold, 'target_utilization': target_utilization,
+                'shift_share': shift_share, 'uptake_mean': uptake_mean, 'radius_km': radius_km
+            }
+            # Results are kept per policy, so moving a slider back shows the earlier run without re-simulating
+            results = st.session_state.setdefault("simulation_results", {})
+            try:
+                simulator = get_crowd_simulator(df_sites, df_tourism)
+                run_key = (id(simulator), tuple(sorted(policy.items())), n_scenarios)
+                if st.button("Run simulation", key="run_simulation"):
+                    results[run_key] = simulator.run(policy, n_scenarios=n_scenarios)
+                    while len(results) > 8:
+                        results.pop(next(iter(results)))
+                if run_key not in results:
+                    st.info("Adjust the policy and press **Run simulation** to see its effect.")
+                else:
+                    scenarios = results[run_key]
+                    summary = simulator.summarize(scenarios)
+
+                    col1, col2, col3 = st.columns(3)
+                    col1.metric("Overcrowded Site-Months", f"{summary.loc['policy_overcrowded_share', 0.5]:.1%}",
+                                f"{summary.loc['overcrowded_change', 0.5]:+.1%}", delta_color="inverse")
+                    col2.metric("Median Revenue Change", format_currency(summary.loc['revenue_change', 0.5]))
+                    col3.metric("Visitors Redirected / Year",
+                                format_number(int(summary.loc['visitors_shifted', 0.5])))
+
+                    col1, col2 = st.columns(2)
+                    with col1:
+                        crowding = pd.concat([
+                            pd.DataFrame({'share': scenarios['baseline_overcrowded_share'], 'policy': 'Current'}),
+                            pd.DataFrame({'share': scenarios['policy_overcrowded_share'], 'policy': 'Promotion'})
+                        ])
+                        fig = px.histogram(crowding, x='share', color='policy', barmode='overlay', nbins=40,
+                                           labels={'share': 'Share of Overcrowded Site-Months', 'policy': ''},
+                                           color_discrete_sequence=['#e74c3c', '#27ae60'])
+                        st.plotly_chart(fig, use_container_width=True)
+                    with col2:
+                        fig = px.histogram(scenarios, x='revenue_change', nbins=40,
+                                           labels={'revenue_change': 'Annual Revenue Change (₹)'},
+                                           color_discrete_sequence=['#3498db'])
+                        st.plotly_chart(fig, use_container_width=True)
+            except Exception as e:
+                st.error(f"Could not run the crowd simulation: {e}")
+        else:
+            st.warning("Crowd simulation requires 'crowding_index' and 'date' columns in the tourism data.")
+
+    with tab5:
         st.markdown("### 🎯 Recommended Actions")
         col1, col2 = st.columns(2)
         with col1:
@@ -0,0 +1,963 @@
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from components.recommendations import RecommendationEngine
+from components.ann_index import RandomProjectionForest
+from components.similarity import SimilarityIndex
+from data.data_processor import DataProcessor
+from data.forecasting import TourismForecaster
+from data.anomaly import AnomalyDetector
+from data.simulation import CrowdSimulator
+from data.spatial_index import SpatialIndex
+from utils.helpers import calculate_distance, haversine_condensed, haversine_one_to_many, haversine_pairwise
+from data.parallel import ParallelExecutor
+
+
+def _timed(func, *args, repeat=3, **kwargs):
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def make_national_tourism(n_sites=20000, n_months=60, seed=0):
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range('2020-01-31', periods=n_months, freq='ME')
+    base = rng.integers(5000, 50000, n_sites)
+    seasonal = 1 + 0.3 * np.sin(2 * np.pi * dates.month.to_numpy() / 12)
+    trend = 1 + 0.02 * (dates.year.to_numpy() - dates.year[0])
+    visitors = (base[:, None] * seasonal * trend * rng.uniform(0.8, 1.2, (n_sites, n_months))).astype(np.int64)
+
+    return pd.DataFrame({
+        'site': np.repeat([f'Site {i}' for i in range(n_sites)], n_months),
+        'date': np.tile(dates, n_sites),
+        'domestic_visitors': (visitors * 0.7).astype(np.int64).ravel(),
+        'international_visitors': (visitors * 0.3).astype(np.int64).ravel()
+    })
+
+
+def bench_parallel_analytics():
+    df_tourism = make_national_tourism()
+    print(f"Tourism rows: {len(df_tourism):,}")
+
+    serial = DataProcessor(ParallelExecutor(n_workers=1))
+    serial_time, (_, expected) = _timed(serial.identify_tourism_patterns, df_tourism)
+    print(f"serial      {serial_time * 1000:8.1f} ms")
+
+    for n_workers in sorted({2, 4, os.cpu_count() or 1}):
+        processor = DataProcessor(ParallelExecutor(n_workers=n_workers, min_rows=0))
+        elapsed, (_, growth_trends) = _timed(processor.identify_tourism_patterns, df_tourism)
+        pd.testing.assert_frame_equal(expected, growth_trends)
+        print(f"{n_workers:2d} workers  {elapsed * 1000:8.1f} ms  speedup {serial_time / elapsed:4.2f}x")
+
+    # Regional routes rank each region's sites in a worker once the catalog passes min_rows
+    df_sites = make_national_sites(1000000)
+    df_arts = pd.DataFrame({'state': df_sites['state'], 'art_form': df_sites['type']})
+    serial_time, expected = _timed(serial.recommend_cultural_routes, df_sites, df_arts, repeat=1)
+    pooled = DataProcessor(ParallelExecutor(min_rows=0))
+    pooled_time, routes = _timed(pooled.recommend_cultural_routes, df_sites, df_arts, repeat=1)
+    pd.testing.assert_frame_equal(expected, routes)
+    print(f"routes, {len(df_sites):,} sites: serial {serial_time * 1000:.1f} ms  pooled {pooled_time * 1000:.1f} ms")
+
+
+def bench_forecasting():
+    processor = DataProcessor()
+    df_tourism = make_national_tourism(n_sites=5000)
+    df_tourism['total_visitors'] = df_tourism['domestic_visitors'] + df_tourism['international_visitors']
+    matrix = processor.site_month_matrix(df_tourism)
+    print(f"Series: {matrix.shape[0]:,} sites x {matrix.shape[1]} months")
+
+    fit_time, forecaster = _timed(lambda: TourismForecaster().fit(matrix.iloc[:, :-1]))
+    print(f"fit all series        {fit_time * 1000:8.1f} ms")
+
+    update_time, _ = _timed(forecaster.update, matrix.iloc[:, -1], matrix.columns[-1], repeat=1)
+    print(f"incremental refit     {update_time * 1000:8.1f} ms")
+    full = TourismForecaster().fit(matrix)
+    assert np.allclose(forecaster.coef_, full.coef_)
+    try:
+        forecaster.update(matrix.iloc[:, -1], matrix.columns[-1])
+        raise AssertionError("a month was accepted twice")
+    except ValueError:
+        pass
+
+    predict_time, _ = _timed(forecaster.predict_matrix, 12)
+    print(f"12-month forecast     {predict_time * 1000:8.1f} ms")
+
+    backtest_time, backtest = _timed(forecaster.backtest, matrix, 12, repeat=1)
+    n_origins = int(backtest['n_origins'].iloc[0])
+    print(f"backtest ({n_origins} origins)  {backtest_time * 1000:8.1f} ms  mean MAPE {backtest['mape'].mean():.2%}")
+    # A series too short for three origins falls back to fewer and says so
+    assert TourismForecaster().backtest(matrix.iloc[:, :30], 12)['n_origins'].iloc[0] == 1
+
+    cold_time, (_, cold_backtest) = _timed(processor.get_forecast, matrix, 12, repeat=1)
+    warm_time, (_, warm_backtest) = _timed(processor.get_forecast, matrix.copy(), 12)
+    assert warm_backtest is cold_backtest
+    print(f"app forecast: cold {cold_time * 1000:.1f} ms  warm {warm_time * 1000:.1f} ms")
+
+
+def bench_anomaly_detection(n_series=100000, n_months=60):
+    rng = np.random.default_rng(0)
+    periods = pd.period_range('2020-01', periods=n_months, freq='M')
+    seasonal = 1 + 0.3 * np.sin(2 * np.pi * np.asarray(periods.month) / 12)
+    values = rng.integers(5000, 50000, (n_series, 1)) * seasonal * rng.uniform(0.9, 1.1, (n_series, n_months))
+    matrix = pd.DataFrame(values, index=[f'Site {i}' for i in range(n_series)], columns=periods)
+    print(f"Series: {n_series:,} sites x {n_months} months")
+
+    detector = AnomalyDetector()
+    batch_time, _ = _timed(detector.score_matrix, matrix)
+    print(f"batch scoring          {batch_time * 1000:8.1f} ms")
+
+    detect_time, anomalies = _timed(detector.detect, matrix, repeat=1)
+    print(f"batch detect + flag    {detect_time * 1000:8.1f} ms  ({len(anomalies):,} flagged)")
+
+    detector.init_online(matrix.iloc[:, :-1])
+    online_time, _ = _timed(detector.score_next, matrix.iloc[:, -1], periods[-1], repeat=1)
+    print(f"online, one new month  {online_time * 1000:8.1f} ms")
+
+    # Batch scores use only earlier months, so they match the online path fed the same history
+    sample = matrix.iloc[:2000]
+    scores, _ = AnomalyDetector().score_matrix(sample)
+    for column in (30, 45, n_months - 1):
+        online = AnomalyDetector(threshold=0).init_online(sample.iloc[:, :column])
+        online = online.score_next(sample.iloc[:, column], periods[column]).set_index('site')['anomaly_score']
+        batch = scores.iloc[:, column]
+        assert np.allclose(online.reindex(batch.index).fillna(0), batch.fillna(0))
+
+
+def make_national_sites(n_sites=2000, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'site_name': [f'Heritage Site {i}' for i in range(n_sites)],
+        'state': rng.choice(['Rajasthan', 'Kerala', 'Odisha', 'Assam', 'Gujarat'], n_sites),
+        'type': rng.choice(['Temple', 'Monument', 'Palace', 'Fort', 'Museum', 'Heritage Village'], n_sites),
+        'unesco_status': rng.choice(['Inscribed', 'Tentative', 'None'], n_sites),
+        'conservation_status': rng.choice(['Excellent', 'Good', 'Fair', 'Poor'], n_sites),
+        'annual_maintenance_cost': rng.integers(100000, 5000000, n_sites),
+        'visitor_capacity': rng.integers(1000, 10000, n_sites),
+        'current_utilization': rng.uniform(0.3, 0.95, n_sites),
+        'accessibility_score': rng.uniform(0.4, 1.0, n_sites),
+        'digital_presence_score': rng.uniform(0.2, 1.0, n_sites),
+        'latitude': 20 + rng.uniform(-10, 15, n_sites),
+        'longitude': 78 + rng.uniform(-15, 15, n_sites)
+    })
+
+
+def bench_crowd_simulation():
+    df_tourism = make_national_tourism(n_sites=200)
+    df_tourism['total_visitors'] = df_tourism['domestic_visitors'] + df_tourism['international_visitors']
+    df_tourism['revenue'] = df_tourism['total_visitors'] * 120
+    df_tourism['crowding_index'] = np.random.default_rng(0).uniform(0.3, 0.9, len(df_tourism))
+
+    for n_sites in [300, 2000]:
+        df_sites = make_national_sites(n_sites)
+        for n_workers in sorted({1, os.cpu_count() or 1}):
+            simulator = CrowdSimulator(df_sites, df_tourism, ParallelExecutor(n_workers=n_workers, min_rows=0))
+            elapsed, scenarios = _timed(simulator.run, n_scenarios=2000, repeat=1)
+            print(f"{n_sites:5d} sites, 2000 scenarios, {n_workers:2d} workers  {elapsed * 1000:8.1f} ms  "
+                  f"median revenue change {scenarios['revenue_change'].median():,.0f}")
+
+
+def bench_similarity_search(n_sites=100000, n_queries=1000):
+    df_sites = make_national_sites(n_sites)
+    recommender = RecommendationEngine()
+    queries = df_sites['site_name'].sample(n_queries, random_state=0).tolist()
+    print(f"Catalog: {n_sites:,} sites, {n_queries:,} queries")
+
+    build_time, index = _timed(SimilarityIndex, df_sites, repeat=1)
+    print(f"index build            {build_time * 1000:8.1f} ms")
+    recommender.get_similarity_index(df_sites)
+
+    single_time, _ = _timed(recommender.find_similar_destinations, queries[0], df_sites)
+    print(f"single query           {single_time * 1000:8.1f} ms")
+
+    batch_time, _ = _timed(recommender.find_similar_destinations_batch, queries, df_sites, repeat=1)
+    print(f"batch query            {batch_time * 1000:8.1f} ms  ({n_queries / batch_time:,.0f} queries/s)")
+
+    # Appended rows go through add_sites: the index covers the grown catalog but is marked incremental,
+    # since the scaler was not refitted
+    extra = make_national_sites(n_sites // 100)
+    extra['site_name'] = extra['site_name'] + ' (new)'
+    grown = pd.concat([df_sites, extra], ignore_index=True)
+    index = recommender.get_similarity_index(df_sites)
+    append_time, grown_index = _timed(recommender.get_similarity_index, grown, repeat=1)
+    assert grown_index is index and len(index) == len(grown)
+    assert index.rows_version == SimilarityIndex.fingerprint(grown) != index.version
+    assert recommender.get_similarity_index(grown.copy()) is index
+    print(f"append {len(extra):,} sites      {append_time * 1000:8.1f} ms  (full build {build_time * 1000:.1f} ms)")
+
+    # Growing past the threshold switches the index to the forest
+    small = SimilarityIndex(df_sites.iloc[:1000], ann_threshold=1500)
+    small.add_sites(df_sites.iloc[1000:2000])
+    assert small.ann is not None and len(small.ann) == len(small)
+    # More appended rows than the scaler was fitted on trigger a rebuild
+    doubled = pd.concat([grown, df_sites.assign(site_name=df_sites['site_name'] + ' (2)')], ignore_index=True)
+    rebuilt = recommender.get_similarity_index(doubled)
+    assert rebuilt is not index and rebuilt.version == rebuilt.rows_version
+
+
+def bench_ann_search(n_sites=200000, n_queries=1000, k=10):
+    import tempfile
+
+    df_sites = make_national_sites(n_sites)
+    exact_index = SimilarityIndex(df_sites, ann_threshold=None)
+    queries = np.random.default_rng(1).choice(n_sites, n_queries, replace=False)
+    print(f"Catalog: {n_sites:,} sites, {n_queries:,} queries, k={k}")
+
+    exact_time, (truth, _) = _timed(exact_index.top_k, queries, k, repeat=1)
+    print(f"exact                       {exact_time / n_queries * 1000:7.3f} ms/query")
+
+    for n_trees in [2, 5, 10, 20]:
+        build_time, forest = _timed(
+            lambda: RandomProjectionForest(n_trees=n_trees).build(exact_index.vectors), repeat=1)
+        query_time, (found, _) = _timed(forest.query, exact_index.vectors[queries], k, queries, repeat=1)
+        recall = np.mean([len(np.intersect1d(a, b)) / k for a, b in zip(found, truth)])
+        print(f"forest, {n_trees:2d} trees  build {build_time:6.2f} s  "
+              f"{query_time / n_queries * 1000:7.3f} ms/query  recall@{k} {recall:.3f}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'forest.npz')
+        save_time, _ = _timed(forest.save, path, repeat=1)
+        load_time, loaded = _timed(RandomProjectionForest.load, path, repeat=1)
+        print(f"save {save_time * 1000:.1f} ms, load {load_time * 1000:.1f} ms, "
+              f"{os.path.getsize(path) / 1e6:.1f} MB")
+
+    extra = make_national_sites(10000, seed=1)
+    insert_time, _ = _timed(loaded.insert, exact_index._embed(extra), repeat=1)
+    print(f"insert 10,000 sites         {insert_time * 1000:7.1f} ms")
+
+
+def bench_spatial_index(n_sites=200000, n_queries=200):
+    df_sites = make_national_sites(n_sites)
+    rng = np.random.default_rng(2)
+    lats, lons = 20 + rng.uniform(-10, 15, n_queries), 78 + rng.uniform(-15, 15, n_queries)
+    print(f"Catalog: {n_sites:,} sites")
+
+    build_time, index = _timed(SpatialIndex, df_sites, repeat=1)
+    print(f"build                     {build_time * 1000:8.1f} ms")
+
+    points = list(zip(df_sites['latitude'], df_sites['longitude']))
+    scan_time, _ = _timed(lambda: [p for p in points if calculate_distance((lats[0], lons[0]), p) <= 50], repeat=1)
+    print(f"full scan, 50 km radius   {scan_time * 1000:8.1f} ms/query")
+
+    radius_time, _ = _timed(index.query_radius_batch, lats, lons, 50)
+    print(f"index, 50 km radius       {radius_time / n_queries * 1000:8.3f} ms/query")
+
+    knn_time, _ = _timed(index.query_knn_batch, lats, lons, 10)
+    print(f"index, 10 nearest         {knn_time / n_queries * 1000:8.3f} ms/query")
+
+    bbox_time, _ = _timed(lambda: [index.query_bbox(la - 1, lo - 1, la + 1, lo + 1) for la, lo in zip(lats, lons)])
+    print(f"index, 2 x 2 degree box   {bbox_time / n_queries * 1000:8.3f} ms/query")
+
+
+def bench_haversine(n_points=5000):
+    rng = np.random.default_rng(3)
+    lats, lons = 20 + rng.uniform(-10, 15, n_points), 78 + rng.uniform(-15, 15, n_points)
+    origin = (lats[0], lons[0])
+    print(f"Points: {n_points:,}")
+
+    scalar_time, scalar = _timed(lambda: np.array([calculate_distance(origin, p) for p in zip(lats, lons)]))
+    vector_time, vector = _timed(haversine_one_to_many, origin, lats, lons)
+    assert np.allclose(scalar, vector, atol=1e-6)
+    print(f"one-to-many   scalar {scalar_time * 1000:8.2f} ms  vectorized {vector_time * 1000:7.3f} ms  "
+          f"({scalar_time / vector_time:,.0f}x)")
+
+    sample = slice(0, 300)
+    scalar_time, scalar = _timed(lambda: np.array([[calculate_distance(a, b) for b in zip(lats[sample], lons[sample])]
+                                                   for a in zip(lats[sample], lons[sample])]), repeat=1)
+    vector_time, vector = _timed(haversine_pairwise, lats[sample], lons[sample], dtype=np.float64)
+    assert np.allclose(scalar, vector, atol=1e-6)
+    print(f"300 x 300     scalar {scalar_time * 1000:8.2f} ms  vectorized {vector_time * 1000:7.3f} ms  "
+          f"({scalar_time / vector_time:,.0f}x)")
+
+    pairwise_time, pairwise = _timed(haversine_pairwise, lats, lons)
+    error = np.abs(pairwise[:300, :300] - scalar).max()
+    print(f"pairwise {n_points:,}^2 float32        {pairwise_time * 1000:8.1f} ms  "
+          f"{pairwise.nbytes / 1e6:6.1f} MB  max error {error * 1000:.2f} m")
+
+    condensed_time, condensed = _timed(haversine_condensed, lats, lons)
+    rows, cols = np.triu_indices(n_points, k=1)
+    assert np.array_equal(condensed, pairwise[rows, cols])
+    print(f"condensed {n_points:,} float32       {condensed_time * 1000:8.1f} ms  {condensed.nbytes / 1e6:6.1f} MB")
+
+
+def bench_itinerary(n_sites=300000):
+    from data.data_loader import DataLoader
+
+    df_sites = make_national_sites(n_sites)
+    df_arts = DataLoader().load_art_forms_data()
+    recommender = RecommendationEngine()
+    print(f"Catalog: {n_sites:,} sites")
+
+    for interest in ['All Heritage Sites', 'Off-beat Locations', 'Art & Craft']:
+        preferences = {'duration': 14, 'budget': 'Mid-range', 'interest': interest,
+                       'travel_style': 'Cultural Immersion', 'season': 'Winter', 'group_size': 4}
+        cold_time, route = _timed(recommender.generate_personalized_route, preferences, df_sites, df_arts, repeat=1)
+        warm_time, repeat_route = _timed(recommender.generate_personalized_route, preferences, df_sites, df_arts)
+        assert route == repeat_route
+        print(f"{interest:20s} first {cold_time * 1000:7.1f} ms  warm {warm_time * 1000:6.1f} ms  "
+              f"{len(route['days'])} days, {route['total_travel_km']:,.0f} km")
+        assert all(day['over_limit'] == (day['travel_km'] > route['max_daily_km']) for day in route['days'])
+
+    # Sites ~550 km apart: every match fits the preferences, but the cluster radius keeps only a few of them
+    # and each transfer is over the daily limit
+    sparse = make_national_sites(6).assign(latitude=8.0 + 5 * np.arange(6), longitude=78.0,
+                                           accessibility_score=0.9, unesco_status='Inscribed')
+    route = recommender.generate_personalized_route(dict(preferences, duration=6), sparse, df_arts)
+    assert route['matching_sites'] == 6 and route['planned_days'] < 6
+    assert all(day['over_limit'] for day in route['days'][1:])
+
+
+def make_profiles(n_profiles=20000, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'duration': rng.integers(1, 15, n_profiles),
+        'budget': rng.choice(['Budget', 'Mid-range', 'Luxury'], n_profiles),
+        'interest': rng.choice(['All Heritage Sites', 'UNESCO Sites', 'Off-beat Locations', 'Art & Craft',
+                                'Festivals'], n_profiles),
+        'travel_style': rng.choice(['Cultural Immersion', 'Photography', 'Family', 'Adventure'], n_profiles),
+        'season': rng.choice(['Winter', 'Spring', 'Monsoon', 'Autumn'], n_profiles),
+        'group_size': rng.integers(1, 21, n_profiles)
+    })
+
+
+def bench_batch_recommendations(n_sites=20000, n_profiles=20000):
+    from data.data_loader import DataLoader
+
+    loader = DataLoader()
+    df_sites = make_national_sites(n_sites)
+    df_arts = loader.load_art_forms_data()
+    df_festivals = loader.load_festival_data()
+    profiles = make_profiles(n_profiles)
+    recommender = RecommendationEngine()
+    print(f"Catalog: {n_sites:,} sites, {n_profiles:,} profiles")
+
+    batch_time, itineraries = _timed(recommender.generate_personalized_routes_batch, profiles, df_sites, df_arts,
+                                     df_festivals, repeat=1)
+    print(f"batch: {batch_time:.2f}s ({n_profiles / batch_time:,.0f} profiles/s)")
+
+    sample = profiles.sample(50, random_state=0)
+    # Both paths schedule against the same festival calendar
+    geo_index = recommender.get_geo_index(df_sites, df_arts)
+    calendar = recommender.get_event_calendar(df_festivals)
+    loop_time, plans = _timed(lambda: [
+        recommender.planner.plan(profile, df_sites, geo_index, df_festivals, calendar=calendar)
+        for profile in sample.to_dict('records')
+    ], repeat=1)
+    print(f"loop:  {loop_time:.2f}s for {len(sample)} profiles ({len(sample) / loop_time:,.0f} profiles/s)")
+
+    site_names = df_sites['site_name'].to_numpy()
+    for profile, days in zip(sample.index, plans):
+        batch_days = itineraries[itineraries['profile'] == profile]
+        assert batch_days[['day', 'site_name', 'travel_km', 'date', 'crowding']].to_dict('records') == [
+            {'day': day['day'], 'site_name': site_names[day['position']], 'travel_km': day['travel_km'],
+             'date': day['date'], 'crowding': day['crowding']}
+            for day in days
+        ]
+
+
+def bench_cultural_index(n_arts=1000000, n_festivals=200000, seed=0):
+    from config import REGIONS
+    from data.cultural_index import CulturalIndex
+
+    rng = np.random.default_rng(seed)
+    states = sorted({state for region_states in REGIONS.values() for state in region_states})
+    df_arts = pd.DataFrame({
+        'state': rng.choice(states, n_arts),
+        'art_form': rng.choice([f'Art Form {i}' for i in range(500)], n_arts)
+    })
+    df_festivals = pd.DataFrame({
+        'festival': rng.choice([f'Festival {i}' for i in range(300)], n_festivals),
+        'state': rng.choice(states, n_festivals),
+        'month': rng.integers(1, 13, n_festivals)
+    })
+    print(f"Arts: {n_arts:,} rows, festivals: {n_festivals:,} rows")
+
+    build_time, index = _timed(CulturalIndex, df_arts, df_festivals, repeat=1)
+    print(f"build: {build_time:.2f}s")
+
+    route_states = states[:5]
+    months = [10, 11, 12]
+    scan_time, scanned = _timed(lambda: (
+        [np.flatnonzero(df_arts['state'].to_numpy() == state) for state in route_states],
+        np.flatnonzero(df_festivals['state'].isin(route_states).to_numpy()
+                       & df_festivals['month'].isin(months).to_numpy())
+    ))
+    lookup_time, looked_up = _timed(lambda: (
+        [index.arts([state]) for state in route_states],
+        index.festivals(route_states, months)
+    ))
+    for expected, found in zip(scanned[0], looked_up[0]):
+        assert np.array_equal(expected, found)
+    assert np.array_equal(scanned[1], looked_up[1])
+    print(f"scan: {scan_time * 1000:.1f} ms  index: {lookup_time * 1000:.1f} ms  "
+          f"({scan_time / lookup_time:.0f}x)")
+
+
+def _row_features(site):
+    features = []
+    if site['unesco_status'] == 'Inscribed':
+        features.append('UNESCO World Heritage Site')
+    if site['accessibility_score'] > 0.8:
+        features.append('Excellent Accessibility')
+    if site['conservation_status'] in ['Excellent', 'Good']:
+        features.append('Well Preserved')
+    if site['digital_presence_score'] > 0.7:
+        features.append('Strong Digital Presence')
+    return ', '.join(features) if features else 'Historical Significance'
+
+
+def _row_tips(site):
+    tips = []
+    if site['current_utilization'] > 0.8:
+        tips.append('Visit during weekdays to avoid crowds')
+    if site['accessibility_score'] < 0.5:
+        tips.append('Prepare for limited accessibility')
+    if site['type'] == 'Temple':
+        tips.append('Dress modestly and remove footwear')
+    return '; '.join(tips) if tips else 'Check local guidelines before visiting'
+
+
+def bench_sustainable_rules(n_sites=1000000, n_loop=20000):
+    df_sites = make_national_sites(n_sites)
+    metrics = pd.DataFrame({
+        'site': df_sites['site_name'],
+        'overall_sustainability': np.random.default_rng(1).uniform(0, 1, n_sites)
+    })
+    recommender = RecommendationEngine()
+    print(f"Catalog: {n_sites:,} sites")
+
+    # The first call also builds the engine's name registry for the catalog; later calls reuse it
+    registry_time, _ = _timed(recommender.get_site_registry, df_sites, repeat=1)
+    print(f"site registry build: {registry_time:.2f}s (first call only)")
+    elapsed, recommendations = _timed(recommender.recommend_sustainable_sites, df_sites, metrics, None, repeat=1)
+    print(f"rules engine, full catalog: {elapsed:.2f}s ({n_sites / elapsed:,.0f} sites/s)")
+
+    sample = df_sites.head(n_loop)
+    loop_time, rows = _timed(lambda: [(_row_features(site), _row_tips(site)) for _, site in sample.iterrows()],
+                             repeat=1)
+    print(f"iterrows, {n_loop:,} sites: {loop_time:.2f}s "
+          f"(~{loop_time * n_sites / n_loop:.0f}s extrapolated to the full catalog)")
+
+    labelled = recommendations.set_index('site').loc[sample['site_name']]
+    assert labelled['key_features'].tolist() == [features for features, _ in rows]
+    assert labelled['visitor_tips'].tolist() == [tips for _, tips in rows]
+
+
+def bench_event_calendar(n_events=100000, seed=0):
+    from config import REGIONS
+    from data.event_calendar import EventCalendar
+
+    rng = np.random.default_rng(seed)
+    states = sorted({state for region_states in REGIONS.values() for state in region_states})
+    start = pd.Timestamp('2026-01-01')
+    event_start = start + pd.to_timedelta(rng.integers(0, 730, n_events), unit='D')
+    df_events = pd.DataFrame({
+        'event_name': [f'Event {i}' for i in range(n_events)],
+        'state': rng.choice(states, n_events),
+        'start_date': event_start,
+        'end_date': event_start + pd.to_timedelta(rng.integers(0, 7, n_events), unit='D'),
+        'expected_attendance': rng.integers(1000, 100000, n_events)
+    })
+    print(f"Events: {n_events:,}")
+
+    build_time, calendar = _timed(EventCalendar, None, df_events, None, start, repeat=1)
+    print(f"build: {build_time:.2f}s")
+
+    # Every start day of the horizon against a 14-day route, as the scheduler evaluates it
+    route_states = rng.choice(states, 14)
+    slots = np.arange(calendar.n_days - 13)[:, None] + np.arange(14)[None, :]
+    grid_time, _ = _timed(calendar.lookup, route_states, slots)
+    print(f"daily grid: {slots.size:,} day-slots in {grid_time * 1000:.2f} ms")
+
+    days = rng.integers(calendar.first_day, calendar.first_day + calendar.n_days, 1000)
+    query_states = rng.choice(states, 1000)
+    interval_time, found = _timed(lambda: [calendar.positions_between(state, day, day)
+                                           for state, day in zip(query_states, days)])
+    print(f"interval queries: {interval_time / len(days) * 1e6:.1f} us each")
+
+    for state, day, positions in list(zip(query_states, days, found))[:50]:
+        expected = np.flatnonzero((calendar.events['state'].to_numpy() == state)
+                                  & (calendar.starts <= day) & (calendar.ends >= day))
+        assert np.array_equal(np.sort(positions), expected)
+
+    # Days past the horizon are rejected; the engine builds a calendar that covers a fixed far-off trip
+    try:
+        calendar.lookup(route_states, slots + 14)
+        raise AssertionError("a day outside the horizon was scored")
+    except ValueError:
+        pass
+    recommender = RecommendationEngine()
+    trip_start = pd.Timestamp.today() + pd.Timedelta(days=1000)
+    trip_calendar = recommender.get_event_calendar(None, df_events, None, start_date=trip_start, n_days=14)
+    assert trip_calendar.covers(trip_start, 14) and trip_calendar is not recommender.get_event_calendar(None, df_events)
+
+
+def bench_entity_resolution(n_sites=300000, n_months=60, seed=0):
+    from data.entity_resolution import SiteRegistry
+
+    rng = np.random.default_rng(seed)
+    df_sites = make_national_sites(n_sites)
+    tourism_sites = rng.choice(df_sites['site_name'].to_numpy(), 2000, replace=False)
+    # A share of tourism names are spelled differently from the catalog
+    variants = np.array([name.upper() if i % 3 == 0 else f'The {name} Complex' if i % 3 == 1 else name
+                         for i, name in enumerate(tourism_sites)], dtype=object)
+    df_tourism = pd.DataFrame({
+        'site': np.repeat(variants, n_months),
+        'total_visitors': rng.integers(1000, 100000, len(variants) * n_months)
+    })
+    print(f"Catalog: {n_sites:,} sites, tourism: {len(df_tourism):,} rows over {len(variants):,} names")
+
+    build_time, registry = _timed(SiteRegistry, df_sites, repeat=1)
+    resolve_time, site_ids = _timed(registry.resolve, df_tourism['site'], repeat=1)
+    cached_time, _ = _timed(registry.resolve, df_tourism['site'])
+    print(f"registry build: {build_time:.2f}s  first resolve: {resolve_time:.2f}s  cached resolve: "
+          f"{cached_time * 1000:.1f} ms")
+
+    def string_join():
+        visits = df_tourism.groupby('site')['total_visitors'].sum().reset_index()
+        return pd.merge(df_sites, visits, left_on='site_name', right_on='site', how='left')['total_visitors']
+
+    def id_join():
+        visits, _ = registry.aggregate(registry.resolve(df_tourism['site']), df_tourism['total_visitors'])
+        return registry.gather(registry.site_ids, visits)
+
+    string_time, by_name = _timed(string_join)
+    id_time, by_id = _timed(id_join)
+    print(f"string join: {string_time * 1000:.1f} ms, {by_name.notna().sum():,} sites matched")
+    print(f"id join:     {id_time * 1000:.1f} ms, {np.count_nonzero(~np.isnan(by_id)):,} sites matched")
+    assert np.count_nonzero(~np.isnan(by_id)) == len(tourism_sites)
+
+    # Numbered sites differ by a digit or two; a near miss on the number must not merge them
+    numbered = pd.DataFrame({'site_name': [f'Kerala Heritage Site {i}' for i in [3, 4, 13]]})
+    numbered_registry = SiteRegistry(numbered)
+    resolved = numbered_registry.resolve(['Kerala Heritage Site 13', 'Kerala Heritage Site 44',
+                                          'The Kerala Heritage Site 13 Complex', 'Kerala Heritage Sites 3'])
+    assert resolved.tolist() == [2, -1, 2, 0]
+    assert SiteRegistry(numbered.iloc[:2]).resolve(['Kerala Heritage Site 13']).tolist() == [-1]
+
+
+def bench_search_index(n_docs=1000000, seed=0):
+    from data.search_index import SearchIndex, clean_text
+
+    rng = np.random.default_rng(seed)
+    syllables = np.array(['ka', 'tha', 'li', 'ma', 'ra', 'ja', 'sthan', 'pur', 'gar', 'nat', 'ya', 'bha', 'ro',
+                          'ti', 'odi', 'ssi', 'ku', 'chi', 'pu', 'di', 'man', 'dir', 'fort', 'ghat', 'van'])
+    parts = rng.choice(syllables, (3, 60000))
+    words = pd.unique(np.char.add(np.char.add(parts[0], parts[1]), parts[2]))
+    titles = pd.Series(rng.choice(words, n_docs)) + ' ' + pd.Series(rng.choice(words, n_docs))
+    bodies = (pd.Series(rng.choice(['Dance', 'Music', 'Temple', 'Fort', 'Festival', 'Craft'], n_docs)) + ' '
+              + pd.Series(rng.choice(['Kerala', 'Rajasthan', 'Odisha', 'Assam', 'Punjab', 'Tamil Nadu'], n_docs)))
+    print(f"Corpus: {n_docs:,} documents over {len(words):,} distinct title words")
+
+    index = SearchIndex()
+    build_time, _ = _timed(index.add, 'docs', np.arange(n_docs), titles, bodies, repeat=1)
+    print(f"build: {build_time:.2f}s, {len(index.vocabulary):,} terms")
+
+    word = titles.iloc[0].split()[0]
+    typo = word[:-1] + ('a' if word[-1] != 'a' else 'e')
+    queries = [word[:2], word[:4], word, f'{word} kerala', f'kerala {word[:3]}', typo]
+    for query in queries:
+        query_time, results = _timed(index.search, query)
+        print(f"{query!r:24} {query_time * 1000:6.1f} ms  top: {results['title'].iloc[0] if len(results) else '-'}")
+
+    # All-token matches agree with a brute-force scan over the cleaned text
+    cleaned = ' ' + clean_text(titles + ' ' + bodies) + ' '
+    expected = np.flatnonzero((cleaned.str.contains(f' {word} ', regex=False)
+                               & cleaned.str.contains(' kerala ', regex=False)).to_numpy())
+    found = index.search(f'{word} kerala', k=n_docs, prefix=False)['ref'].to_numpy()
+    assert np.array_equal(np.sort(found), expected)
+
+    # Incremental update: a small batch is indexed without rebuilding and replaces earlier versions
+    refs = rng.choice(n_docs, 1000, replace=False)
+    update_time, _ = _timed(index.add, 'docs', refs, ['Zanskar Monastery'] * len(refs), repeat=1)
+    remove_time, _ = _timed(index.remove, 'docs', refs[:500], repeat=1)
+    assert len(index.search('zanskar monastery', k=n_docs)) == 500
+    assert len(index) == n_docs - 500
+    merge_time, _ = _timed(index.merge, repeat=1)
+    print(f"add 1,000: {update_time * 1000:.1f} ms  remove 500: {remove_time * 1000:.1f} ms  "
+          f"merge: {merge_time:.2f}s")
+
+    # A reload goes through update: only changed rows are re-indexed and rows that are gone are tombstoned
+    synced = SearchIndex()
+    synced.update('docs', np.arange(n_docs), titles, bodies)
+    reloaded = titles.copy()
+    reloaded.iloc[refs] = 'Zanskar Monastery'
+    keep = n_docs - 500
+    sync_time, changed = _timed(synced.update, 'docs', np.arange(keep), reloaded[:keep], bodies[:keep], repeat=1)
+    fresh = SearchIndex()
+    fresh.add('docs', np.arange(keep), reloaded[:keep], bodies[:keep])
+    for query in ['zanskar monastery', f'{word} kerala']:
+        assert np.array_equal(np.sort(synced.search(query, k=n_docs, prefix=False)['ref'].to_numpy()),
+                              np.sort(fresh.search(query, k=n_docs, prefix=False)['ref'].to_numpy()))
+    print(f"reload via update: {sync_time:.2f}s, {changed:,} rows re-indexed, {len(synced):,} live documents")
+
+
+def make_national_arts(n_arts=10000, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'state': rng.choice(['Rajasthan', 'Kerala', 'Odisha', 'Assam', 'Gujarat'], n_arts),
+        'art_form': rng.choice([f'Art Form {i}' for i in range(500)], n_arts),
+        'category': rng.choice(['Dance', 'Music', 'Painting', 'Craft', 'Theatre'], n_arts),
+        'practitioners': rng.integers(100, 5000, n_arts),
+        'risk_level': rng.choice(['Safe', 'Vulnerable', 'Endangered'], n_arts),
+        'age_years': rng.integers(100, 2000, n_arts),
+        'latitude': 20 + rng.uniform(-10, 15, n_arts),
+        'longitude': 78 + rng.uniform(-15, 15, n_arts)
+    })
+
+
+def bench_art_forms_map(sizes=(1000, 5000, 20000, 100000), max_legacy=5000):
+    from components.maps import MapVisualizer
+
+    map_viz = MapVisualizer()
+    for n_arts in sizes:
+        df_arts = make_national_arts(n_arts)
+        line = f"{n_arts:>7,} points"
+        for fast in (False, True):
+            if not fast and n_arts > max_legacy:
+                continue
+            build_time, html = _timed(lambda: map_viz.create_art_forms_map(df_arts, fast=fast).get_root().render(),
+                                      repeat=1)
+            line += (f"  {'columnar' if fast else 'per-marker'}: {build_time:6.2f}s "
+                     f"{len(html) / 1e6:7.2f} MB ({len(html) / n_arts:,.0f} B/point)")
+        print(line)
+
+
+def bench_heritage_map(n_sites=200000, n_legacy=2000):
+    from components.maps import MapVisualizer
+    from data.spatial_index import GridPyramid
+
+    df_sites = make_national_sites(n_sites)
+    build_time, grid = _timed(GridPyramid, df_sites, 'unesco_status', ['Inscribed', 'Tentative'], repeat=1)
+    print(f"Sites: {n_sites:,}, pyramid build: {build_time:.2f}s for zooms {grid.min_zoom}-{grid.max_zoom}")
+    for zoom in range(grid.min_zoom, grid.max_zoom + 1):
+        assert grid.cells(zoom)['count'].sum() == n_sites
+
+    map_viz = MapVisualizer()
+    map_viz.get_site_grid(df_sites)
+    bounds = (18.0, 72.0, 22.0, 78.0)
+    for zoom, view in [(5, None), (8, bounds), (11, bounds), (14, (20.0, 75.0, 20.2, 75.2))]:
+        render_time, html = _timed(lambda: map_viz.create_heritage_sites_map(df_sites, zoom, view).get_root().render())
+        print(f"zoom {zoom:>2} {'viewport' if view else 'full view'}: {render_time * 1000:6.1f} ms  "
+              f"{len(html) / 1e3:8.1f} KB")
+
+    legacy_viz = MapVisualizer(fast_marker_threshold=n_legacy, lazy_popups=False)
+    legacy_time, html = _timed(lambda: legacy_viz.create_heritage_sites_map(df_sites.iloc[:n_legacy]).get_root()
+                               .render(), repeat=1)
+    print(f"per-site markers for {n_legacy:,} sites: {legacy_time:.2f}s  {len(html) / 1e3:,.1f} KB")
+
+
+def bench_lazy_popups(n_arts=20000, n_sites=20000):
+    from components.maps import MapVisualizer
+
+    # Largest layer of each map drawn as individual markers, once with an inline popup per marker and
+    # once with markers that carry only their row id
+    inline_viz = MapVisualizer(fast_marker_threshold=max(n_arts, n_sites), lazy_popups=False)
+    lazy_viz = MapVisualizer(fast_marker_threshold=max(n_arts, n_sites))
+    layers = [('art forms', make_national_arts(n_arts), 'create_art_forms_map'),
+              ('heritage sites', make_national_sites(n_sites), 'create_heritage_sites_map')]
+    for label, df, method in layers:
+        inline_time, inline_page = _timed(lambda: getattr(inline_viz, method)(df).get_root().render(), repeat=1)
+        lazy_time, lazy_page = _timed(lambda: getattr(lazy_viz, method)(df).get_root().render(), repeat=1)
+        assert inline_page.count('<h4>') >= len(df) and lazy_page.count('<h4>') == 1
+        print(f"{label} ({len(df):,} markers): inline {len(inline_page) / 1e6:6.2f} MB in {inline_time:5.2f}s, "
+              f"lazy {len(lazy_page) / 1e6:6.2f} MB in {lazy_time:5.2f}s "
+              f"({1 - len(lazy_page) / len(inline_page):.1%} smaller)")
+
+
+def bench_viewport_map(sizes=(10000, 100000, 1000000), bounds=(20.0, 74.0, 21.0, 75.5)):
+    from components.maps import MapVisualizer
+
+    # With a fixed view, payload and render time should follow the visible points, not the catalog size
+    for n_points in sizes:
+        map_viz = MapVisualizer()
+        df_arts, df_sites = make_national_arts(n_points), make_national_sites(n_points)
+        index_time, _ = _timed(lambda: (map_viz.get_art_grid(df_arts), map_viz.get_site_grid(df_sites)), repeat=1)
+        line = f"{n_points:>9,} points  index build: {index_time:5.2f}s"
+        for name, make_layer in [('arts z8', lambda: map_viz.create_art_forms_layer(df_arts, 8, bounds)),
+                                 ('arts first', lambda: map_viz.create_art_forms_layer(df_arts)),
+                                 ('sites first', lambda: map_viz.create_heritage_sites_layer(df_sites, 5)),
+                                 ('sites z8', lambda: map_viz.create_heritage_sites_layer(df_sites, 8, bounds)),
+                                 ('sites z13', lambda: map_viz.create_heritage_sites_layer(df_sites, 13, bounds))]:
+            def render():
+                layer = make_layer()
+                layer.add_to(map_viz.create_viewport_map('heritage_sites'))
+                return layer, layer.get_root().render()
+            render_time, (layer, html) = _timed(render)
+            line += f"  {name}: {layer.n_points:,} in view, {render_time * 1000:.0f} ms, {len(html) / 1e3:.0f} KB"
+            # The first render has no reported view: it covers the default one and stays bounded
+            assert layer.n_points <= map_viz.max_view_markers
+        print(line)
+
+
+def bench_map_cache(n_sites=20000, n_arts=20000, budget_mb=0.25):
+    import tempfile
+
+    from components.maps import MapVisualizer
+    from utils.cache import LRUCache
+
+    df_sites, df_arts = make_national_sites(n_sites), make_national_arts(n_arts)
+    spill_dir = tempfile.mkdtemp(prefix='map_cache_')
+    map_viz = MapVisualizer(render_cache=LRUCache(budget_mb * 2 ** 20, spill_dir))
+    views = [('heritage_sites', status, [df_sites],
+              lambda status=status: map_viz.create_heritage_sites_map(
+                  df_sites if status == 'All' else df_sites[df_sites['unesco_status'] == status]))
+             for status in ['All', 'Inscribed', 'Tentative', 'None']]
+    views += [('art_forms', [category], [df_arts],
+               lambda category=category: map_viz.create_art_forms_map(df_arts[df_arts['category'] == category]))
+              for category in ['Dance', 'Music', 'Painting', 'Craft', 'Theatre']]
+
+    # Toggling back and forth between views: the first pass renders, later passes are served from cache
+    for label in ['cold', 'warm', 'warm']:
+        toggle_time, pages = _timed(lambda: [map_viz.render_html(*view) for view in views], repeat=1)
+        print(f"{label}: {len(views)} views in {toggle_time * 1000:8.1f} ms  ({sum(map(len, pages)) / 1e6:.1f} MB)")
+    stats = map_viz.render_cache.stats()
+    print(f"memory: {stats['bytes'] / 1e6:.1f} of {budget_mb} MB, {stats['entries']} entries, "
+          f"{stats['evictions']} evictions, {stats['disk_hits']} served from disk")
+    assert map_viz.render_html(*views[0]) == pages[0]
+
+    # Caches sharing a spill directory, as the app's sessions do, write and trim it concurrently
+    from concurrent.futures import ThreadPoolExecutor
+
+    caches = [LRUCache(0, spill_dir, max_spill_bytes=2 * 2 ** 20) for _ in range(8)]
+    with ThreadPoolExecutor(8) as pool:
+        list(pool.map(lambda cache: [cache.put(f'page{i}', pages[i % len(pages)]) for i in range(20)], caches))
+    assert not [name for name in os.listdir(spill_dir) if name.endswith('.tmp')]
+    assert all(caches[0].get(f'page{i}') in (None, pages[i % len(pages)]) for i in range(20))
+
+
+def bench_tourism_heatmap(n_sites=20000, n_months=60, seed=0):
+    from components.maps import MapVisualizer
+    from data.tourism_cube import TourismHeatCube
+
+    rng = np.random.default_rng(seed)
+    df_tourism = make_national_tourism(n_sites, n_months, seed)
+    df_tourism['total_visitors'] = df_tourism['domestic_visitors'] + df_tourism['international_visitors']
+    df_tourism['latitude'] = np.repeat(20 + rng.uniform(-10, 15, n_sites), n_months)
+    df_tourism['longitude'] = np.repeat(78 + rng.uniform(-15, 15, n_sites), n_months)
+    print(f"Tourism: {len(df_tourism):,} rows ({n_sites:,} sites x {n_months} months)")
+
+    build_time, cube = _timed(TourismHeatCube, df_tourism, repeat=1)
+    print(f"cube build: {build_time:.2f}s, {cube.cube.shape[0]} months x {cube.cube.shape[1]:,} cells "
+          f"({cube.cube.nbytes / 1e6:.1f} MB)")
+
+    def per_month_groupby():
+        months = df_tourism['date'].dt.to_period('M')
+        return [df_tourism[months == month].groupby('site')['total_visitors'].sum() for month in months.unique()]
+
+    groupby_time, _ = _timed(per_month_groupby, repeat=1)
+    frames_time, (_, _, weights, labels) = _timed(cube.heat_matrix)
+    range_time, _ = _timed(cube.totals, '2021-01', '2022-12')
+    print(f"{n_months} monthly frames: groupby per month {groupby_time:.2f}s, cube {frames_time * 1000:.1f} ms  "
+          f"2-year range total: {range_time * 1000:.2f} ms")
+
+    expected = df_tourism[df_tourism['date'].dt.year.isin([2021, 2022])]['total_visitors'].sum()
+    assert np.isclose(cube.totals('2021-01', '2022-12').sum(), expected, rtol=1e-4)
+    assert len(labels) == n_months and weights.max() == 1
+
+    map_viz = MapVisualizer()
+    map_viz._tourism_cube = cube
+    for name, build in [('static', lambda: map_viz.create_tourism_heatmap(df_tourism)),
+                        ('timelapse', lambda: map_viz.create_tourism_timelapse(df_tourism))]:
+        render_time, html = _timed(lambda: build().get_root().render(), repeat=1)
+        print(f"{name:>9} map: {render_time:.2f}s  {len(html) / 1e6:.1f} MB")
+
+
+def bench_tile_pipeline(n_sites=20000, n_arts=20000, n_changed=50, max_zoom=9):
+    import tempfile
+    import urllib.request
+
+    from components.maps import MapVisualizer
+    from components.tiles import TileRenderer, TileServer, build_tiles
+
+    df_sites, df_arts = make_national_sites(n_sites), make_national_arts(n_arts)
+    tile_dir = tempfile.mkdtemp(prefix='tiles_')
+
+    full_time, stats = _timed(build_tiles, df_arts, df_sites, tile_dir, max_zoom=max_zoom, repeat=1)
+    print(f"full build: {full_time:.2f}s, " + ', '.join(f"{layer} {counts['tiles']:,} tiles"
+                                                       for layer, counts in stats.items()))
+    noop_time, stats = _timed(build_tiles, df_arts, df_sites, tile_dir, max_zoom=max_zoom, repeat=1)
+    assert all(counts['written'] == 0 for counts in stats.values())
+    print(f"unchanged data: {noop_time:.2f}s, nothing rewritten")
+
+    # A reload that moves a few sites only redraws the tiles around their old and new positions
+    moved = df_sites.copy()
+    moved.loc[moved.index[:n_changed], 'latitude'] += 0.5
+    incremental_time, stats = _timed(build_tiles, None, moved, tile_dir, max_zoom=max_zoom, repeat=1)
+    print(f"{n_changed} sites moved: {incremental_time:.2f}s, {stats['heritage_sites']['written']} tiles "
+          f"rewritten, {stats['heritage_sites']['removed']} removed")
+
+    # Tiles are only current for the data they were drawn from
+    renderer = TileRenderer(tile_dir, max_zoom=max_zoom)
+    assert renderer.is_current('heritage_sites', moved) and not renderer.is_current('heritage_sites', df_sites)
+    assert renderer.is_current('art_forms', df_arts) and not renderer.is_current('art_forms', df_arts.iloc[1:])
+
+    # View time: the page carries no markers, the browser only fetches tiles
+    server = TileServer(tile_dir, port=0).start()
+    map_viz = MapVisualizer()
+    tiled_page = map_viz.create_tiled_map('art_forms', server.url('art_forms'), max_zoom=max_zoom)
+    tiled_page = tiled_page.get_root().render()
+    marker_time, marker_page = _timed(lambda: map_viz.create_art_forms_map(df_arts).get_root().render(), repeat=1)
+    print(f"art forms page: {len(tiled_page) / 1e3:.1f} KB with tiles vs {len(marker_page) / 1e3:.1f} KB "
+          f"with markers (built in {marker_time * 1000:.0f} ms per view)")
+
+    center_x, center_y = 46, 28
+    urls = [server.url('heritage_sites').format(z=6, x=x, y=y) for x in range(center_x - 2, center_x + 2)
+            for y in range(center_y - 2, center_y + 2)]
+    fetch_time, tiles = _timed(lambda: [urllib.request.urlopen(url).read() for url in urls])
+    print(f"viewport fetch: {len(urls)} tiles in {fetch_time * 1000:.1f} ms ({sum(map(len, tiles)) / 1e3:.1f} KB)")
+    server.stop()
+
+
+def bench_figure_cache(n_sites=20000, n_months=60, n_arts=100000, budget_mb=32):
+    import plotly.io as pio
+
+    from components.analytics import AnalyticsVisualizer
+    from data.data_loader import DataLoader
+    from utils.cache import LRUCache
+    from utils.helpers import dataframe_fingerprint
+
+    df_tourism = make_national_tourism(n_sites, n_months)
+    df_sites, df_arts = make_national_sites(n_sites), make_national_arts(n_arts)
+    df_festivals = DataLoader().load_festival_data()
+    print(f"Tourism: {len(df_tourism):,} rows, sites: {n_sites:,}, art forms: {n_arts:,}")
+
+    # load_all_data stamps each frame once per load; the stamp survives the copies below
+    for df in (df_tourism, df_sites, df_arts, df_festivals):
+        df.attrs['data_version'] = dataframe_fingerprint(df)
+
+    def rerun(viz):
+        # Streamlit hands every rerun fresh copies of the cached frames
+        tourism, sites, arts, festivals = df_tourism.copy(), df_sites.copy(), df_arts.copy(), df_festivals.copy()
+        return [viz.create_tourism_trends(tourism, data_version=tourism.attrs['data_version']),
+                viz.create_digital_presence_chart(sites, data_version=sites.attrs['data_version']),
+                viz.create_festival_impact_chart(festivals, data_version=festivals.attrs['data_version']),
+                viz.create_art_forms_distribution(arts, data_version=arts.attrs['data_version']),
+                viz.create_risk_assessment_chart(arts, data_version=arts.attrs['data_version'])]
+
+    uncached_time, uncached = _timed(rerun, AnalyticsVisualizer(figure_cache=None))
+    viz = AnalyticsVisualizer(figure_cache=LRUCache(budget_mb * 2 ** 20))
+    cold_time, _ = _timed(rerun, viz, repeat=1)
+    warm_time, cached = _timed(rerun, viz)
+    # Cached figures come back through JSON, so the uncached ones are compared after the same round trip
+    assert [fig.to_json() for fig in cached] == [pio.from_json(fig.to_json()).to_json() for fig in uncached]
+    stats = viz.figure_cache.stats()
+    print(f"uncached rerun: {uncached_time * 1000:7.1f} ms")
+    print(f"cold rerun:     {cold_time * 1000:7.1f} ms")
+    print(f"warm rerun:     {warm_time * 1000:7.1f} ms  ({uncached_time / warm_time:.1f}x, {stats['entries']} figures, "
+          f"{stats['bytes'] / 1e3:.1f} KB)")
+
+
+def bench_tourism_trends(n_sites=200, n_years=20, seed=0):
+    from components.analytics import AnalyticsVisualizer
+    from utils.cache import LRUCache
+
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range('2005-01-01', periods=n_years * 365, freq='D')
+    visitors = rng.integers(100, 5000, (n_sites, len(dates)))
+    df_tourism = pd.DataFrame({
+        'site': np.repeat([f'Site {i}' for i in range(n_sites)], len(dates)),
+        'date': np.tile(dates, n_sites),
+        'domestic_visitors': (visitors * 0.7).astype(np.int64).ravel(),
+        'international_visitors': (visitors * 0.3).astype(np.int64).ravel()
+    })
+    print(f"Tourism: {len(df_tourism):,} daily rows, {len(dates):,} dates")
+
+    full_viz = AnalyticsVisualizer(figure_cache=None, max_points=len(dates), webgl_threshold=len(dates))
+    full_time, full = _timed(lambda: full_viz.create_tourism_trends(df_tourism).to_json(), repeat=1)
+    viz = AnalyticsVisualizer(figure_cache=None)
+    viz.daily_visitors(df_tourism)
+    fast_time, fast = _timed(lambda: viz.create_tourism_trends(df_tourism).to_json())
+    print(f"full SVG:     {full_time * 1000:7.1f} ms  {len(full) / 1e3:8.1f} KB")
+    print(f"LTTB + WebGL: {fast_time * 1000:7.1f} ms  {len(fast) / 1e3:8.1f} KB  ({viz.max_points:,} points per trace)")
+
+    # Drilling into one year comes back at full resolution without regrouping the raw rows
+    drill_time, drill = _timed(lambda: viz.create_tourism_trends(df_tourism, '2015-01-01', '2015-12-31'))
+    assert len(drill.data[0].x) == 365 and drill.data[0].type == 'scatter'
+    print(f"one-year drill-down: {drill_time * 1000:7.1f} ms, {len(drill.data[0].x)} points")
+
+
+def make_sustainability_metrics(n_sites=10000, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'site': [f'Heritage Site {i}' for i in range(n_sites)],
+        'sustainability_score': rng.beta(5, 2, n_sites),
+        'crowding_index': rng.beta(2, 3, n_sites),
+        'revenue': rng.lognormal(15, 1, n_sites)
+    })
+    df['overall_sustainability'] = (df['sustainability_score'] * 0.4 + (1 - df['crowding_index']) * 0.3
+                                    + rng.uniform(0, 0.3, n_sites))
+    return df
+
+
+def bench_sustainability_matrix(sizes=(10000, 100000, 1000000), max_legacy=100000):
+    import plotly.express as px
+
+    from components.analytics import AnalyticsVisualizer
+
+    def legacy(df):
+        return px.scatter(df, x='sustainability_score', y='crowding_index', size='revenue',
+                          color='overall_sustainability', hover_name='site', color_continuous_scale='RdYlGn')
+
+    viz = AnalyticsVisualizer(figure_cache=None)
+    for n_sites in sizes:
+        df = make_sustainability_metrics(n_sites)
+        line = f"{n_sites:>9,} sites"
+        runs = [('px.scatter', legacy)] if n_sites <= max_legacy else []
+        runs.append(('scalable', viz.create_sustainability_matrix))
+        for label, build in runs:
+            build_time, fig = _timed(build, df, repeat=1)
+            json_time, payload = _timed(fig.to_json, repeat=1)
+            mode = (fig.layout.meta or {}).get('mode', 'svg') if label == 'scalable' else 'svg'
+            line += (f"  {label} ({mode}): build {build_time * 1000:7.1f} ms, json {json_time * 1000:7.1f} ms, "
+                     f"{len(payload) / 1e6:6.2f} MB")
+        print(line)
+    lookup_time, rows = _timed(viz.lookup_sites, df, 'Heritage Site 12345')
+    print(f"name lookup over {len(df):,} sites: {lookup_time * 1000:.1f} ms, {len(rows)} matches")
+
+
+BENCHMARKS = {
+    'parallel': bench_parallel_analytics,
+    'forecasting': bench_forecasting,
+    'anomaly': bench_anomaly_detection,
+    'simulation': bench_crowd_simulation,
+    'similarity': bench_similarity_search,
+    'ann': bench_ann_search,
+    'spatial': bench_spatial_index,
+    'haversine': bench_haversine,
+    'itinerary': bench_itinerary,
+    'batch_recommendations': bench_batch_recommendations,
+    'cultural_index': bench_cultural_index,
+    'sustainable_rules': bench_sustainable_rules,
+    'event_calendar': bench_event_calendar,
+    'entity_resolution': bench_entity_resolution,
+    'search': bench_search_index,
+    'art_forms_map': bench_art_forms_map,
+    'heritage_map': bench_heritage_map,
+    'viewport_map': bench_viewport_map,
+    'map_cache': bench_map_cache,
+    'lazy_popups': bench_lazy_popups,
+    'tourism_heatmap': bench_tourism_heatmap,
+    'tile_pipeline': bench_tile_pipeline,
+    'figure_cache': bench_figure_cache,
+    'tourism_trends': bench_tourism_trends,
+    'sustainability_matrix': bench_sustainability_matrix,
+}
+
+
+def main():
+    names = sys.argv[1:] or list(BENCHMARKS)
+    for name in names:
+        print(f"\n=== {name} ===")
+        BENCHMARKS[name]()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,87 @@
+import inspect
+import threading
+import weakref
+from functools import wraps
+
 import plotly.express as px
 import plotly.graph_objects as go
+import plotly.io as pio
 from plotly.subplots import make_subplots
 import pandas as pd
 import numpy as np
 
+from utils.cache import cache_key
+from utils.helpers import dataframe_fingerprint, lttb_indices
+
+TREND_COLUMNS = ['date', 'domestic_visitors', 'international_visitors']
+SUSTAINABILITY_COLUMNS = ['sustainability_score', 'crowding_index', 'revenue', 'overall_sustainability']
+
+
+def _sustainability_columns(viz, df):
+    # Site names only end up in the figure while it is small enough for per-point hover names
+    return SUSTAINABILITY_COLUMNS + (['site'] if len(df) <= viz.webgl_threshold else [])
+
+
+def cached_figure(columns=None):
+    # Figures are stored as JSON keyed by method, arguments and a version of each frame: the data_version
+    # the caller stamped when the data was loaded, otherwise a fingerprint of the columns the chart reads
+    # (a list, or a function of the visualizer and frame); every hit returns a fresh Figure, so callers can
+    # still update the layout without touching the cached copy
+    def decorator(method):
+        takes_version = 'data_version' in inspect.signature(method).parameters
+
+        @wraps(method)
+        def wrapper(self, *args, **kwargs):
+            data_version = kwargs.get('data_version') if takes_version else kwargs.pop('data_version', None)
+            if self.figure_cache is None:
+                return method(self, *args, **kwargs)
+
+            def version(value):
+                if not isinstance(value, pd.DataFrame):
+                    return value
+                if data_version is not None:
+                    return data_version
+                return self._fingerprint(value, columns(self, value) if callable(columns) else columns)
+
+            params = [version(arg) for arg in args]
+            params += sorted((name, version(value)) for name, value in kwargs.items() if name != 'data_version')
+            key = cache_key(method.__name__, params)
+            return pio.from_json(self.figure_cache.get_or_create(key, lambda: method(self, *args, **kwargs)
+                                                                 .to_json()))
+        return wrapper
+    return decorator
+
 
 class AnalyticsVisualizer:
-    def __init__(self):
+    def __init__(self, figure_cache=None, max_points=2000, webgl_threshold=1000, density_threshold=100000,
+                 density_bins=100):
         self.color_palette = px.colors.qualitative.Set3
-
+        # None turns figure caching off; the app passes an LRUCache sized by FIGURE_CACHE_CONFIG
+        self.figure_cache = figure_cache
+        # Long series are downsampled to max_points per trace and drawn with WebGL above webgl_threshold;
+        # scatter plots above density_threshold points are binned into a density grid instead
+        self.max_points = max_points
+        self.webgl_threshold = webgl_threshold
+        self.density_threshold = density_threshold
+        self.density_bins = density_bins
+        self._fingerprints = {}
+        self._daily_visitors = (None, None)
+        # Shared across sessions by the app: memo checks and rebuilds run one at a time
+        self._lock = threading.Lock()
+
+    def _fingerprint(self, df, columns=None):
+        # Several charts share a frame within one rerun, so each frame object is hashed once per column set
+        memo_key = (id(df), None if columns is None else tuple(columns))
+        with self._lock:
+            source, version = self._fingerprints.get(memo_key, (None, None))
+            if source is None or source() is not df:
+                version = dataframe_fingerprint(df, columns)
+                self._fingerprints = {key: value for key, value in self._fingerprints.items()
+                                      if value[0]() is not None}
+                self._fingerprints[memo_key] = (weakref.ref(df), version)
+            return version
+
+    @cached_figure()
     def create_heritage_index_chart(self, heritage_df):
         fig = px.bar(
             heritage_df.sort_values('heritage_index', ascending=False).head(15),
@@ -31,6 +104,7 @@ class AnalyticsVisualizer:
 
         return fig
 
+    @cached_figure(['category'])
     def create_art_forms_distribution(self, df_arts):
         category_counts = df_arts['category'].value_counts()
 
@@ -49,29 +123,52 @@ class AnalyticsVisualizer:
 
         return fig
 
-    def create_tourism_trends(self, df_tourism):
-        monthly_visitors = df_tourism.groupby('date').agg({
-            'domestic_visitors': 'sum',
-            'international_visitors': 'sum'
-        }).reset_index()
+    def _line_trace(self, x, y, **kwargs):
+        # Shape-preserving downsampling keeps the browser payload bounded however long the series gets
+        points = lttb_indices(x.astype('int64') if pd.api.types.is_datetime64_any_dtype(x) else x, y, self.max_points)
+        trace = go.Scattergl if len(points) > self.webgl_threshold else go.Scatter
+        return trace(x=x.iloc[points], y=y.iloc[points], mode='lines', **kwargs), len(points)
+
+    def daily_visitors(self, df_tourism, data_version=None):
+        # Per-date totals are shared by every date range of the trends chart
+        version = data_version if data_version is not None else self._fingerprint(df_tourism, TREND_COLUMNS)
+        with self._lock:
+            if self._daily_visitors[0] != version:
+                totals = df_tourism.groupby('date').agg({
+                    'domestic_visitors': 'sum',
+                    'international_visitors': 'sum'
+                }).reset_index()
+                totals['date'] = pd.to_datetime(totals['date'])
+                self._daily_visitors = (version, totals)
+            return self._daily_visitors[1]
+
+    @cached_figure(TREND_COLUMNS)
+    def create_tourism_trends(self, df_tourism, start=None, end=None, data_version=None):
+        # Narrowing start/end drills down: the window is re-cut from the full-resolution totals, so fewer
+        # dates means more of them survive the downsampling
+        visitors_by_date = self.daily_visitors(df_tourism, data_version)
+        if start is not None:
+            visitors_by_date = visitors_by_date[visitors_by_date['date'] >= pd.Timestamp(start)]
+        if end is not None:
+            visitors_by_date = visitors_by_date[visitors_by_date['date'] <= pd.Timestamp(end)]
 
         fig = go.Figure()
 
-        fig.add_trace(go.Scatter(
-            x=monthly_visitors['date'],
-            y=monthly_visitors['domestic_visitors'],
-            mode='lines',
+        domestic, shown = self._line_trace(
+            visitors_by_date['date'],
+            visitors_by_date['domestic_visitors'],
             name='Domestic Visitors',
             line=dict(color='blue', width=2)
-        ))
+        )
+        fig.add_trace(domestic)
 
-        fig.add_trace(go.Scatter(
-            x=monthly_visitors['date'],
-            y=monthly_visitors['international_visitors'],
-            mode='lines',
+        international, _ = self._line_trace(
+            visitors_by_date['date'],
+            visitors_by_date['international_visitors'],
             name='International Visitors',
             line=dict(color='red', width=2)
-        ))
+        )
+        fig.add_trace(international)
 
         fig.update_layout(
             title='Tourism Trends Over Time',
@@ -79,11 +176,13 @@ class AnalyticsVisualizer:
             yaxis_title='Number of Visitors',
             height=400,
             hovermode='x unified',
-            title_font_size=20
+            title_font_size=20,
+            meta={'points': shown, 'total': len(visitors_by_date)}
         )
 
         return fig
 
+    @cached_figure()
     def create_seasonal_patterns(self, seasonal_df):
         fig = px.line(
             seasonal_df,
@@ -107,6 +206,7 @@ class AnalyticsVisualizer:
 
         return fig
 
+    @cached_figure(['risk_level'])
     def create_risk_assessment_chart(self, df_arts):
         risk_counts = df_arts['risk_level'].value_counts()
 
@@ -129,7 +229,13 @@ class AnalyticsVisualizer:
 
         return fig
 
+    @cached_figure(_sustainability_columns)
     def create_sustainability_matrix(self, sustainability_df):
+        if len(sustainability_df) > self.density_threshold:
+            return self._sustainability_density(sustainability_df)
+        if len(sustainability_df) > self.webgl_threshold:
+            return self._sustainability_webgl(sustainability_df)
+
         fig = px.scatter(
             sustainability_df,
             x='sustainability_score',
@@ -153,6 +259,76 @@ class AnalyticsVisualizer:
 
         return fig
 
+    def _sustainability_layout(self, fig, mode, n_sites):
+        fig.update_layout(
+            title='Sustainability Matrix of Cultural Sites',
+            xaxis_title='Sustainability Score',
+            yaxis_title='Crowding Index',
+            height=500,
+            title_font_size=20,
+            meta={'mode': mode, 'points': n_sites}
+        )
+        return fig
+
+    def _sustainability_webgl(self, sustainability_df):
+        # Hover carries only the row number; names and revenue stay server-side until looked up
+        # Marker areas scale with revenue up to 20px across, as with px.scatter's size, but are computed here
+        revenue = np.clip(np.nan_to_num(sustainability_df['revenue'].to_numpy(dtype=float)), 0, None)
+        sizes = np.round(20 * np.sqrt(revenue / (revenue.max() or 1.0)), 1)
+        fig = go.Figure(go.Scattergl(
+            x=sustainability_df['sustainability_score'].round(4),
+            y=sustainability_df['crowding_index'].round(4),
+            mode='markers',
+            customdata=np.arange(len(sustainability_df), dtype=np.int32),
+            marker=dict(
+                size=sizes,
+                color=sustainability_df['overall_sustainability'].round(3),
+                colorscale='RdYlGn',
+                showscale=True,
+                colorbar=dict(title='Overall Sustainability')
+            ),
+            hovertemplate='Site #%{customdata}<br>Sustainability Score: %{x}<br>Crowding Index: %{y}'
+                          '<br>Overall Sustainability: %{marker.color}<extra></extra>'
+        ))
+        return self._sustainability_layout(fig, 'webgl', len(sustainability_df))
+
+    def _sustainability_density(self, sustainability_df):
+        # Sites are binned on the server, so the figure size depends on the grid rather than the catalog
+        x = sustainability_df['sustainability_score'].to_numpy(dtype=float)
+        y = sustainability_df['crowding_index'].to_numpy(dtype=float)
+        overall = sustainability_df['overall_sustainability'].to_numpy(dtype=float)
+        valid = np.isfinite(x) & np.isfinite(y)
+        counts, x_edges, y_edges = np.histogram2d(x[valid], y[valid], bins=self.density_bins)
+        scored = valid & np.isfinite(overall)
+        totals, _, _ = np.histogram2d(x[scored], y[scored], bins=[x_edges, y_edges], weights=overall[scored])
+        scored_counts, _, _ = np.histogram2d(x[scored], y[scored], bins=[x_edges, y_edges])
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean_overall = np.round(totals / scored_counts, 3)
+
+        fig = go.Figure(go.Heatmap(
+            z=np.where(counts > 0, counts, np.nan).T,
+            x=np.round((x_edges[:-1] + x_edges[1:]) / 2, 4),
+            y=np.round((y_edges[:-1] + y_edges[1:]) / 2, 4),
+            customdata=mean_overall.T,
+            colorscale='Viridis',
+            colorbar=dict(title='Sites'),
+            hovertemplate='Sustainability Score: %{x}<br>Crowding Index: %{y}<br>Sites: %{z}'
+                          '<br>Avg Overall Sustainability: %{customdata}<extra></extra>'
+        ))
+        return self._sustainability_layout(fig, 'density', len(sustainability_df))
+
+    @staticmethod
+    def lookup_sites(sustainability_df, query, limit=20):
+        # Lazy hover details: '#123' is the row number shown on hover, anything else matches site names
+        query = str(query).strip()
+        if query.startswith('#') and query[1:].isdigit():
+            position = int(query[1:])
+            return sustainability_df.iloc[position:position + 1] if position < len(sustainability_df) else \
+                sustainability_df.iloc[:0]
+        matches = sustainability_df['site'].astype(str).str.contains(query, case=False, regex=False, na=False)
+        return sustainability_df[matches].head(limit)
+
+    @cached_figure(['festival', 'economic_impact', 'expected_visitors', 'cultural_significance_score'])
     def create_festival_impact_chart(self, df_festivals):
         top_festivals = df_festivals.groupby('festival').agg({
             'economic_impact': 'sum',
@@ -196,6 +372,7 @@ class AnalyticsVisualizer:
 
         return fig
 
+    @cached_figure(['state', 'digital_presence_score'])
     def create_digital_presence_chart(self, df_sites):
         digital_scores = df_sites.groupby('state')['digital_presence_score'].mean().sort_values(ascending=False).head(
             15)
@@ -224,6 +401,7 @@ class AnalyticsVisualizer:
 
         return fig
 
+    @cached_figure()
     def create_hidden_gems_radar(self, hidden_gems):
         categories = ['Accessibility', 'Underutilization', 'Digital Presence', 'Conservation']
 
@@ -0,0 +1,168 @@
+import numpy as np
+
+
+class _ProjectionTree:
+    def __init__(self):
+        self.normals = []
+        self.offsets = []
+        self.children = []
+        self.leaves = []
+
+    def add_leaf(self, ids):
+        self.leaves.append(np.asarray(ids, dtype=np.int64))
+        return -len(self.leaves)
+
+    def add_split(self, normal, offset):
+        self.normals.append(normal)
+        self.offsets.append(offset)
+        self.children.append([0, 0])
+        return len(self.normals) - 1
+
+    def freeze(self):
+        dim = len(self.normals[0]) if self.normals else 0
+        self.normal_array = np.asarray(self.normals, dtype=np.float32).reshape(-1, dim)
+        self.offset_array = np.asarray(self.offsets, dtype=np.float32)
+        self.child_array = np.asarray(self.children, dtype=np.int64).reshape(-1, 2)
+
+    def descend(self, queries, root):
+        # Child codes >= 0 are split nodes, negative codes -(leaf + 1) are leaves
+        node = np.full(len(queries), root, dtype=np.int64)
+        active = np.flatnonzero(node >= 0)
+        while len(active):
+            current = node[active]
+            side = np.einsum('qd,qd->q', queries[active], self.normal_array[current]) > self.offset_array[current]
+            node[active] = self.child_array[current, side.astype(np.int64)]
+            active = active[node[active] >= 0]
+        return -node - 1
+
+
+class RandomProjectionForest:
+    def __init__(self, n_trees=10, leaf_size=50, seed=0):
+        self.n_trees = n_trees
+        self.leaf_size = leaf_size
+        self.seed = seed
+        self.rng = np.random.default_rng(seed)
+        self.vectors = np.empty((0, 0), dtype=np.float32)
+        self.trees = []
+        self.roots = []
+
+    def __len__(self):
+        return len(self.vectors)
+
+    def _split(self, tree, ids):
+        if len(ids) <= self.leaf_size:
+            return tree.add_leaf(ids)
+
+        a, b = self.vectors[self.rng.choice(ids, 2, replace=False)]
+        normal = a - b
+        projections = self.vectors[ids] @ normal
+        offset = np.median(projections)
+        left = projections <= offset
+        if left.all() or not left.any():
+            return tree.add_leaf(ids)
+
+        node = tree.add_split(normal, offset)
+        tree.children[node][0] = self._split(tree, ids[left])
+        tree.children[node][1] = self._split(tree, ids[~left])
+        return node
+
+    def build(self, vectors):
+        self.vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        self.trees, self.roots = [], []
+        ids = np.arange(len(self.vectors))
+        for _ in range(self.n_trees):
+            tree = _ProjectionTree()
+            self.roots.append(self._split(tree, ids))
+            tree.freeze()
+            self.trees.append(tree)
+        return self
+
+    def insert(self, vectors):
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, self.vectors.shape[1])
+        start = len(self.vectors)
+        self.vectors = np.vstack([self.vectors, vectors])
+        new_ids = np.arange(start, len(self.vectors))
+
+        for t, tree in enumerate(self.trees):
+            leaves = tree.descend(vectors, self.roots[t])
+            for leaf in np.unique(leaves):
+                tree.leaves[leaf] = np.concatenate([tree.leaves[leaf], new_ids[leaves == leaf]])
+                if len(tree.leaves[leaf]) > 2 * self.leaf_size:
+                    self._resplit_leaf(t, leaf)
+            tree.freeze()
+        return new_ids
+
+    def _resplit_leaf(self, t, leaf):
+        tree = self.trees[t]
+        ids = tree.leaves[leaf]
+        tree.leaves[leaf] = np.empty(0, dtype=np.int64)
+        replacement = self._split(tree, ids)
+
+        code = -leaf - 1
+        if self.roots[t] == code:
+            self.roots[t] = replacement
+            return
+        for children in tree.children:
+            for side in (0, 1):
+                if children[side] == code:
+                    children[side] = replacement
+
+    def candidates(self, queries):
+        queries = np.asarray(queries, dtype=np.float32)
+        leaves = [tree.descend(queries, root) for tree, root in zip(self.trees, self.roots)]
+        return [
+            np.unique(np.concatenate([tree.leaves[leaf[q]] for tree, leaf in zip(self.trees, leaves)]))
+            for q in range(len(queries))
+        ]
+
+    def query(self, queries, k=10, exclude=None):
+        queries = np.asarray(queries, dtype=np.float32).reshape(-1, self.vectors.shape[1])
+        neighbours = np.full((len(queries), k), -1, dtype=np.int64)
+        scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+
+        for q, ids in enumerate(self.candidates(queries)):
+            if exclude is not None:
+                ids = ids[ids != exclude[q]]
+            similarity = self.vectors[ids] @ queries[q]
+            n = min(k, len(ids))
+            if n == 0:
+                continue
+            top = np.argpartition(-similarity, n - 1)[:n]
+            top = top[np.argsort(-similarity[top], kind='stable')]
+            neighbours[q, :n] = ids[top]
+            scores[q, :n] = similarity[top]
+
+        return neighbours, scores
+
+    def save(self, path):
+        arrays = {
+            'vectors': self.vectors,
+            'params': np.array([self.n_trees, self.leaf_size, self.seed], dtype=np.int64),
+            'roots': np.asarray(self.roots, dtype=np.int64)
+        }
+        for t, tree in enumerate(self.trees):
+            arrays[f'normals_{t}'] = tree.normal_array
+            arrays[f'offsets_{t}'] = tree.offset_array
+            arrays[f'children_{t}'] = tree.child_array
+            arrays[f'leaf_sizes_{t}'] = np.array([len(leaf) for leaf in tree.leaves], dtype=np.int64)
+            arrays[f'leaf_ids_{t}'] = (np.concatenate(tree.leaves) if tree.leaves
+                                       else np.empty(0, dtype=np.int64))
+        np.savez(path, **arrays)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            n_trees, leaf_size, seed = data['params'].tolist()
+            forest = cls(n_trees=n_trees, leaf_size=leaf_size, seed=seed)
+            forest.vectors = data['vectors']
+            forest.roots = data['roots'].tolist()
+            for t in range(n_trees):
+                tree = _ProjectionTree()
+                tree.normals = list(data[f'normals_{t}'])
+                tree.offsets = list(data[f'offsets_{t}'])
+                tree.children = data[f'children_{t}'].tolist()
+                bounds = np.cumsum(data[f'leaf_sizes_{t}'])[:-1]
+                tree.leaves = np.split(data[f'leaf_ids_{t}'], bounds) if len(data[f'leaf_sizes_{t}']) else []
+                tree.freeze()
+                forest.trees.append(tree)
+        return forest
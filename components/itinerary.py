@@ -0,0 +1,403 @@
+import weakref
+
+import numpy as np
+import pandas as pd
+
+from data.parallel import ParallelExecutor
+from data.spatial_index import SpatialIndex
+from utils.helpers import haversine_one_to_many
+
+SEASON_MONTHS = {
+    'Winter': [12, 1, 2],
+    'Spring': [3, 4, 5],
+    'Monsoon': [6, 7, 8],
+    'Autumn': [9, 10, 11]
+}
+
+TRAVEL_STYLE_TYPE_WEIGHTS = {
+    'Cultural Immersion': {'Temple': 0.3, 'Heritage Village': 0.4, 'Museum': 0.2},
+    'Photography': {'Fort': 0.3, 'Palace': 0.3, 'Monument': 0.2},
+    'Family': {'Museum': 0.3, 'Palace': 0.2, 'Monument': 0.1},
+    'Adventure': {'Fort': 0.4, 'Heritage Village': 0.2}
+}
+
+CONSERVATION_SCORES = {'Excellent': 1.0, 'Good': 0.75, 'Fair': 0.5, 'Poor': 0.25}
+
+PROFILE_DEFAULTS = {
+    'duration': 5,
+    'budget': 'Mid-range',
+    'interest': 'All Heritage Sites',
+    'travel_style': 'Cultural Immersion',
+    'season': 'Winter',
+    'group_size': 1
+}
+
+
+def profile_terms(preferences):
+    # A profile's score is the base score plus weighted site components, added in this order
+    terms = []
+
+    interest = preferences.get('interest')
+    if interest == 'Off-beat Locations':
+        terms.append(('spare_capacity', 0.5))
+    elif interest == 'Art & Craft':
+        terms.append(('art_density', 0.6))
+    elif interest == 'Festivals':
+        terms.append((('festivals', preferences.get('season')), 0.6))
+
+    if preferences.get('travel_style') in TRAVEL_STYLE_TYPE_WEIGHTS:
+        terms.append((('style', preferences['travel_style']), 1.0))
+    if preferences.get('travel_style') == 'Family':
+        terms.append(('accessibility', 0.3))
+
+    if preferences.get('budget') == 'Luxury':
+        terms.append(('palace', 1.0))
+
+    if preferences.get('season') == 'Monsoon':
+        terms.append(('low_accessibility', -0.3))
+
+    group_size = preferences.get('group_size', 1)
+    if group_size >= 8:
+        # Large groups avoid sites that are already busy or small
+        terms.append(('busy', -0.3))
+        terms.append((('small', int(group_size)), -0.2))
+
+    return tuple(terms)
+
+
+def filter_key(preferences):
+    interest = preferences['interest']
+    return (
+        preferences['duration'] <= 3,
+        interest == 'UNESCO Sites',
+        interest == 'Off-beat Locations',
+        preferences['budget'] == 'Budget'
+    )
+
+
+def _apply_terms(base, components, terms):
+    score = base.copy()
+    for column, weight in terms:
+        score += weight * components[:, column]
+    return score
+
+
+def _order_days(anchor, cluster, score, lat, lon, duration, settings):
+    days = [{'position': anchor, 'travel_km': 0.0}]
+    remaining = cluster[cluster != anchor]
+    max_daily_km = settings['max_daily_km']
+
+    while len(days) < duration and len(remaining):
+        current = days[-1]['position']
+        distances = haversine_one_to_many((lat[current], lon[current]), lat[remaining], lon[remaining])
+        reachable = distances <= max_daily_km
+
+        # Prefer valuable sites, discounted by how much of the day is spent travelling. When nothing is within
+        # a day's travel the nearest site is taken, so the trip keeps its length; that day is flagged over_limit
+        if reachable.any():
+            value = np.where(reachable, score[remaining] - 0.5 * distances / max_daily_km, -np.inf)
+        else:
+            value = -distances
+        choice = int(np.argmax(value))
+        days.append({'position': remaining[choice], 'travel_km': float(distances[choice])})
+        remaining = np.delete(remaining, choice)
+
+    for day, stop in enumerate(days, 1):
+        stop['position'] = int(stop['position'])
+        stop['day'] = day
+        stop['travel_hours'] = round(stop['travel_km'] / settings['travel_speed_kmh'], 1)
+        stop['over_limit'] = bool(stop['travel_km'] > max_daily_km)
+        stop['travel_km'] = round(stop['travel_km'], 1)
+    return days
+
+
+def cluster_radius_km(duration, max_daily_km):
+    # A trip's sites must lie within this distance of its anchor
+    return min(max_daily_km * max(duration - 1, 1) / 2, 1500)
+
+
+def _plan_days(score, mask, lat, lon, duration, settings):
+    if not mask.any():
+        return []
+
+    score = np.where(mask, score, -np.inf)
+    n_candidates = min(int(mask.sum()), max(settings['candidates_per_day'] * duration, 200))
+    candidates = np.argpartition(-score, n_candidates - 1)[:n_candidates]
+    candidates = candidates[np.argsort(-score[candidates], kind='stable')]
+
+    candidate_index = SpatialIndex(pd.DataFrame({'latitude': lat[candidates], 'longitude': lon[candidates]}))
+
+    # Try the strongest anchors and keep the cluster whose best sites add up to the most value
+    radius_km = cluster_radius_km(duration, settings['max_daily_km'])
+    best_cluster, best_value = None, -np.inf
+    for anchor in candidates[:5]:
+        nearby, _ = candidate_index.query_radius(lat[anchor], lon[anchor], radius_km, sort=False)
+        nearby = candidates[nearby]
+        value = np.sort(score[nearby])[::-1][:duration].sum()
+        if value > best_value:
+            best_cluster, best_value = (anchor, nearby), value
+
+    anchor, cluster = best_cluster
+    return _order_days(anchor, cluster, score, lat, lon, duration, settings)
+
+
+def _plan_score_group(arrays, task):
+    terms, plans, settings = task
+    score = _apply_terms(arrays['base'], arrays['components'], terms) + arrays['jitter']
+    return [
+        _plan_days(score, arrays['masks'][:, mask_column], arrays['lat'], arrays['lon'], duration, settings)
+        for mask_column, duration in plans
+    ]
+
+
+class ItineraryPlanner:
+    def __init__(self, travel_speed_kmh=50, max_travel_hours=6, art_radius_km=50, candidates_per_day=40,
+                 executor=None, peak_crowding=0.8):
+        self.travel_speed_kmh = travel_speed_kmh
+        self.max_travel_hours = max_travel_hours
+        self.art_radius_km = art_radius_km
+        self.candidates_per_day = candidates_per_day
+        self.executor = executor or ParallelExecutor()
+        self.peak_crowding = peak_crowding
+        self._art_density = None
+        self._site_features = None
+
+    @property
+    def max_daily_km(self):
+        return self.travel_speed_kmh * self.max_travel_hours
+
+    @property
+    def settings(self):
+        return {
+            'travel_speed_kmh': self.travel_speed_kmh,
+            'max_daily_km': self.max_daily_km,
+            'candidates_per_day': self.candidates_per_day
+        }
+
+    def _art_density_for(self, geo_index, df_sites):
+        if self._art_density is None or self._art_density[0] != geo_index.version:
+            counts = np.zeros(len(df_sites))
+            positions = geo_index.sites.positions
+            nearby, _ = geo_index.arts.query_radius_batch(geo_index.sites.lat, geo_index.sites.lon,
+                                                          self.art_radius_km, sort=False)
+            counts[positions] = [len(found) for found in nearby]
+            self._art_density = (geo_index.version, counts / counts.max() if counts.max() > 0 else counts)
+        return self._art_density[1]
+
+    def _features(self, df_sites):
+        # Column arrays are extracted once per catalog frame; scoring then stays in numpy
+        if self._site_features is not None and self._site_features[0]() is df_sites:
+            return self._site_features[1]
+
+        type_codes, type_names = pd.factorize(df_sites['type'])
+        features = {
+            'accessibility': df_sites['accessibility_score'].fillna(0).to_numpy(dtype=float),
+            'utilization': df_sites['current_utilization'].fillna(0).to_numpy(dtype=float),
+            'capacity': df_sites['visitor_capacity'].fillna(0).to_numpy(dtype=float),
+            'maintenance': df_sites['annual_maintenance_cost'].fillna(np.inf).to_numpy(dtype=float),
+            'unesco': df_sites['unesco_status'].to_numpy() == 'Inscribed',
+            'conservation': df_sites['conservation_status'].map(CONSERVATION_SCORES).fillna(0.5).to_numpy(),
+            'digital': df_sites['digital_presence_score'].fillna(0).to_numpy(dtype=float),
+            'type_codes': type_codes,
+            'type_names': type_names,
+            'state': df_sites['state'].to_numpy(),
+            'lat': df_sites['latitude'].to_numpy(dtype=float),
+            'lon': df_sites['longitude'].to_numpy(dtype=float)
+        }
+        features['base_score'] = (
+            0.35 * features['accessibility'] + 0.25 * features['conservation']
+            + 0.15 * features['digital'] + 0.25 * features['unesco']
+        )
+        self._site_features = (weakref.ref(df_sites), features)
+        return features
+
+    def _type_bonus(self, features, weights):
+        lookup = np.append(pd.Series(features['type_names']).map(weights).fillna(0).to_numpy(), 0.0)
+        return lookup[features['type_codes']]
+
+    def _festival_bonus(self, features, df_festivals, season):
+        if df_festivals is None or df_festivals.empty:
+            return np.zeros(len(features['state']))
+        in_season = df_festivals[df_festivals['month'].isin(SEASON_MONTHS.get(season, []))]
+        festival_counts = in_season.groupby('state').size()
+        if festival_counts.empty:
+            return np.zeros(len(features['state']))
+        return pd.Series(features['state']).map(festival_counts / festival_counts.max()).fillna(0).to_numpy()
+
+    def component(self, name, df_sites, geo_index, df_festivals=None):
+        features = self._features(df_sites)
+        kind, value = name if isinstance(name, tuple) else (name, None)
+
+        if kind == 'spare_capacity':
+            return 1 - features['utilization']
+        if kind == 'art_density':
+            return self._art_density_for(geo_index, df_sites)
+        if kind == 'festivals':
+            return self._festival_bonus(features, df_festivals, value)
+        if kind == 'style':
+            return self._type_bonus(features, TRAVEL_STYLE_TYPE_WEIGHTS[value])
+        if kind == 'accessibility':
+            return features['accessibility']
+        if kind == 'palace':
+            return self._type_bonus(features, {'Palace': 0.2})
+        if kind == 'low_accessibility':
+            return (features['accessibility'] < 0.6).astype(float)
+        if kind == 'busy':
+            return (features['utilization'] > 0.8).astype(float)
+        if kind == 'small':
+            return (features['capacity'] < value * 250).astype(float)
+        raise ValueError(f"Unknown score component: {name}")
+
+    def candidate_masks(self, keys, df_sites):
+        features = self._features(df_sites)
+        short, unesco_only, offbeat_only, budget_only = (np.array(flags, dtype=bool) for flags in zip(*keys))
+
+        # One boolean column per distinct filter combination, evaluated for all sites at once
+        valid = ~(np.isnan(features['lat']) | np.isnan(features['lon']))
+        return (
+            valid[:, None]
+            & ((features['accessibility'] > 0.7)[:, None] | ~short)
+            & (features['unesco'][:, None] | ~unesco_only)
+            & ((features['utilization'] < 0.5)[:, None] | ~offbeat_only)
+            & ((features['maintenance'] < 1000000)[:, None] | ~budget_only)
+        )
+
+    def candidate_mask(self, preferences, df_sites):
+        return self.candidate_masks([filter_key(preferences)], df_sites)[:, 0]
+
+    def score_sites(self, preferences, df_sites, geo_index, df_festivals=None):
+        terms = profile_terms(preferences)
+        components = np.column_stack(
+            [self.component(name, df_sites, geo_index, df_festivals) for name, _ in terms]
+            or [np.zeros(len(df_sites))]
+        )
+        return _apply_terms(self._features(df_sites)['base_score'], components,
+                            [(column, weight) for column, (_, weight) in enumerate(terms)])
+
+    def plan(self, preferences, df_sites, geo_index, df_festivals=None, seed=0, calendar=None):
+        rng = np.random.default_rng(seed)
+        features = self._features(df_sites)
+
+        # A tiny seeded jitter breaks ties between equally scored sites reproducibly
+        score = self.score_sites(preferences, df_sites, geo_index, df_festivals)
+        score = score + rng.uniform(0, 1e-6, len(score))
+
+        days = _plan_days(score, self.candidate_mask(preferences, df_sites), features['lat'], features['lon'],
+                          int(preferences['duration']), self.settings)
+        if calendar is not None and days:
+            days = self.schedule(days, features['state'][[day['position'] for day in days]], calendar, preferences)
+        return days
+
+    def schedule(self, days, states, calendar, preferences):
+        n_days = len(days)
+        if preferences.get('start_date') is not None:
+            starts = np.array([calendar.day_index(preferences['start_date'])])
+        else:
+            starts = np.arange(calendar.n_days - n_days + 1)
+            months = SEASON_MONTHS.get(preferences.get('season'))
+            if months:
+                in_season = np.isin(calendar.dates().month.to_numpy()[starts], months)
+                starts = starts[in_season] if in_season.any() else starts
+
+        # The route can be driven in either direction, so both orders are scored for every start day
+        travel = [day['travel_km'] for day in days]
+        orders = [
+            (list(range(n_days)), travel),
+            (list(range(n_days))[::-1], [0.0] + travel[1:][::-1])
+        ]
+        festival_weight = 1.0 if preferences.get('interest') == 'Festivals' else 0.3
+        slots = starts[:, None] + np.arange(n_days)[None, :]
+
+        best = None
+        for order, order_travel in orders:
+            attendance, crowding = calendar.lookup(np.asarray(states)[order], slots)
+            value = (festival_weight * (attendance > 0) - crowding - (crowding >= self.peak_crowding)).sum(axis=1)
+            choice = int(np.argmax(value))
+            if best is None or value[choice] > best[0]:
+                best = (value[choice], starts[choice], order, order_travel, crowding[choice])
+
+        _, start, order, order_travel, crowding = best
+        dates = calendar.start_date + pd.to_timedelta(start + np.arange(n_days), unit='D')
+        scheduled = []
+        for day, (index, travel_km, date, crowd) in enumerate(zip(order, order_travel, dates, crowding), 1):
+            day_number = calendar.first_day + start + day - 1
+            events = calendar.names[calendar.positions_between(states[index], day_number, day_number)]
+            scheduled.append({
+                **days[index],
+                'day': day,
+                'travel_km': travel_km,
+                'travel_hours': round(travel_km / self.travel_speed_kmh, 1),
+                'over_limit': bool(travel_km > self.max_daily_km),
+                'date': date,
+                'festivals': list(dict.fromkeys(events)),
+                'crowding': round(float(crowd), 2),
+                'crowd_peak': bool(crowd >= self.peak_crowding)
+            })
+        return scheduled
+
+    def plan_batch(self, profiles, df_sites, geo_index, df_festivals=None, seed=0, calendar=None):
+        profiles = profiles.reset_index(drop=True)
+        for column, default in PROFILE_DEFAULTS.items():
+            if column not in profiles:
+                profiles[column] = default
+        records = profiles[list(PROFILE_DEFAULTS)].to_dict('records')
+        if 'start_date' in profiles:
+            for record, start_date in zip(records, profiles['start_date']):
+                record['start_date'] = None if pd.isna(start_date) else start_date
+        features = self._features(df_sites)
+
+        # Profiles are reduced to distinct score signatures and filter combinations, so shared work runs once
+        terms = [profile_terms(record) for record in records]
+        keys = [filter_key(record) for record in records]
+        durations = [int(record['duration']) for record in records]
+
+        key_columns = {key: column for column, key in enumerate(dict.fromkeys(keys))}
+        names = list(dict.fromkeys(name for profile in terms for name, _ in profile))
+        name_columns = {name: column for column, name in enumerate(names)}
+
+        groups = {}
+        for profile, (signature, key, duration) in enumerate(zip(terms, keys, durations)):
+            plans = groups.setdefault(signature, {})
+            plans.setdefault((key_columns[key], duration), []).append(profile)
+
+        arrays = {
+            'base': features['base_score'],
+            'jitter': np.random.default_rng(seed).uniform(0, 1e-6, len(df_sites)),
+            'components': np.column_stack(
+                [self.component(name, df_sites, geo_index, df_festivals) for name in names]
+                or [np.zeros(len(df_sites))]
+            ),
+            'masks': self.candidate_masks(list(key_columns), df_sites),
+            'lat': features['lat'],
+            'lon': features['lon']
+        }
+
+        settings = self.settings
+        tasks = [
+            (tuple((name_columns[name], weight) for name, weight in signature), list(plans), settings)
+            for signature, plans in groups.items()
+        ]
+        results = self.executor.run(_plan_score_group, arrays, tasks,
+                                    work_size=len(df_sites) * sum(len(plans) for plans in groups.values()))
+
+        rows = []
+        scheduled = {}
+        for plans, group_results in zip(groups.values(), results):
+            for members, days in zip(plans.values(), group_results):
+                for profile in members:
+                    profile_days = days
+                    if calendar is not None and days:
+                        # Profiles sharing a plan are scheduled once per season, festival interest and start date
+                        record = records[profile]
+                        key = (id(days), record['season'], record['interest'] == 'Festivals', record.get('start_date'))
+                        if key not in scheduled:
+                            states = features['state'][[day['position'] for day in days]]
+                            scheduled[key] = self.schedule(days, states, calendar, record)
+                        profile_days = scheduled[key]
+                    rows.extend({'profile': profile, **day} for day in profile_days)
+
+        columns = ['profile', 'position', 'travel_km', 'day', 'travel_hours', 'over_limit']
+        if calendar is not None:
+            columns += ['date', 'festivals', 'crowding', 'crowd_peak']
+        itineraries = pd.DataFrame(rows, columns=columns)
+        return itineraries.sort_values(['profile', 'day'], kind='stable').reset_index(drop=True)
@@ -0,0 +1,121 @@
+import json
+
+import numpy as np
+import pandas as pd
+from folium import plugins
+from folium.map import FeatureGroup
+from jinja2 import Template
+
+DEFAULT_MARKER_JS = """function (value, i, lat, lon) {
+    return L.marker([lat, lon]);
+}"""
+
+
+def to_js(obj):
+    # Compact JSON that is also safe to inline inside a <script> tag
+    return json.dumps(obj, separators=(',', ':')).replace('</', '<\\/')
+
+
+def encode_columns(columns, precision=5):
+    # Numeric columns are shipped as plain arrays; text columns as integer codes plus one table of labels,
+    # so a repeated state or category name costs a couple of bytes per point instead of the whole string
+    data, labels = {}, {}
+    for name, values in columns.items():
+        values = pd.Series(values).reset_index(drop=True)
+        if pd.api.types.is_float_dtype(values):
+            values = values.round(precision)
+            data[name] = values.astype(object).where(values.notna(), None).tolist()
+        elif pd.api.types.is_numeric_dtype(values) or pd.api.types.is_bool_dtype(values):
+            data[name] = values.tolist()
+        else:
+            codes, uniques = pd.factorize(values)
+            data[name] = codes.tolist()
+            labels[name] = [str(label) for label in uniques]
+    return data, labels
+
+
+# Shared by the columnar layers: markers are created in the browser from the encoded columns
+COLUMNAR_TEMPLATE = u"""
+    {% macro script(this, kwargs) %}
+        var {{ this.get_name() }} = (function(){
+            var data = {{ this.data }};
+            var labels = {{ this.labels }};
+            var value = function (column, i) {
+                return column in labels ? labels[column][data[column][i]] : data[column][i];
+            };
+            var createMarker = {{ this.marker_js }};
+
+            var markers = new Array(data.lat.length);
+            for (var i = 0; i < data.lat.length; i++) {
+                markers[i] = createMarker(value, i, data.lat[i], data.lon[i]);
+            }
+            var group = {{ this.group_js }};
+            if (group.addLayers) {
+                group.addLayers(markers);
+            } else {
+                markers.forEach(function (marker) { group.addLayer(marker); });
+            }
+            group.addTo({{ this._parent.get_name() }});
+            return group;
+        })();
+    {% endmacro %}"""
+
+
+def encode_layer(latitudes, longitudes, columns=None, precision=5):
+    # Points without coordinates cannot be placed, so they are dropped before encoding
+    latitudes = np.asarray(latitudes, dtype=float)
+    longitudes = np.asarray(longitudes, dtype=float)
+    valid = np.isfinite(latitudes) & np.isfinite(longitudes)
+    columns = {name: np.asarray(values)[valid] for name, values in (columns or {}).items()}
+    columns.update(lat=latitudes[valid], lon=longitudes[valid])
+
+    data, labels = encode_columns(columns, precision)
+    return int(valid.sum()), to_js(data), to_js(labels)
+
+
+class ColumnarLayer(FeatureGroup):
+    _template = Template(COLUMNAR_TEMPLATE)
+
+    def __init__(self, latitudes, longitudes, columns=None, marker_js=None, name=None, overlay=True, control=True,
+                 show=True, precision=5):
+        super().__init__(name=name, overlay=overlay, control=control, show=show)
+        self._name = 'ColumnarLayer'
+        self.n_points, self.data, self.labels = encode_layer(latitudes, longitudes, columns, precision)
+        self.marker_js = marker_js or DEFAULT_MARKER_JS
+        self.group_js = 'L.featureGroup()'
+
+
+class ColumnarMarkerCluster(plugins.MarkerCluster):
+    _template = Template(COLUMNAR_TEMPLATE)
+
+    def __init__(self, latitudes, longitudes, columns=None, marker_js=None, cluster_options=None, name=None,
+                 overlay=True, control=True, show=True, precision=5):
+        super().__init__(name=name, overlay=overlay, control=control, show=show)
+        self._name = 'ColumnarMarkerCluster'
+        self.n_points, self.data, self.labels = encode_layer(latitudes, longitudes, columns, precision)
+        self.marker_js = marker_js or DEFAULT_MARKER_JS
+        options = to_js({'chunkedLoading': True, **(cluster_options or {})})
+        self.group_js = f'L.markerClusterGroup({options})'
+
+
+class HeatCubeWithTime(plugins.HeatMapWithTime):
+    # Same time slider as HeatMapWithTime, but instead of a [lat, lon, weight] list per point and frame the
+    # page carries one table of cell positions and a frames x cells matrix of weights in thousandths;
+    # the browser expands the frames on load
+    _expand_js = """(function (lat, lon, weights) {
+        return weights.map(function (frame) {
+            var points = [];
+            for (var i = 0; i < frame.length; i++) {
+                if (frame[i] > 0) { points.push([lat[i], lon[i], frame[i] / 1000]); }
+            }
+            return points;
+        });
+    })(%s, %s, %s)"""
+
+    def __init__(self, latitudes, longitudes, weights, index, precision=4, **kwargs):
+        super().__init__([[]] * len(index), index=index, **kwargs)
+        weights = np.rint(np.asarray(weights, dtype=float) * 1000).astype(np.int64)
+        self.n_points = int(np.count_nonzero(weights))
+        self.data = self._expand_js % (to_js(np.round(np.asarray(latitudes, dtype=float), precision).tolist()),
+                                       to_js(np.round(np.asarray(longitudes, dtype=float), precision).tolist()),
+                                       to_js(weights.tolist()))
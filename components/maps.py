@@ -1,18 +1,162 @@
+import threading
+import weakref
+
 import folium
 from folium import plugins
 import pandas as pd
 import streamlit as st
 from streamlit_folium import st_folium
 
+from components.map_layers import ColumnarLayer, ColumnarMarkerCluster, HeatCubeWithTime
+from data.spatial_index import GridPyramid, mercator_lat, mercator_xy
+from data.tourism_cube import TourismHeatCube
+from utils.cache import LRUCache, cache_key
+from utils.helpers import dataframe_fingerprint
+
+RISK_COLORS = {'Safe': 'green', 'Vulnerable': 'orange', 'Endangered': 'red'}
+UNESCO_COLORS = {'Inscribed': 'gold', 'Tentative': 'blue'}
+
+# Browser-side marker for the art forms layer: one icon per risk colour, popup HTML built only when opened
+ART_FORM_MARKER_JS = """(function () {
+    var icons = {};
+    return function (value, i, lat, lon) {
+        var color = value('color', i);
+        icons[color] = icons[color] || L.AwesomeMarkers.icon({markerColor: color, icon: 'masks-theater', prefix: 'fa'});
+        return L.marker([lat, lon], {icon: icons[color]}).bindPopup(function () {
+            return '<div style="font-family: Arial, sans-serif;">'
+                + '<h4>' + value('art_form', i) + '</h4>'
+                + '<p><strong>Category:</strong> ' + value('category', i) + '</p>'
+                + '<p><strong>State:</strong> ' + value('state', i) + '</p>'
+                + '<p><strong>Practitioners:</strong> ' + value('practitioners', i) + '</p>'
+                + '<p><strong>Risk Level:</strong> ' + value('risk_level', i) + '</p>'
+                + '<p><strong>Age:</strong> ' + value('age_years', i) + ' years</p>'
+                + '</div>';
+        }, {maxWidth: 300});
+    };
+})()"""
+
+# Aggregated art forms cell: a pie of the risk mix sized by art form count; clicking zooms into the cell
+ART_CELL_MARKER_JS = """function (value, i, lat, lon) {
+    var count = value('count', i), safe = value('Safe', i), vulnerable = value('Vulnerable', i);
+    var a = 100 * safe / count, b = a + 100 * vulnerable / count;
+    var size = Math.round(24 + 8 * Math.log10(count));
+    var html = '<div style="width:' + size + 'px;height:' + size + 'px;line-height:' + size + 'px;'
+        + 'border-radius:50%;border:2px solid white;text-align:center;font:bold 11px Arial,sans-serif;'
+        + 'color:white;text-shadow:0 0 3px black;'
+        + 'background:conic-gradient(green 0 ' + a + '%, orange ' + a + '% ' + b + '%, red ' + b + '% 100%);">'
+        + count + '</div>';
+    var marker = L.marker([lat, lon], {icon: L.divIcon({html: html, className: '', iconSize: [size, size]})});
+    marker.bindTooltip(count + ' art forms: ' + safe + ' safe, ' + vulnerable + ' vulnerable, '
+        + value('other', i) + ' endangered');
+    marker.on('click', function (e) { e.target._map.setView(e.latlng, e.target._map.getZoom() + 2); });
+    return marker;
+}"""
+
+# Aggregated grid cell: a pie of the UNESCO mix sized by site count; clicking zooms into the cell
+SITE_CELL_MARKER_JS = """function (value, i, lat, lon) {
+    var count = value('count', i), inscribed = value('Inscribed', i), tentative = value('Tentative', i);
+    var a = 100 * inscribed / count, b = a + 100 * tentative / count;
+    var size = Math.round(24 + 8 * Math.log10(count));
+    var html = '<div style="width:' + size + 'px;height:' + size + 'px;line-height:' + size + 'px;'
+        + 'border-radius:50%;border:2px solid white;text-align:center;font:bold 11px Arial,sans-serif;'
+        + 'color:white;text-shadow:0 0 3px black;'
+        + 'background:conic-gradient(gold 0 ' + a + '%, blue ' + a + '% ' + b + '%, gray ' + b + '% 100%);">'
+        + count + '</div>';
+    var marker = L.marker([lat, lon], {icon: L.divIcon({html: html, className: '', iconSize: [size, size]})});
+    marker.bindTooltip(count + ' sites: ' + inscribed + ' inscribed, ' + tentative + ' tentative, '
+        + value('other', i) + ' other');
+    marker.on('click', function (e) { e.target._map.setView(e.latlng, e.target._map.getZoom() + 2); });
+    return marker;
+}"""
+
+# Individual heritage site at street level, styled like the per-site circle markers
+HERITAGE_SITE_MARKER_JS = """function (value, i, lat, lon) {
+    var color = value('color', i);
+    var marker = L.circleMarker([lat, lon], {radius: 20 + value('visitor_capacity', i) / 1000, color: color,
+                                             fill: true, fillColor: color, fillOpacity: 0.7});
+    marker.bindTooltip(value('site_name', i));
+    return marker.bindPopup(function () {
+        return '<div style="font-family: Arial, sans-serif;">'
+            + '<h4>' + value('site_name', i) + '</h4>'
+            + '<p><strong>Type:</strong> ' + value('type', i) + '</p>'
+            + '<p><strong>State:</strong> ' + value('state', i) + '</p>'
+            + '<p><strong>UNESCO Status:</strong> ' + value('unesco_status', i) + '</p>'
+            + '<p><strong>Conservation:</strong> ' + value('conservation_status', i) + '</p>'
+            + '<p><strong>Accessibility:</strong> ' + (value('accessibility_score', i) === null ? 'n/a'
+                : value('accessibility_score', i).toFixed(2)) + '</p>'
+            + '</div>';
+    }, {maxWidth: 300});
+}"""
+
 
 class MapVisualizer:
-    def __init__(self):
+    def __init__(self, fast_marker_threshold=500, render_cache=None, lazy_popups=True, max_view_markers=2000):
         self.india_coords = [20.5937, 78.9629]
         self.zoom_start = 5
+        self.fast_marker_threshold = fast_marker_threshold
+        # A viewport layer sends individual art forms up to this many in view, grid cells beyond it
+        self.max_view_markers = max_view_markers
+        # Markers carry only their row id and popups are built from the attribute table when opened,
+        # instead of one inline popup per marker
+        self.lazy_popups = lazy_popups
+        self.render_cache = render_cache if render_cache is not None else LRUCache(128 * 2 ** 20)
+        self._grids = {}
+        self._tourism_cube = None
+        # Shared across sessions by the app: grid and cube checks and rebuilds run one at a time
+        self._lock = threading.Lock()
+
+    def render_html(self, map_type, filters, frames, build):
+        # Rendered pages are keyed by what they show, so going back to an earlier view or filter
+        # is a lookup instead of rebuilding every marker
+        key = cache_key(map_type, filters, [dataframe_fingerprint(df) for df in frames])
+        return self.render_cache.get_or_create(key, lambda: build().get_root().render())
+
+    def get_grid(self, df, category_col, categories):
+        with self._lock:
+            # Same frame object as the last build: skip re-hashing the catalog on every pan and zoom
+            source, grid = self._grids.get(category_col, (None, None))
+            if source is not None and source() is df:
+                return grid
+
+            version = GridPyramid.fingerprint(df, category_col)
+            if grid is None or grid.version != version:
+                grid = GridPyramid(df, category_col, categories)
+            self._grids[category_col] = (weakref.ref(df), grid)
+            return grid
+
+    def get_site_grid(self, df_sites):
+        return self.get_grid(df_sites, 'unesco_status', ['Inscribed', 'Tentative'])
+
+    def get_art_grid(self, df_arts):
+        return self.get_grid(df_arts, 'risk_level', ['Safe', 'Vulnerable'])
+
+    def view_bounds(self, zoom=None, center=None, width=1000, height=600, padding=0.25):
+        # (south, west, north, east) of a width x height pixel map at this zoom, with the margin the app
+        # adds around reported views; used before the browser has reported any view
+        lat, lon = center or self.india_coords
+        scale = 256 * 2 ** (zoom or self.zoom_start)
+        x, y = mercator_xy(lat, lon)
+        half_x, half_y = width * (0.5 + padding) / scale, height * (0.5 + padding) / scale
+        south, north = mercator_lat([min(y + half_y, 1), max(y - half_y, 0)])
+        west, east = max(x - half_x, 0) * 360 - 180, min(x + half_x, 1) * 360 - 180
+        return tuple(round(float(edge), 4) for edge in (south, west, north, east))
 
-    def create_art_forms_map(self, df_arts):
+    def _center(self, bounds=None):
+        if bounds is None:
+            return self.india_coords
+        south, west, north, east = bounds
+        return [(south + north) / 2, (west + east) / 2]
+
+    def create_art_forms_map(self, df_arts, fast=None):
         m = folium.Map(location=self.india_coords, zoom_start=self.zoom_start)
 
+        if fast is None:
+            fast = self.lazy_popups or len(df_arts) > self.fast_marker_threshold
+        if fast:
+            self._add_art_forms_layer(m, df_arts)
+            plugins.Fullscreen().add_to(m)
+            return m
+
         marker_cluster = plugins.MarkerCluster().add_to(m)
 
         for idx, row in df_arts.iterrows():
@@ -39,44 +183,64 @@ class MapVisualizer:
 
         return m
 
-    def create_heritage_sites_map(self, df_sites):
-        m = folium.Map(location=self.india_coords, zoom_start=self.zoom_start)
+    def _add_art_forms_layer(self, m, df_arts):
+        # One columnar array for the whole layer; the browser builds and clusters the markers
+        columns = {column: df_arts[column] for column in ['art_form', 'category', 'state', 'practitioners',
+                                                           'risk_level', 'age_years']}
+        columns['color'] = df_arts['risk_level'].map(RISK_COLORS).fillna('red')
+        return ColumnarMarkerCluster(df_arts['latitude'], df_arts['longitude'], columns,
+                                     marker_js=ART_FORM_MARKER_JS).add_to(m)
 
-        for idx, row in df_sites.iterrows():
-            if row['unesco_status'] == 'Inscribed':
-                color = 'gold'
-                icon = 'crown'
-            elif row['unesco_status'] == 'Tentative':
-                color = 'blue'
-                icon = 'star'
-            else:
-                color = 'gray'
-                icon = 'monument'
+    def create_heritage_sites_map(self, df_sites, zoom=None, bounds=None):
+        m = folium.Map(location=self._center(bounds), zoom_start=zoom or self.zoom_start)
 
-            size = 20 + (row['visitor_capacity'] / 1000)
+        # Small catalogs keep one marker per site; otherwise only the grid cells for this zoom and view are sent
+        small = zoom is None and bounds is None and len(df_sites) <= self.fast_marker_threshold
+        if small and self.lazy_popups:
+            self._add_site_markers(m, df_sites)
+        elif small:
+            for idx, row in df_sites.iterrows():
+                if row['unesco_status'] == 'Inscribed':
+                    color = 'gold'
+                    icon = 'crown'
+                elif row['unesco_status'] == 'Tentative':
+                    color = 'blue'
+                    icon = 'star'
+                else:
+                    color = 'gray'
+                    icon = 'monument'
 
-            popup_html = f"""
-            <div style="font-family: Arial, sans-serif;">
-                <h4>{row['site_name']}</h4>
-                <p><strong>Type:</strong> {row['type']}</p>
-                <p><strong>State:</strong> {row['state']}</p>
-                <p><strong>UNESCO Status:</strong> {row['unesco_status']}</p>
-                <p><strong>Conservation:</strong> {row['conservation_status']}</p>
-                <p><strong>Accessibility:</strong> {row['accessibility_score']:.2f}</p>
-            </div>
-            """
+                size = 20 + (row['visitor_capacity'] / 1000)
 
-            folium.CircleMarker(
-                location=[row['latitude'], row['longitude']],
-                radius=size,
-                color=color,
-                fill=True,
-                fillColor=color,
-                fillOpacity=0.7,
-                popup=folium.Popup(popup_html, max_width=300),
-                tooltip=row['site_name']
-            ).add_to(m)
+                popup_html = f"""
+                <div style="font-family: Arial, sans-serif;">
+                    <h4>{row['site_name']}</h4>
+                    <p><strong>Type:</strong> {row['type']}</p>
+                    <p><strong>State:</strong> {row['state']}</p>
+                    <p><strong>UNESCO Status:</strong> {row['unesco_status']}</p>
+                    <p><strong>Conservation:</strong> {row['conservation_status']}</p>
+                    <p><strong>Accessibility:</strong> {row['accessibility_score']:.2f}</p>
+                </div>
+                """
+
+                folium.CircleMarker(
+                    location=[row['latitude'], row['longitude']],
+                    radius=size,
+                    color=color,
+                    fill=True,
+                    fillColor=color,
+                    fillOpacity=0.7,
+                    popup=folium.Popup(popup_html, max_width=300),
+                    tooltip=row['site_name']
+                ).add_to(m)
+        else:
+            self._add_heritage_sites_layer(m, df_sites, zoom or self.zoom_start, bounds)
+
+        self._add_unesco_legend(m)
 
+        return m
+
+    def _add_unesco_legend(self, m):
         legend_html = '''
         <div style="position: fixed; 
                     top: 10px; right: 10px; width: 200px; height: 120px; 
@@ -90,25 +254,97 @@ class MapVisualizer:
         '''
         m.get_root().html.add_child(folium.Element(legend_html))
 
+    def _add_site_markers(self, m, sites):
+        columns = {column: sites[column] for column in ['site_name', 'type', 'state', 'unesco_status',
+                                                         'conservation_status', 'accessibility_score',
+                                                         'visitor_capacity']}
+        columns['color'] = sites['unesco_status'].map(UNESCO_COLORS).fillna('gray')
+        return ColumnarLayer(sites['latitude'], sites['longitude'], columns,
+                             marker_js=HERITAGE_SITE_MARKER_JS).add_to(m)
+
+    def _add_heritage_sites_layer(self, m, df_sites, zoom, bounds=None):
+        grid = self.get_site_grid(df_sites)
+        if grid.is_street_level(zoom):
+            return self._add_site_markers(m, df_sites.iloc[grid.positions(bounds)])
+
+        cells = grid.cells(zoom, bounds)
+        columns = {column: cells[column] for column in ['count', 'Inscribed', 'Tentative', 'other']}
+        return ColumnarLayer(cells['latitude'], cells['longitude'], columns, marker_js=SITE_CELL_MARKER_JS).add_to(m)
+
+    def create_viewport_map(self, map_type):
+        # Base map for viewport mode: it never changes, so panning only swaps the data layer
+        m = folium.Map(location=self.india_coords, zoom_start=self.zoom_start)
+        if map_type == 'heritage_sites':
+            self._add_unesco_legend(m)
+        plugins.Fullscreen().add_to(m)
         return m
 
-    def create_tourism_heatmap(self, df_tourism):
+    def create_tiled_map(self, map_type, tile_url, min_zoom=3, max_zoom=10):
+        # The layer is drawn from pre-rendered tiles, so the page carries no marker data at all;
+        # beyond max_zoom the deepest tiles are scaled up
         m = folium.Map(location=self.india_coords, zoom_start=self.zoom_start)
+        folium.TileLayer(
+            tiles=tile_url,
+            attr='Cultural heritage data',
+            name='Heritage Sites' if map_type == 'heritage_sites' else 'Art Forms',
+            overlay=True,
+            min_zoom=min_zoom,
+            max_native_zoom=max_zoom
+        ).add_to(m)
+        if map_type == 'heritage_sites':
+            self._add_unesco_legend(m)
+        plugins.Fullscreen().add_to(m)
+        return m
+
+    def create_art_forms_layer(self, df_arts, zoom=None, bounds=None):
+        # Before the first view is reported, the layer covers the map's default view
+        zoom = zoom or self.zoom_start
+        bounds = bounds if bounds is not None else self.view_bounds(zoom)
+        layer = folium.FeatureGroup(name='Art Forms')
+
+        # Individual markers while the view holds few enough of them, otherwise the grid cells for this zoom
+        grid = self.get_art_grid(df_arts)
+        positions = grid.positions(bounds)
+        if grid.is_street_level(zoom) or len(positions) <= self.max_view_markers:
+            layer.n_points = self._add_art_forms_layer(layer, df_arts.iloc[positions]).n_points
+            return layer
+
+        cells = grid.cells(zoom, bounds)
+        columns = {column: cells[column] for column in ['count', 'Safe', 'Vulnerable', 'other']}
+        layer.n_points = ColumnarLayer(cells['latitude'], cells['longitude'], columns,
+                                       marker_js=ART_CELL_MARKER_JS).add_to(layer).n_points
+        return layer
+
+    def create_heritage_sites_layer(self, df_sites, zoom, bounds=None):
+        bounds = bounds if bounds is not None else self.view_bounds(zoom)
+        layer = folium.FeatureGroup(name='Heritage Sites')
+        layer.n_points = self._add_heritage_sites_layer(layer, df_sites, zoom, bounds).n_points
+        return layer
 
-        site_coords = df_tourism.groupby('site').first()[['latitude', 'longitude']]
-        site_visitors = df_tourism.groupby('site')['total_visitors'].sum()
+    def get_tourism_cube(self, df_tourism, df_sites=None):
+        with self._lock:
+            version = TourismHeatCube.fingerprint(df_tourism, df_sites)
+            if self._tourism_cube is None or self._tourism_cube.version != version:
+                self._tourism_cube = TourismHeatCube(df_tourism, df_sites)
+            return self._tourism_cube
 
-        heat_data = []
-        for site, visitors in site_visitors.items():
-            if site in site_coords.index:
-                lat = site_coords.loc[site, 'latitude']
-                lon = site_coords.loc[site, 'longitude']
-                heat_data.append([lat, lon, visitors])
+    def create_tourism_heatmap(self, df_tourism, df_sites=None, start=None, end=None):
+        m = folium.Map(location=self.india_coords, zoom_start=self.zoom_start)
 
+        heat_data = self.get_tourism_cube(df_tourism, df_sites).heat_points(start, end)
         plugins.HeatMap(heat_data, radius=25).add_to(m)
 
         return m
 
+    def create_tourism_timelapse(self, df_tourism, df_sites=None, start=None, end=None):
+        m = folium.Map(location=self.india_coords, zoom_start=self.zoom_start)
+
+        # Every month is sliced from the same precomputed cube and shipped as one compact matrix
+        lat, lon, weights, months = self.get_tourism_cube(df_tourism, df_sites).heat_matrix(start, end)
+        HeatCubeWithTime(lat, lon, weights, months, radius=25, auto_play=True, max_opacity=0.8).add_to(m)
+
+        return m
+
     def create_cultural_route_map(self, route_data, df_sites):
         m = folium.Map(location=self.india_coords, zoom_start=self.zoom_start)
 
@@ -135,4 +371,23 @@ class MapVisualizer:
                         icon=folium.Icon(color=colors[idx % len(colors)], icon='info-sign')
                     ).add_to(m)
 
-        return m
\ No newline at end of file
+        return m
+
+    def create_nearby_map(self, center_site, nearby_sites, nearby_arts, radius_km):
+        center = [center_site['latitude'], center_site['longitude']]
+        m = folium.Map(location=center, zoom_start=8)
+
+        folium.Circle(location=center, radius=radius_km * 1000, color='#3498db', fill=True,
+                      fill_opacity=0.08).add_to(m)
+        folium.Marker(location=center, tooltip=center_site['site_name'],
+                      icon=folium.Icon(color='red', icon='star')).add_to(m)
+
+        for site in nearby_sites.itertuples():
+            folium.CircleMarker(location=[site.latitude, site.longitude], radius=8, color='#f39c12', fill=True,
+                                tooltip=f"{site.site_name} ({site.distance_km:.0f} km)").add_to(m)
+
+        for art in nearby_arts.itertuples():
+            folium.CircleMarker(location=[art.latitude, art.longitude], radius=6, color='#8e44ad', fill=True,
+                                tooltip=f"{art.art_form} ({art.distance_km:.0f} km)").add_to(m)
+
+        return m
@@ -1,40 +1,96 @@
+import threading
+import weakref
+
 import pandas as pd
 import numpy as np
-from sklearn.metrics.pairwise import cosine_similarity
 from sklearn.preprocessing import StandardScaler
 
+from components.itinerary import SEASON_MONTHS, ItineraryPlanner, cluster_radius_km
+from components.rules import SITE_FEATURES, VISITOR_TIPS
+from components.similarity import SimilarityIndex
+from data.cultural_index import CulturalIndex
+from data.entity_resolution import SiteRegistry
+from data.event_calendar import EventCalendar
+from data.spatial_index import HeritageGeoIndex
+
 
 class RecommendationEngine:
     def __init__(self):
         self.scaler = StandardScaler()
-
-    def generate_personalized_route(self, user_preferences, df_sites, df_arts):
-        filtered_sites = df_sites.copy()
-
-        if user_preferences['duration'] <= 3:
-            filtered_sites = filtered_sites[filtered_sites['accessibility_score'] > 0.7]
-
-        if user_preferences['interest'] == 'UNESCO Sites':
-            filtered_sites = filtered_sites[filtered_sites['unesco_status'] == 'Inscribed']
-        elif user_preferences['interest'] == 'Off-beat Locations':
-            filtered_sites = filtered_sites[filtered_sites['current_utilization'] < 0.5]
-
-        if user_preferences['budget'] == 'Budget':
-            filtered_sites = filtered_sites[filtered_sites['annual_maintenance_cost'] < 1000000]
-
-        selected_sites = filtered_sites.sample(min(user_preferences['duration'], len(filtered_sites)))
+        self._similarity_index = None
+        self._similarity_source = None
+        self._geo_index = None
+        self._cultural_index = None
+        self._event_calendar = None
+        self._site_registry = None
+        self._site_registry_source = None
+        self.planner = ItineraryPlanner()
+        # The app shares one engine across sessions, so index checks and rebuilds run one at a time
+        self._lock = threading.Lock()
+
+    def generate_personalized_route(self, user_preferences, df_sites, df_arts, df_festivals=None, seed=0,
+                                    calendar=None):
+        geo_index = self.get_geo_index(df_sites, df_arts)
+        cultural_index = self.get_cultural_index(df_arts, df_festivals)
+        if calendar is None and df_festivals is not None:
+            calendar = self.get_event_calendar(df_festivals, start_date=user_preferences.get('start_date'),
+                                               n_days=int(user_preferences['duration']))
+        days = self.planner.plan(user_preferences, df_sites, geo_index, df_festivals, seed=seed, calendar=calendar)
+
+        positions = [day['position'] for day in days]
+        selected_sites = df_sites.iloc[positions]
+
+        itinerary = selected_sites[['site_name', 'state', 'type']].copy()
+        itinerary.insert(0, 'day', [day['day'] for day in days])
+        itinerary['travel_km'] = [day['travel_km'] for day in days]
+        itinerary['travel_hours'] = [day['travel_hours'] for day in days]
+        itinerary['over_limit'] = [day['over_limit'] for day in days]
+        for column in ['date', 'festivals', 'crowding', 'crowd_peak']:
+            if days and column in days[0]:
+                itinerary[column] = [day[column] for day in days]
+
+        if 'date' in itinerary:
+            best_time = f"{itinerary['date'].iloc[0]:%d %b %Y} to {itinerary['date'].iloc[-1]:%d %b %Y}"
+        else:
+            best_time = self._get_best_travel_time(selected_sites['state'].iloc[0] if len(selected_sites) > 0
+                                                   else 'Delhi')
 
         route = {
             'sites': selected_sites[['site_name', 'state', 'type', 'accessibility_score']].to_dict('records'),
+            'days': itinerary.to_dict('records'),
             'total_duration': user_preferences['duration'],
+            'planned_days': len(days),
+            'matching_sites': int(self.planner.candidate_mask(user_preferences, df_sites).sum()),
+            'cluster_radius_km': cluster_radius_km(int(user_preferences['duration']), self.planner.max_daily_km),
+            'max_daily_km': self.planner.max_daily_km,
+            'total_travel_km': round(float(itinerary['travel_km'].sum()), 1),
             'estimated_cost': self._calculate_route_cost(selected_sites, user_preferences),
-            'best_time': self._get_best_travel_time(
-                selected_sites['state'].iloc[0] if len(selected_sites) > 0 else 'Delhi'),
-            'special_experiences': self._get_special_experiences(selected_sites, df_arts)
+            'best_time': best_time,
+            'special_experiences': self._get_special_experiences(selected_sites, cultural_index, seed),
+            'seasonal_festivals': self._get_seasonal_festivals(selected_sites, cultural_index,
+                                                               user_preferences.get('season'))
         }
 
         return route
 
+    def generate_personalized_routes_batch(self, profiles, df_sites, df_arts, df_festivals=None, seed=0,
+                                           calendar=None):
+        geo_index = self.get_geo_index(df_sites, df_arts)
+        if calendar is None and df_festivals is not None:
+            calendar = self.get_event_calendar(df_festivals)
+        itineraries = self.planner.plan_batch(profiles, df_sites, geo_index, df_festivals, seed=seed,
+                                              calendar=calendar)
+
+        selected_sites = df_sites.iloc[itineraries['position'].to_numpy()]
+        for column in ['site_name', 'state', 'type']:
+            itineraries[column] = selected_sites[column].to_numpy()
+
+        # Rows follow the order of the profiles frame, labelled with its original index
+        itineraries['profile'] = profiles.index.to_numpy()[itineraries['profile'].to_numpy()]
+        schedule_columns = [column for column in ['date', 'festivals', 'crowding', 'crowd_peak'] if column in itineraries]
+        return itineraries[['profile', 'day', 'site_name', 'state', 'type', 'travel_km', 'travel_hours',
+                            'over_limit'] + schedule_columns]
+
     def _calculate_route_cost(self, sites, preferences):
         base_cost = len(sites) * 2000
 
@@ -61,85 +117,146 @@ class RecommendationEngine:
         else:
             return climate_zones['North']
 
-    def _get_special_experiences(self, sites, df_arts):
+    def _get_special_experiences(self, sites, cultural_index, seed=None):
+        rng = np.random.default_rng(seed)
         experiences = []
-        states = sites['state'].unique()
 
-        for state in states:
-            state_arts = df_arts[df_arts['state'] == state]
+        for state in sites['state'].unique():
+            state_arts = cultural_index.arts([state])
             if len(state_arts) > 0:
-                unique_art = state_arts.sample(1).iloc[0]
-                experiences.append(f"{unique_art['art_form']} performance in {state}")
-
-        return experiences[:3]
-
-    def recommend_sustainable_sites(self, df_sites, sustainability_metrics):
-        sustainable_sites = pd.merge(
-            df_sites,
-            sustainability_metrics[['site', 'overall_sustainability']],
-            left_on='site_name',
-            right_on='site',
-            how='left'
-        )
-
-        sustainable_sites = sustainable_sites.dropna(subset=['overall_sustainability'])
-        top_sustainable = sustainable_sites.nlargest(10, 'overall_sustainability')
-
-        recommendations = []
-        for _, site in top_sustainable.iterrows():
-            recommendations.append({
-                'site': site['site_name'],
-                'state': site['state'],
-                'sustainability_score': site['overall_sustainability'],
-                'key_features': self._get_site_features(site),
-                'visitor_tips': self._get_visitor_tips(site)
-            })
-
-        return pd.DataFrame(recommendations)
-
-    def _get_site_features(self, site):
-        features = []
-
-        if site['unesco_status'] == 'Inscribed':
-            features.append('UNESCO World Heritage Site')
-        if site['accessibility_score'] > 0.8:
-            features.append('Excellent Accessibility')
-        if site['conservation_status'] in ['Excellent', 'Good']:
-            features.append('Well Preserved')
-        if site['digital_presence_score'] > 0.7:
-            features.append('Strong Digital Presence')
-
-        return ', '.join(features) if features else 'Historical Significance'
-
-    def _get_visitor_tips(self, site):
-        tips = []
-
-        if site['current_utilization'] > 0.8:
-            tips.append('Visit during weekdays to avoid crowds')
-        if site['accessibility_score'] < 0.5:
-            tips.append('Prepare for limited accessibility')
-        if site['type'] == 'Temple':
-            tips.append('Dress modestly and remove footwear')
-
-        return '; '.join(tips) if tips else 'Check local guidelines before visiting'
+                experiences.append(f"{cultural_index.art_forms[rng.choice(state_arts)]} performance in {state}")
+                if len(experiences) == 3:
+                    break
+
+        return experiences
+
+    def _get_seasonal_festivals(self, sites, cultural_index, season):
+        festivals = cultural_index.festivals(sites['state'].unique(), SEASON_MONTHS.get(season))
+        return list(pd.unique(cultural_index.festival_names[festivals]))
+
+    def recommend_sustainable_sites(self, df_sites, sustainability_metrics, top_n=10):
+        registry = self.get_site_registry(df_sites)
+        metric_ids = registry.resolve(sustainability_metrics['site'])
+
+        # Scores are averaged per site id, in case several tourism names resolve to the same site
+        totals, counts = registry.aggregate(metric_ids, sustainability_metrics['overall_sustainability'])
+        sustainable_sites = df_sites.reset_index(drop=True)
+        sustainable_sites['overall_sustainability'] = registry.gather(registry.site_ids,
+                                                                      totals / np.maximum(counts, 1))
+
+        # Rank on the score column alone and gather only the rows that are returned
+        scores = sustainable_sites['overall_sustainability'].dropna()
+        if top_n is not None:
+            order = scores.nlargest(top_n).index
+        else:
+            order = scores.sort_values(ascending=False, kind='stable').index
+        sustainable_sites = sustainable_sites.loc[order]
+
+        return pd.DataFrame({
+            'site': sustainable_sites['site_name'].to_numpy(),
+            'state': sustainable_sites['state'].to_numpy(),
+            'sustainability_score': sustainable_sites['overall_sustainability'].to_numpy(),
+            'key_features': SITE_FEATURES.labels(SITE_FEATURES.evaluate(sustainable_sites)),
+            'visitor_tips': VISITOR_TIPS.labels(VISITOR_TIPS.evaluate(sustainable_sites))
+        })
+
+    def get_similarity_index(self, df_sites):
+        with self._lock:
+            # Same frame object as the last build: skip re-hashing the catalog
+            if self._similarity_source is not None and self._similarity_source() is df_sites:
+                return self._similarity_index
+
+            version = SimilarityIndex.fingerprint(df_sites)
+            index = self._similarity_index
+            if index is None or index.rows_version != version:
+                # Rows appended to an unchanged catalog are inserted with the existing scaler until they
+                # outnumber the rows it was fitted on; any other change rebuilds the index
+                n_indexed = len(index) if index is not None else 0
+                if 0 < n_indexed < len(df_sites) <= 2 * index.fitted_rows and \
+                        SimilarityIndex.fingerprint(df_sites.iloc[:n_indexed], index.features) == index.rows_version:
+                    index.add_sites(df_sites.iloc[n_indexed:])
+                else:
+                    self._similarity_index = SimilarityIndex(df_sites)
+            self._similarity_source = weakref.ref(df_sites)
+            return self._similarity_index
+
+    def get_geo_index(self, df_sites, df_arts):
+        with self._lock:
+            version = HeritageGeoIndex.fingerprint(df_sites, df_arts)
+            if self._geo_index is None or self._geo_index.version != version:
+                self._geo_index = HeritageGeoIndex(df_sites, df_arts)
+            return self._geo_index
+
+    def get_cultural_index(self, df_arts, df_festivals=None):
+        with self._lock:
+            version = CulturalIndex.fingerprint(df_arts, df_festivals)
+            if self._cultural_index is None or self._cultural_index.version != version:
+                self._cultural_index = CulturalIndex(df_arts, df_festivals)
+            return self._cultural_index
+
+    def get_site_registry(self, df_sites):
+        with self._lock:
+            if self._site_registry_source is not None and self._site_registry_source() is df_sites:
+                return self._site_registry
+
+            version = SiteRegistry.fingerprint(df_sites)
+            if self._site_registry is None or self._site_registry.version != version:
+                self._site_registry = SiteRegistry(df_sites)
+            self._site_registry_source = weakref.ref(df_sites)
+            return self._site_registry
+
+    def get_event_calendar(self, df_festivals=None, df_events=None, df_tourism=None, start_date=None, n_days=1):
+        with self._lock:
+            version = EventCalendar.fingerprint(df_festivals, df_events, df_tourism)
+            if self._event_calendar is None or self._event_calendar.version != version:
+                self._event_calendar = EventCalendar(df_festivals, df_events, df_tourism)
+            calendar = self._event_calendar
+
+        # Fixed dates outside the shared horizon get a calendar of their own, so other sessions keep
+        # planning from today
+        if start_date is not None and not calendar.covers(start_date, n_days):
+            calendar = EventCalendar(df_festivals, df_events, df_tourism, start_date=start_date, horizon_days=n_days)
+        return calendar
+
+    def find_nearby(self, selected_site, df_sites, df_arts, radius_km=50):
+        site = df_sites[df_sites['site_name'] == selected_site]
+        if site.empty:
+            return pd.DataFrame(), pd.DataFrame()
+
+        geo_index = self.get_geo_index(df_sites, df_arts)
+        lat, lon = site.iloc[0]['latitude'], site.iloc[0]['longitude']
+
+        site_positions, site_distances = geo_index.sites.query_radius(lat, lon, radius_km)
+        nearby_sites = df_sites.iloc[site_positions][['site_name', 'state', 'type', 'unesco_status',
+                                                      'latitude', 'longitude']].copy()
+        nearby_sites['distance_km'] = site_distances
+        nearby_sites = nearby_sites[nearby_sites['site_name'] != selected_site]
+
+        art_positions, art_distances = geo_index.arts.query_radius(lat, lon, radius_km)
+        nearby_arts = df_arts.iloc[art_positions][['art_form', 'category', 'state', 'risk_level',
+                                                   'latitude', 'longitude']].copy()
+        nearby_arts['distance_km'] = art_distances
+
+        return nearby_sites, nearby_arts
 
     def find_similar_destinations(self, selected_site, df_sites, top_n=5):
-        features = ['visitor_capacity', 'accessibility_score', 'digital_presence_score', 'current_utilization']
+        similar_sites = self.find_similar_destinations_batch([selected_site], df_sites, top_n)
+        return similar_sites.drop(columns='query_site') if not similar_sites.empty else similar_sites
 
-        site_features = df_sites[df_sites['site_name'] == selected_site][features]
-        if site_features.empty:
-            return pd.DataFrame()
-
-        all_features = df_sites[features].fillna(0)
-        scaled_features = self.scaler.fit_transform(all_features)
+    def find_similar_destinations_batch(self, selected_sites, df_sites, top_n=5):
+        index = self.get_similarity_index(df_sites)
 
-        site_idx = df_sites[df_sites['site_name'] == selected_site].index[0]
-        site_vector = scaled_features[site_idx].reshape(1, -1)
+        positions = index.lookup(list(selected_sites))
+        found = ~np.isnan(positions)
+        queries = np.asarray(selected_sites, dtype=object)[found]
+        if len(queries) == 0:
+            return pd.DataFrame()
 
-        similarities = cosine_similarity(site_vector, scaled_features)[0]
-        similar_indices = similarities.argsort()[-top_n - 1:-1][::-1]
+        neighbours, scores = index.top_k(positions[found].astype(np.int64), top_n)
 
-        similar_sites = df_sites.iloc[similar_indices][['site_name', 'state', 'type', 'unesco_status']]
-        similar_sites['similarity_score'] = similarities[similar_indices]
+        valid = neighbours >= 0
+        similar_sites = df_sites.iloc[neighbours[valid]][['site_name', 'state', 'type', 'unesco_status']]
+        similar_sites.insert(0, 'query_site', np.repeat(queries, valid.sum(axis=1)))
+        similar_sites['similarity_score'] = scores[valid]
 
-        return similar_sites
\ No newline at end of file
+        return similar_sites
@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+
+# Each rule is (label, column, comparison, value); comparisons are pandas Series methods
+SITE_FEATURE_RULES = [
+    ('UNESCO World Heritage Site', 'unesco_status', 'eq', 'Inscribed'),
+    ('Excellent Accessibility', 'accessibility_score', 'gt', 0.8),
+    ('Well Preserved', 'conservation_status', 'isin', ['Excellent', 'Good']),
+    ('Strong Digital Presence', 'digital_presence_score', 'gt', 0.7)
+]
+
+VISITOR_TIP_RULES = [
+    ('Visit during weekdays to avoid crowds', 'current_utilization', 'gt', 0.8),
+    ('Prepare for limited accessibility', 'accessibility_score', 'lt', 0.5),
+    ('Dress modestly and remove footwear', 'type', 'eq', 'Temple')
+]
+
+COMPARISONS = {'eq', 'ne', 'gt', 'ge', 'lt', 'le', 'isin'}
+
+
+class RuleSet:
+    def __init__(self, rules, default, separator=', '):
+        if len(rules) > 63:
+            raise ValueError("A rule set holds at most 63 rules")
+        for label, column, comparison, value in rules:
+            if comparison not in COMPARISONS:
+                raise ValueError(f"Unknown comparison '{comparison}' in rule '{label}'")
+
+        self.rules = list(rules)
+        self.default = default
+        self.separator = separator
+
+    def evaluate(self, df):
+        masks = np.zeros(len(df), dtype=np.int64)
+        for bit, (label, column, comparison, value) in enumerate(self.rules):
+            matched = getattr(df[column], comparison)(value).to_numpy(dtype=bool)
+            masks |= matched.astype(np.int64) << bit
+        return masks
+
+    def label(self, mask):
+        labels = [rule[0] for bit, rule in enumerate(self.rules) if mask >> bit & 1]
+        return self.separator.join(labels) if labels else self.default
+
+    def labels(self, masks):
+        # Strings are built once per distinct combination of matched rules, not once per row
+        combinations, inverse = np.unique(masks, return_inverse=True)
+        lookup = np.array([self.label(int(mask)) for mask in combinations], dtype=object)
+        return lookup[inverse.reshape(-1)]
+
+    def apply(self, df):
+        return pd.Series(self.labels(self.evaluate(df)), index=df.index)
+
+
+SITE_FEATURES = RuleSet(SITE_FEATURE_RULES, 'Historical Significance')
+VISITOR_TIPS = RuleSet(VISITOR_TIP_RULES, 'Check local guidelines before visiting', separator='; ')
@@ -0,0 +1,105 @@
+import threading
+
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import StandardScaler
+
+from components.ann_index import RandomProjectionForest
+from utils.helpers import dataframe_digest, dataframe_fingerprint
+
+SIMILARITY_FEATURES = ['visitor_capacity', 'accessibility_score', 'digital_presence_score', 'current_utilization']
+
+
+class SimilarityIndex:
+    def __init__(self, df_sites, features=None, ann_threshold=50000, ann_params=None):
+        self.features = features or SIMILARITY_FEATURES
+        # add_sites grows the arrays and the forest in place while other sessions query them
+        self._lock = threading.Lock()
+        self.ann_threshold = ann_threshold
+        self.ann_params = ann_params
+        # rows_version identifies the indexed rows; version also says whether the scaler was fitted on
+        # all of them, so an index grown by add_sites never passes for a fresh build
+        self._digest = dataframe_digest(df_sites, ['site_name'] + list(self.features))
+        self.rows_version = self.version = self._digest.hexdigest()
+        self.fitted_rows = len(df_sites)
+
+        self.scaler = StandardScaler().fit(df_sites[self.features].fillna(0))
+        self.vectors = self._embed(df_sites)
+
+        self.site_names = df_sites['site_name'].to_numpy()
+        self.positions = pd.Series(np.arange(len(df_sites)), index=df_sites['site_name'])
+        self.positions = self.positions[~self.positions.index.duplicated()]
+
+        # Small catalogs are answered exactly; the forest only pays off at registry scale
+        self.ann = None
+        if ann_threshold is not None and len(self.vectors) > ann_threshold:
+            self.ann = RandomProjectionForest(**(ann_params or {})).build(self.vectors)
+
+    def _embed(self, df_sites):
+        scaled = self.scaler.transform(df_sites[self.features].fillna(0))
+        norms = np.linalg.norm(scaled, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return np.ascontiguousarray(scaled / norms, dtype=np.float32)
+
+    def add_sites(self, df_new_sites):
+        vectors = self._embed(df_new_sites)
+        with self._lock:
+            start = len(self.vectors)
+            self.vectors = np.vstack([self.vectors, vectors])
+            self.site_names = np.concatenate([self.site_names, df_new_sites['site_name'].to_numpy()])
+
+            positions = pd.Series(np.arange(start, len(self.vectors)), index=df_new_sites['site_name'])
+            self.positions = pd.concat([self.positions, positions])
+            self.positions = self.positions[~self.positions.index.duplicated()]
+
+            if self.ann is not None:
+                self.ann.insert(vectors)
+            elif self.ann_threshold is not None and len(self.vectors) > self.ann_threshold:
+                self.ann = RandomProjectionForest(**(self.ann_params or {})).build(self.vectors)
+
+            # New rows are embedded with the scaler fitted on the first fitted_rows rows, not refitted
+            self._digest = dataframe_digest(df_new_sites, ['site_name'] + list(self.features), self._digest)
+            self.rows_version = self._digest.hexdigest()
+            self.version = f'{self.rows_version}+incremental'
+            return positions.to_numpy()
+
+    @staticmethod
+    def fingerprint(df_sites, features=None):
+        return dataframe_fingerprint(df_sites, ['site_name'] + list(features or SIMILARITY_FEATURES))
+
+    def __len__(self):
+        return len(self.vectors)
+
+    def lookup(self, site_names):
+        with self._lock:
+            return self.positions.reindex(site_names).to_numpy()
+
+    def top_k(self, positions, k=5, chunk_size=256, exact=False):
+        positions = np.asarray(positions, dtype=np.int64)
+        with self._lock:
+            return self._top_k(positions, k, chunk_size, exact)
+
+    def _top_k(self, positions, k, chunk_size, exact):
+        if self.ann is not None and not exact:
+            return self.ann.query(self.vectors[positions], k, exclude=positions)
+
+        k = min(k, len(self.vectors) - 1)
+        neighbours = np.empty((len(positions), max(k, 0)), dtype=np.int64)
+        similarities = np.empty((len(positions), max(k, 0)), dtype=np.float32)
+        if k <= 0:
+            return neighbours, similarities
+
+        # Query blocks keep the score matrix at chunk_size x catalog size
+        for start in range(0, len(positions), chunk_size):
+            block = positions[start:start + chunk_size]
+            scores = self.vectors[block] @ self.vectors.T
+            scores[np.arange(len(block)), block] = -np.inf
+
+            candidates = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+            candidate_scores = np.take_along_axis(scores, candidates, axis=1)
+            order = np.argsort(-candidate_scores, axis=1, kind='stable')
+
+            neighbours[start:start + len(block)] = np.take_along_axis(candidates, order, axis=1)
+            similarities[start:start + len(block)] = np.take_along_axis(candidate_scores, order, axis=1)
+
+        return neighbours, similarities
@@ -0,0 +1,231 @@
+import hashlib
+import io
+import json
+import os
+import threading
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+from PIL import Image, ImageDraw
+
+from data.spatial_index import mercator_xy
+
+TILE_SIZE = 256
+
+# Layer name -> (colour column, {value: RGBA}, default RGBA)
+TILE_STYLES = {
+    'heritage_sites': ('unesco_status', {'Inscribed': (255, 215, 0, 230), 'Tentative': (0, 0, 255, 210)},
+                       (128, 128, 128, 200)),
+    'art_forms': ('risk_level', {'Safe': (0, 128, 0, 220), 'Vulnerable': (255, 165, 0, 220)}, (255, 0, 0, 220))
+}
+
+
+def _blank_tile():
+    buffer = io.BytesIO()
+    Image.new('RGBA', (TILE_SIZE, TILE_SIZE), (0, 0, 0, 0)).save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+BLANK_TILE = _blank_tile()
+
+
+class TileRenderer:
+    def __init__(self, tile_dir, min_zoom=3, max_zoom=10):
+        self.tile_dir = tile_dir
+        self.min_zoom = min_zoom
+        self.max_zoom = max_zoom
+
+    def radius(self, zoom):
+        return 2 + max(0, zoom - self.min_zoom) // 2
+
+    def _manifest_path(self, layer):
+        return os.path.join(self.tile_dir, layer, 'manifest.json')
+
+    def load_manifest(self, layer):
+        try:
+            with open(self._manifest_path(layer)) as handle:
+                return json.load(handle)
+        except (OSError, ValueError):
+            return None
+
+    def fingerprint(self, layer, df, lat_col='latitude', lon_col='longitude'):
+        # What a layer's tiles are drawn from: positions and colour codes as plain arrays, so the same data
+        # loaded with different column dtypes still matches
+        codes, _, signature = self._style(layer, df)
+        digest = hashlib.sha1(signature.encode())
+        for values in (df[lat_col].to_numpy(dtype=float), df[lon_col].to_numpy(dtype=float), codes):
+            digest.update(np.ascontiguousarray(values).tobytes())
+        return digest.hexdigest()
+
+    def is_current(self, layer, df, lat_col='latitude', lon_col='longitude'):
+        manifest = self.load_manifest(layer)
+        return manifest is not None and manifest.get('data') == self.fingerprint(layer, df, lat_col, lon_col)
+
+    def _tile_path(self, layer, zoom, x, y):
+        return os.path.join(self.tile_dir, layer, str(zoom), str(x), f'{y}.png')
+
+    def _style(self, layer, df):
+        column, colors, default = TILE_STYLES[layer]
+        palette = list(colors.values()) + [default]
+        codes = np.full(len(df), len(colors), dtype=np.int64)
+        if column in df:
+            values = df[column].to_numpy()
+            for code, value in enumerate(colors):
+                codes[values == value] = code
+        signature = hashlib.sha1(repr((column, palette, TILE_SIZE, self.min_zoom, self.max_zoom,
+                                       [self.radius(zoom) for zoom in range(self.min_zoom, self.max_zoom + 1)])
+                                      ).encode()).hexdigest()
+        return codes, palette, signature
+
+    def _tiles_for_zoom(self, zoom, x, y, codes):
+        # Pixel position of every point in the world image at this zoom. A point near a tile edge is also
+        # drawn into the neighbouring tile so its disc is not cut off
+        radius = self.radius(zoom)
+        px = np.floor(x * TILE_SIZE * (1 << zoom)).astype(np.int64)
+        py = np.floor(y * TILE_SIZE * (1 << zoom)).astype(np.int64)
+        tile_x, local_x = np.divmod(px, TILE_SIZE)
+        tile_y, local_y = np.divmod(py, TILE_SIZE)
+
+        parts = []
+        for dx in (-1, 0, 1):
+            near_x = np.ones(len(px), dtype=bool) if dx == 0 else \
+                (local_x < radius if dx < 0 else local_x >= TILE_SIZE - radius)
+            for dy in (-1, 0, 1):
+                near_y = np.ones(len(py), dtype=bool) if dy == 0 else \
+                    (local_y < radius if dy < 0 else local_y >= TILE_SIZE - radius)
+                keep = near_x & near_y
+                parts.append((tile_x[keep] + dx, tile_y[keep] + dy, local_x[keep] - dx * TILE_SIZE,
+                              local_y[keep] - dy * TILE_SIZE, codes[keep]))
+        tile_x, tile_y, local_x, local_y, codes = [np.concatenate(column) for column in zip(*parts)]
+
+        # Points that land on the same pixel with the same colour are drawn once
+        points = pd.DataFrame({'tx': tile_x, 'ty': tile_y, 'x': local_x, 'y': local_y, 'c': codes})
+        points = points.drop_duplicates().sort_values(['tx', 'ty', 'c', 'x', 'y'], kind='stable')
+        points = points[(points['tx'] >= 0) & (points['ty'] >= 0) & (points['tx'] < (1 << zoom))
+                        & (points['ty'] < (1 << zoom))]
+
+        # Each tile's content hash is an order-independent sum of its point hashes
+        point_hashes = pd.util.hash_pandas_object(points[['x', 'y', 'c']], index=False).to_numpy()
+        tile_keys = points['tx'].to_numpy() * (1 << 32) + points['ty'].to_numpy()
+        starts = np.flatnonzero(np.r_[True, tile_keys[1:] != tile_keys[:-1]]) if len(points) else \
+            np.zeros(0, dtype=np.int64)
+        hashes = np.add.reduceat(point_hashes, starts) if len(points) else np.zeros(0, dtype=np.uint64)
+        return points, starts, hashes
+
+    def render(self, layer, df, lat_col='latitude', lon_col='longitude'):
+        # Incremental: only tiles whose points changed since the last run are redrawn, and tiles that
+        # lost all their points are removed
+        lat = df[lat_col].to_numpy(dtype=float)
+        lon = df[lon_col].to_numpy(dtype=float)
+        valid = ~(np.isnan(lat) | np.isnan(lon))
+        codes, palette, signature = self._style(layer, df)
+        x, y = mercator_xy(lat[valid], lon[valid])
+        codes = codes[valid]
+
+        previous = self.load_manifest(layer) or {}
+        old_tiles = previous.get('tiles', {}) if previous.get('style') == signature else {}
+        tiles = {}
+        written = 0
+        for zoom in range(self.min_zoom, self.max_zoom + 1):
+            points, starts, hashes = self._tiles_for_zoom(zoom, x, y, codes)
+            radius = self.radius(zoom)
+            ends = np.r_[starts[1:], len(points)]
+            tile_x, tile_y = points['tx'].to_numpy(), points['ty'].to_numpy()
+            local_x, local_y, colors = points['x'].to_numpy(), points['y'].to_numpy(), points['c'].to_numpy()
+            for start, end, content in zip(starts, ends, hashes):
+                key = f'{zoom}/{tile_x[start]}/{tile_y[start]}'
+                tiles[key] = format(int(content), '016x')
+                if old_tiles.get(key) == tiles[key] and os.path.exists(self._tile_path(layer, zoom, tile_x[start],
+                                                                                          tile_y[start])):
+                    continue
+                self._draw_tile(layer, zoom, tile_x[start], tile_y[start], local_x[start:end], local_y[start:end],
+                                colors[start:end], palette, radius)
+                written += 1
+
+        removed = 0
+        for key in set(old_tiles) - set(tiles):
+            zoom, tile_x, tile_y = key.split('/')
+            try:
+                os.remove(self._tile_path(layer, zoom, tile_x, tile_y))
+                removed += 1
+            except OSError:
+                pass
+
+        manifest = {'style': signature, 'data': self.fingerprint(layer, df, lat_col, lon_col),
+                    'min_zoom': self.min_zoom, 'max_zoom': self.max_zoom, 'tiles': tiles}
+        os.makedirs(os.path.dirname(self._manifest_path(layer)), exist_ok=True)
+        with open(self._manifest_path(layer) + '.tmp', 'w') as handle:
+            json.dump(manifest, handle)
+        os.replace(self._manifest_path(layer) + '.tmp', self._manifest_path(layer))
+        return {'tiles': len(tiles), 'written': written, 'removed': removed}
+
+    def _draw_tile(self, layer, zoom, tile_x, tile_y, xs, ys, colors, palette, radius):
+        image = Image.new('RGBA', (TILE_SIZE, TILE_SIZE), (0, 0, 0, 0))
+        draw = ImageDraw.Draw(image)
+        for x, y, color in zip(xs.tolist(), ys.tolist(), colors.tolist()):
+            draw.ellipse([x - radius, y - radius, x + radius, y + radius], fill=palette[color],
+                         outline=(255, 255, 255, 200))
+        path = self._tile_path(layer, zoom, tile_x, tile_y)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        image.save(path + '.tmp', format='PNG')
+        os.replace(path + '.tmp', path)
+
+
+class _TileHandler(SimpleHTTPRequestHandler):
+    def do_GET(self):
+        # /<layer>/<z>/<x>/<y>.png; tiles without points are served as a transparent image
+        path = self.translate_path(self.path)
+        if os.path.isfile(path) and path.endswith('.png'):
+            with open(path, 'rb') as handle:
+                body = handle.read()
+        else:
+            body = BLANK_TILE
+        self.send_response(200)
+        self.send_header('Content-Type', 'image/png')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Cache-Control', 'public, max-age=3600')
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TileServer:
+    def __init__(self, tile_dir, host='127.0.0.1', port=8765, public_url=None):
+        self.tile_dir = os.path.abspath(tile_dir)
+        self.host = host
+        self.port = port
+        self.public_url = public_url
+        self._server = None
+        self._thread = None
+
+    def start(self):
+        if self._server is None:
+            handler = lambda *args, **kwargs: _TileHandler(*args, directory=self.tile_dir, **kwargs)
+            self._server = ThreadingHTTPServer((self.host, self.port), handler)
+            self.port = self._server.server_address[1]
+            self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def url(self, layer):
+        base = self.public_url or f'http://{self.host}:{self.port}'
+        return f"{base.rstrip('/')}/{layer}/{{z}}/{{x}}/{{y}}.png"
+
+
+def build_tiles(df_arts=None, df_sites=None, tile_dir='tiles', min_zoom=3, max_zoom=10):
+    renderer = TileRenderer(tile_dir, min_zoom, max_zoom)
+    stats = {}
+    for layer, df in [('art_forms', df_arts), ('heritage_sites', df_sites)]:
+        if df is not None and {'latitude', 'longitude'}.issubset(df.columns):
+            stats[layer] = renderer.render(layer, df)
+    return stats
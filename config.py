@@ -19,8 +19,40 @@ APP_CONFIG = {
     'initial_sidebar_state': 'expanded'
 }
 
+# Rendered maps are kept in memory up to the budget; set MAP_CACHE_DIR to spill evicted ones to disk
+MAP_CACHE_CONFIG = {
+    'max_mb': int(os.getenv('MAP_CACHE_MB', 128)),
+    'spill_dir': os.getenv('MAP_CACHE_DIR'),
+    'max_spill_mb': int(os.getenv('MAP_CACHE_SPILL_MB', 1024))
+}
+
+# Plotly figures are kept as JSON, so the analytics charts skip their groupbys while the data is unchanged
+FIGURE_CACHE_CONFIG = {
+    'max_mb': int(os.getenv('FIGURE_CACHE_MB', 32))
+}
+
+# Pre-rendered tiles for the static layers, rebuilt by load.py; set TILE_URL when the browser cannot
+# reach the built-in tile server directly (e.g. behind a reverse proxy)
+TILE_CONFIG = {
+    'tile_dir': os.getenv('TILE_DIR', 'tiles'),
+    'host': os.getenv('TILE_HOST', '127.0.0.1'),
+    'port': int(os.getenv('TILE_PORT', 8765)),
+    'public_url': os.getenv('TILE_URL'),
+    'min_zoom': 3,
+    'max_zoom': 10
+}
+
 DATA_SOURCES = {
     'art_forms': 'https://data.gov.in/catalog/traditional-art-forms',
     'tourism_stats': 'https://data.gov.in/catalog/tourism-statistics',
     'cultural_sites': 'https://data.gov.in/catalog/cultural-heritage-sites'
-}
\ No newline at end of file
+}
+
+# States grouped into the regions used for cultural routes and regional festival lookups
+REGIONS = {
+    'North': ['Uttarakhand', 'Himachal Pradesh', 'Punjab', 'Haryana', 'Uttar Pradesh'],
+    'South': ['Kerala', 'Tamil Nadu', 'Karnataka', 'Andhra Pradesh', 'Telangana'],
+    'East': ['West Bengal', 'Odisha', 'Jharkhand', 'Bihar', 'Assam'],
+    'West': ['Rajasthan', 'Gujarat', 'Maharashtra', 'Goa'],
+    'Northeast': ['Assam', 'Meghalaya', 'Manipur', 'Mizoram', 'Nagaland', 'Tripura', 'Arunachal Pradesh', 'Sikkim']
+}
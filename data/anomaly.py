@@ -0,0 +1,140 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+
+
+class AnomalyDetector:
+    def __init__(self, window=12, threshold=3.0, min_periods=6, log_transform=True, min_std=0.05,
+                 seasonal=True):
+        self.window = window
+        self.threshold = threshold
+        self.min_periods = min_periods
+        self.log_transform = log_transform
+        self.min_std = min_std
+        self.seasonal = seasonal
+        self.sites = None
+        self.profile_ = None
+        self.buffer_ = None
+
+    def _transform(self, values):
+        values = np.asarray(values, dtype=float)
+        return np.log1p(np.clip(values, 0, None)) if self.log_transform else values
+
+    def _seasonal_profile(self, values, months):
+        profile = np.zeros((len(values), 12))
+        if not self.seasonal:
+            return profile
+
+        with warnings.catch_warnings():
+            # A month the site has never been observed in has no profile, so it is left unscored
+            warnings.simplefilter('ignore', RuntimeWarning)
+            level = np.nanmean(values, axis=1, keepdims=True)
+            for month in range(12):
+                columns = months == month + 1
+                profile[:, month] = np.nanmean(values[:, columns], axis=1) - level[:, 0] if columns.any() else np.nan
+        return profile
+
+    def _zscores(self, values, total, total_sq, count):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean = total / count
+            std = np.sqrt(np.clip(total_sq / count - mean ** 2, 0, None))
+            std = np.maximum(std, self.min_std)
+            scores = (values - mean) / std
+        scores[(count < self.min_periods) | np.isnan(values)] = np.nan
+        return scores, mean
+
+    def score_matrix(self, matrix):
+        months = np.asarray(pd.PeriodIndex(matrix.columns, freq='M').month) - 1
+        values = self._transform(matrix.to_numpy())
+        observed = ~np.isnan(values)
+        filled = np.where(observed, values, 0.0)
+
+        scores = np.full(values.shape, np.nan)
+        mean = np.full(values.shape, np.nan)
+        month_total = np.zeros((len(values), 12))
+        month_count = np.zeros((len(values), 12))
+
+        # Columns are scored in order against the trailing window and a seasonal profile of the earlier
+        # months, exactly as init_online followed by score_next would on that history
+        for column in range(values.shape[1]):
+            profile = np.zeros((len(values), 12))
+            if self.seasonal:
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    level = month_total.sum(axis=1, keepdims=True) / month_count.sum(axis=1, keepdims=True)
+                    profile = month_total / month_count - level
+
+            start = max(column - self.window, 0)
+            history = values[:, start:column] - profile[:, months[start:column]]
+            seen = ~np.isnan(history)
+            history = np.where(seen, history, 0.0)
+
+            seasonal = profile[:, months[column]]
+            scores[:, column], mean[:, column] = self._zscores(
+                values[:, column] - seasonal, history.sum(axis=1), (history ** 2).sum(axis=1), seen.sum(axis=1)
+            )
+            mean[:, column] += seasonal
+
+            # The profile only learns from months that have left the window, so neither the window nor
+            # the month being scored was used to fit it
+            leaving = column - self.window
+            if leaving >= 0:
+                month_total[:, months[leaving]] += filled[:, leaving]
+                month_count[:, months[leaving]] += observed[:, leaving]
+
+        expected = np.expm1(mean) if self.log_transform else mean
+        return (pd.DataFrame(scores, index=matrix.index, columns=matrix.columns),
+                pd.DataFrame(expected, index=matrix.index, columns=matrix.columns))
+
+    def _flag(self, scores, actual, expected):
+        anomalies = pd.DataFrame({
+            'anomaly_score': scores.stack(),
+            'visitors': actual.stack(),
+            'expected_visitors': expected.stack()
+        })
+        anomalies = anomalies[anomalies['anomaly_score'].abs() > self.threshold]
+        anomalies.index.names = ['site', 'period']
+        anomalies = anomalies.reset_index()
+        anomalies['anomaly_type'] = np.where(anomalies['anomaly_score'] > 0, 'Spike', 'Drop')
+        return anomalies[['site', 'period', 'visitors', 'expected_visitors', 'anomaly_score', 'anomaly_type']]
+
+    def detect(self, matrix):
+        scores, expected = self.score_matrix(matrix)
+        return self._flag(scores, matrix, expected)
+
+    def init_online(self, matrix):
+        self.sites = matrix.index
+        months = np.asarray(pd.PeriodIndex(matrix.columns, freq='M').month)
+        values = self._transform(matrix.to_numpy())
+        # The profile is fitted on the months before the window, as in score_matrix
+        fitted = max(values.shape[1] - self.window, 0)
+        self.profile_ = self._seasonal_profile(values[:, :fitted], months[:fitted])
+        history = (values - self.profile_[:, months - 1])[:, -self.window:]
+        self.buffer_ = np.full((len(matrix), self.window), np.nan)
+        self.buffer_[:, self.window - history.shape[1]:] = history
+        return self
+
+    def score_next(self, values, period):
+        period = pd.Period(period, freq='M')
+        actual = pd.Series(values).reindex(self.sites)
+        seasonal = self.profile_[:, period.month - 1]
+        current = self._transform(actual.to_numpy()) - seasonal
+
+        observed = ~np.isnan(self.buffer_)
+        filled = np.where(observed, self.buffer_, 0.0)
+        scores, mean = self._zscores(
+            current[:, None], filled.sum(axis=1, keepdims=True), (filled ** 2).sum(axis=1, keepdims=True),
+            observed.sum(axis=1, keepdims=True)
+        )
+
+        self.buffer_ = np.roll(self.buffer_, -1, axis=1)
+        self.buffer_[:, -1] = current
+
+        columns = pd.PeriodIndex([period])
+        mean = mean + seasonal[:, None]
+        expected = np.expm1(mean) if self.log_transform else mean
+        return self._flag(
+            pd.DataFrame(scores, index=self.sites, columns=columns),
+            pd.DataFrame(actual.to_numpy()[:, None], index=self.sites, columns=columns),
+            pd.DataFrame(expected, index=self.sites, columns=columns)
+        )
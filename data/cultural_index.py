@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+
+from config import REGIONS
+from utils.helpers import dataframe_fingerprint
+
+ALL_MONTHS = range(1, 13)
+
+
+def merge_groups(groups, keys):
+    # Positions come back in row order, so callers see rows exactly as a boolean filter would return them
+    parts = [groups[key] for key in keys if key in groups]
+    return np.sort(np.concatenate(parts)) if parts else np.empty(0, dtype=np.int64)
+
+
+class CulturalIndex:
+    def __init__(self, df_arts, df_festivals=None):
+        if df_festivals is None:
+            df_festivals = pd.DataFrame(columns=['festival', 'state', 'month'])
+
+        self.version = self.fingerprint(df_arts, df_festivals)
+        self.art_forms = df_arts['art_form'].to_numpy()
+        self.festival_names = df_festivals['festival'].to_numpy()
+
+        self.arts_by_state = df_arts.groupby('state').indices
+        self.arts_by_region = {region: merge_groups(self.arts_by_state, states) for region, states in REGIONS.items()}
+
+        self.festivals_by_state_month = df_festivals.groupby(['state', 'month']).indices if len(df_festivals) else {}
+        self.festivals_by_region_month = {
+            (region, month): merge_groups(self.festivals_by_state_month, [(state, month) for state in states])
+            for region, states in REGIONS.items() for month in ALL_MONTHS
+        }
+
+    @staticmethod
+    def fingerprint(df_arts, df_festivals=None):
+        version = dataframe_fingerprint(df_arts, ['state', 'art_form'])
+        if df_festivals is not None:
+            version += dataframe_fingerprint(df_festivals, ['festival', 'state', 'month'])
+        return version
+
+    def arts(self, states):
+        return merge_groups(self.arts_by_state, states)
+
+    def region_arts(self, region):
+        return self.arts_by_region.get(region, np.empty(0, dtype=np.int64))
+
+    def festivals(self, states, months=None):
+        months = ALL_MONTHS if months is None else months
+        return merge_groups(self.festivals_by_state_month, [(state, month) for state in states for month in months])
+
+    def region_festivals(self, region, months=None):
+        months = ALL_MONTHS if months is None else months
+        return merge_groups(self.festivals_by_region_month, [(region, month) for month in months])
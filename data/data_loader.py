@@ -179,4 +179,34 @@ class DataLoader:
                     'month': random.randint(1, 12)
                 })
 
-        return pd.DataFrame(festivals)
\ No newline at end of file
+        return pd.DataFrame(festivals)
+
+    def load_cultural_events_data(self):
+        if self.use_snowflake:
+            try:
+                query = "SELECT * FROM CULTURAL_EVENTS"
+                df = self.snow.fetch_dataframe(query)
+                if not df.empty:
+                    return df
+            except:
+                pass
+
+        cultural_events = []
+        event_types = ['Music Festival', 'Dance Festival', 'Craft Fair', 'Literature Festival', 'Food Festival']
+        start_date = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+
+        for state in self.states:
+            for i in range(random.randint(1, 4)):
+                event_type = random.choice(event_types)
+                event_start = start_date + timedelta(days=random.randint(0, 365))
+                cultural_events.append({
+                    'event_name': f'{state} {event_type} {i + 1}',
+                    'event_type': event_type,
+                    'state': state,
+                    'start_date': event_start,
+                    'end_date': event_start + timedelta(days=random.randint(0, 6)),
+                    'expected_attendance': random.randint(5000, 200000),
+                    'ticket_price': random.randint(0, 2000)
+                })
+
+        return pd.DataFrame(cultural_events)
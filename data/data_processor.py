@@ -1,25 +1,72 @@
+import threading
+
 import pandas as pd
 import numpy as np
 from sklearn.preprocessing import StandardScaler
 from sklearn.cluster import KMeans
 
+from config import REGIONS
+from data.cultural_index import CulturalIndex, merge_groups
+from data.entity_resolution import SiteRegistry
+from data.forecasting import TourismForecaster
+from data.parallel import ParallelExecutor
+
+
+def _heritage_kernel(part, state):
+    counts = np.bincount(part['source'], minlength=3)
+    return (counts[0] * 0.3 + counts[1] * 0.4 + counts[2] * 0.3) / 3
+
+
+def _growth_kernel(part, site):
+    years, inverse = np.unique(part['year'], return_inverse=True)
+    totals = np.bincount(inverse, weights=part['total_visitors'], minlength=len(years))
+    growth = np.full(len(years), np.nan)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        growth[1:] = totals[1:] / totals[:-1] - 1
+    return years, totals, growth
+
+
+def _route_kernel(arrays, bounds):
+    start, stop = bounds
+    site_pos = arrays['region_sites'][start:stop]
+    if len(site_pos) < 3:
+        return None
+
+    site_pos = site_pos[~np.isnan(arrays['site_access'][site_pos])]
+    return site_pos[np.argsort(-arrays['site_access'][site_pos], kind='stable')[:3]]
+
 
 class DataProcessor:
-    def __init__(self):
+    def __init__(self, executor=None):
         self.scaler = StandardScaler()
+        self.executor = executor or ParallelExecutor()
+        self._site_registry = None
+        self._forecast = None
+        self._lock = threading.Lock()
+
+    def get_site_registry(self, df_sites):
+        with self._lock:
+            version = SiteRegistry.fingerprint(df_sites)
+            if self._site_registry is None or self._site_registry.version != version:
+                self._site_registry = SiteRegistry(df_sites)
+            return self._site_registry
 
     def calculate_heritage_index(self, df_arts, df_sites, df_festivals):
-        state_heritage = {}
-
-        for state in df_arts['state'].unique():
-            art_score = len(df_arts[df_arts['state'] == state]) * 0.3
-            site_score = len(df_sites[df_sites['state'] == state]) * 0.4
-            festival_score = len(df_festivals[df_festivals['state'] == state]) * 0.3
-
-            heritage_index = (art_score + site_score + festival_score) / 3
-            state_heritage[state] = min(heritage_index, 100)
+        states = pd.Index(df_arts['state'].unique())
+
+        state_codes = np.concatenate([
+            states.get_indexer(df_arts['state']),
+            states.get_indexer(df_sites['state']),
+            states.get_indexer(df_festivals['state'])
+        ])
+        source = np.repeat([0, 1, 2], [len(df_arts), len(df_sites), len(df_festivals)])
+        known = state_codes >= 0
+
+        scores = self.executor.map_groups(
+            _heritage_kernel, {'source': source[known]}, state_codes[known], n_groups=len(states)
+        )
 
-        return pd.DataFrame(list(state_heritage.items()), columns=['state', 'heritage_index'])
+        return pd.DataFrame({'state': states, 'heritage_index': np.minimum(scores, 100)})
 
     def identify_tourism_patterns(self, df_tourism):
         df_tourism['total_visitors'] = df_tourism['domestic_visitors'] + df_tourism['international_visitors']
@@ -29,11 +76,49 @@ class DataProcessor:
         seasonal_patterns = df_tourism.groupby('month')['total_visitors'].mean().reset_index()
         seasonal_patterns['season'] = seasonal_patterns['month'].apply(self._get_season)
 
-        growth_trends = df_tourism.groupby(['site', 'year'])['total_visitors'].sum().reset_index()
-        growth_trends['yoy_growth'] = growth_trends.groupby('site')['total_visitors'].pct_change()
+        growth_trends = self._compute_growth_trends(df_tourism)
 
         return seasonal_patterns, growth_trends
 
+    def _compute_growth_trends(self, df_tourism):
+        site_codes, sites = pd.factorize(df_tourism['site'], sort=True)
+        valid = site_codes >= 0
+
+        results = self.executor.map_groups(
+            _growth_kernel,
+            {
+                'year': df_tourism['year'].to_numpy()[valid],
+                'total_visitors': df_tourism['total_visitors'].to_numpy(dtype=float)[valid]
+            },
+            site_codes[valid],
+            n_groups=len(sites)
+        )
+
+        lengths = [len(years) for years, _, _ in results]
+        growth_trends = pd.DataFrame({
+            'site': np.repeat(sites.to_numpy(), lengths),
+            'year': np.concatenate([years for years, _, _ in results]) if results else [],
+            'total_visitors': np.concatenate([totals for _, totals, _ in results]) if results else [],
+            'yoy_growth': np.concatenate([growth for _, _, growth in results]) if results else []
+        })
+        growth_trends['total_visitors'] = growth_trends['total_visitors'].astype(df_tourism['total_visitors'].dtype)
+
+        return growth_trends
+
+    def site_month_matrix(self, df_tourism, value='total_visitors'):
+        periods = df_tourism['date'].dt.to_period('M')
+        matrix = df_tourism.pivot_table(index='site', columns=periods, values=value, aggfunc='sum')
+        full_range = pd.period_range(periods.min(), periods.max(), freq='M')
+        return matrix.reindex(columns=full_range)
+
+    def get_forecast(self, site_matrix, horizon=12):
+        # Fitting and backtesting run once per data version, not on every rerun
+        version = (TourismForecaster.fingerprint(site_matrix), horizon)
+        if self._forecast is None or self._forecast[0] != version:
+            forecaster = TourismForecaster().fit(site_matrix)
+            self._forecast = (version, forecaster.forecast(horizon), forecaster.backtest(site_matrix, horizon))
+        return self._forecast[1], self._forecast[2]
+
     def _get_season(self, month):
         if month in [12, 1, 2]:
             return 'Winter'
@@ -45,11 +130,12 @@ class DataProcessor:
             return 'Autumn'
 
     def find_hidden_gems(self, df_sites, df_tourism):
-        site_visits = df_tourism.groupby('site')['total_visitors'].sum().reset_index()
-        site_visits['visit_rank'] = site_visits['total_visitors'].rank(method='dense', ascending=False)
+        registry = self.get_site_registry(df_sites)
+        visits, _ = registry.aggregate(registry.resolve(df_tourism['site']), df_tourism['total_visitors'])
 
-        # Merge with site data to get actual site names
-        site_data = pd.merge(df_sites, site_visits, left_on='site_name', right_on='site', how='left')
+        # Tourism rows are matched to catalog sites through integer site ids rather than exact names
+        site_data = df_sites.copy()
+        site_data['total_visitors'] = registry.gather(registry.site_ids, visits)
 
         # Find sites with good potential but low utilization
         hidden_gems = site_data[
@@ -68,7 +154,8 @@ class DataProcessor:
         # Sort by potential score and return top 10 with meaningful names
         return hidden_gems.nlargest(10, 'potential_score')[['site_name', 'state', 'type', 'unesco_status',
                                                             'conservation_status', 'accessibility_score',
-                                                            'current_utilization', 'potential_score']]
+                                                            'current_utilization', 'total_visitors',
+                                                            'potential_score']]
 
     def cluster_cultural_sites(self, df_sites):
         features = ['annual_maintenance_cost', 'visitor_capacity', 'accessibility_score', 'digital_presence_score']
@@ -106,37 +193,42 @@ class DataProcessor:
                 (1 - sustainability_metrics['crowding_index']) * 0.3 +
                 np.clip(sustainability_metrics['revenue_per_visitor'] / 200, 0, 1) * 0.3
         )
+        sustainability_metrics['site_id'] = self.get_site_registry(df_sites).resolve(sustainability_metrics['site'])
 
         return sustainability_metrics
 
-    def recommend_cultural_routes(self, df_sites, df_arts):
+    def recommend_cultural_routes(self, df_sites, df_arts, cultural_index=None):
         routes = []
 
-        regions = {
-            'North': ['Uttarakhand', 'Himachal Pradesh', 'Punjab', 'Haryana', 'Uttar Pradesh'],
-            'South': ['Kerala', 'Tamil Nadu', 'Karnataka', 'Andhra Pradesh', 'Telangana'],
-            'East': ['West Bengal', 'Odisha', 'Jharkhand', 'Bihar', 'Assam'],
-            'West': ['Rajasthan', 'Gujarat', 'Maharashtra', 'Goa'],
-            'Northeast': ['Assam', 'Meghalaya', 'Manipur', 'Mizoram', 'Nagaland', 'Tripura', 'Arunachal Pradesh',
-                          'Sikkim']
+        if cultural_index is None:
+            cultural_index = CulturalIndex(df_arts)
+        sites_by_state = df_sites.groupby('state').indices
+
+        # Each region's site positions are one slice of a shared array, so large catalogs are ranked
+        # by the executor's workers and small ones stay serial
+        region_sites = [merge_groups(sites_by_state, states) for states in REGIONS.values()]
+        offsets = np.cumsum([0] + [len(positions) for positions in region_sites])
+        arrays = {
+            'region_sites': np.concatenate(region_sites).astype(np.int64),
+            'site_access': df_sites['accessibility_score'].to_numpy(dtype=float)
         }
-
-        for region, states in regions.items():
-            region_sites = df_sites[df_sites['state'].isin(states)]
-            region_arts = df_arts[df_arts['state'].isin(states)]
-
-            if len(region_sites) >= 3:
-                top_sites = region_sites.nlargest(5, 'accessibility_score')
-                unique_arts = region_arts['art_form'].unique()[:3]
-
-                routes.append({
-                    'region': region,
-                    'route_name': f'{region} Cultural Circuit',
-                    'duration_days': len(states),
-                    'key_sites': top_sites['site_name'].tolist()[:3],
-                    'art_forms': list(unique_arts),
-                    'best_season': 'October to March',
-                    'difficulty': 'Moderate'
-                })
-
-        return pd.DataFrame(routes)
\ No newline at end of file
+        results = self.executor.run(_route_kernel, arrays, list(zip(offsets[:-1], offsets[1:])))
+
+        site_names = df_sites['site_name'].to_numpy()
+        for (region, states), top_sites in zip(REGIONS.items(), results):
+            if top_sites is None:
+                continue
+
+            art_forms = pd.unique(cultural_index.art_forms[cultural_index.region_arts(region)])[:3]
+
+            routes.append({
+                'region': region,
+                'route_name': f'{region} Cultural Circuit',
+                'duration_days': len(states),
+                'key_sites': site_names[top_sites].tolist(),
+                'art_forms': list(art_forms),
+                'best_season': 'October to March',
+                'difficulty': 'Moderate'
+            })
+
+        return pd.DataFrame(routes)
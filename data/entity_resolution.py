@@ -0,0 +1,135 @@
+import difflib
+import re
+import threading
+
+import numpy as np
+import pandas as pd
+
+from utils.helpers import dataframe_fingerprint
+
+GENERIC_TOKENS = {'the', 'of', 'at', 'and', 'its', 'complex', 'group', 'monuments', 'ruins'}
+GENERIC_PATTERN = r'\b(?:' + '|'.join(sorted(GENERIC_TOKENS)) + r')\b'
+NUMBER_PATTERN = re.compile(r'\d+')
+
+
+def normalize_names(names):
+    # Accents and case are folded, punctuation becomes whitespace and generic words are dropped
+    names = pd.Series(names, dtype=object).where(lambda values: values.map(type) == str, '').astype(str)
+    accented = ~names.str.isascii()
+    if accented.any():
+        names = names.copy()
+        names[accented] = names[accented].str.normalize('NFKD').str.encode('ascii', 'ignore').str.decode('ascii')
+    return (
+        names.str.lower()
+        .str.replace('&', ' and ', regex=False)
+        .str.replace(r'[^a-z0-9]+', ' ', regex=True)
+        .str.replace(GENERIC_PATTERN, ' ', regex=True)
+        .str.replace(r'\s+', ' ', regex=True).str.strip()
+    )
+
+
+def normalize_name(name):
+    return normalize_names([name]).iloc[0]
+
+
+class SiteRegistry:
+    def __init__(self, df_sites, name_col='site_name', cutoff=0.85):
+        self.name_col = name_col
+        self.cutoff = cutoff
+        self.version = self.fingerprint(df_sites, name_col)
+
+        # Rows whose names normalize to the same key share one integer site id
+        self.site_ids, self.keys = pd.factorize(normalize_names(df_sites[name_col]))
+
+        # Catalog names as written resolve straight to their row's id; rows whose key is empty never match
+        exact_ids = np.where(self.keys.to_numpy()[self.site_ids] != '', self.site_ids, -1)
+        names = pd.Series(exact_ids, index=df_sites[name_col].to_numpy())
+        self.exact_ids = names[~names.index.duplicated()]
+
+        self.token_codes = None
+        self._resolved = {}
+        self._lock = threading.Lock()
+
+    def _build_token_index(self):
+        # Token -> site ids, stored as one sorted array with offsets instead of a list per token. Only
+        # fuzzy matching needs it, so it is built on the first name that is not an exact catalog name
+        keys = pd.Series(self.keys, dtype=object)
+        tokens = np.array(' '.join(keys).split(' '), dtype=object)
+        owners = np.repeat(np.arange(len(keys)), keys.str.count(' ').to_numpy(dtype=np.int64) + 1)
+        tokens, owners = tokens[tokens != ''], owners[tokens != '']
+        token_codes, token_names = pd.factorize(tokens)
+        order = np.argsort(token_codes, kind='stable')
+        self.token_codes = {token: code for code, token in enumerate(token_names)}
+        self.token_sites = owners[order]
+        self.token_offsets = np.searchsorted(token_codes[order], np.arange(len(token_names) + 1))
+
+    def __len__(self):
+        return len(self.keys)
+
+    @staticmethod
+    def fingerprint(df_sites, name_col='site_name'):
+        return dataframe_fingerprint(df_sites, [name_col])
+
+    def _match(self, key):
+        if not key:
+            return -1
+        if key in self.keys:
+            return self.keys.get_loc(key)
+
+        # Fuzzy matching only compares against sites that share at least one token
+        if self.token_codes is None:
+            self._build_token_index()
+        codes = [self.token_codes[token] for token in key.split() if token in self.token_codes]
+        candidates = np.unique(np.concatenate(
+            [self.token_sites[self.token_offsets[code]:self.token_offsets[code + 1]] for code in codes] or [[]]
+        )).astype(np.int64)
+        # Numbers tell otherwise identical names apart ("Site 3" vs "Site 13"), so they must match exactly
+        numbers = NUMBER_PATTERN.findall(key)
+        best_id, best_ratio = -1, self.cutoff
+        for site_id in candidates:
+            if NUMBER_PATTERN.findall(self.keys[site_id]) != numbers:
+                continue
+            matcher = difflib.SequenceMatcher(None, key, self.keys[site_id])
+            if matcher.real_quick_ratio() < best_ratio or matcher.quick_ratio() < best_ratio:
+                continue
+            ratio = matcher.ratio()
+            if ratio > best_ratio or (ratio == best_ratio and best_id < 0):
+                best_id, best_ratio = site_id, ratio
+        return best_id
+
+    def resolve(self, names):
+        names = pd.Series(names)
+        positions = self.exact_ids.index.get_indexer(names)
+        ids = np.full(len(names), -1, dtype=np.int64)
+        exact = positions >= 0
+        ids[exact] = self.exact_ids.to_numpy()[positions[exact]]
+        if exact.all():
+            return ids
+
+        # Each other distinct string is matched once and remembered for later joins on this catalog
+        codes, uniques = pd.factorize(names[~exact])
+        with self._lock:
+            pending = [name for name in uniques if name not in self._resolved]
+            for name, key in zip(pending, normalize_names(pending)):
+                self._resolved[name] = self._match(key)
+            matched = np.array([self._resolved[name] for name in uniques], dtype=np.int64)
+        ids[~exact] = np.append(matched, -1)[codes]
+        return ids
+
+    def aggregate(self, site_ids, values):
+        # Sums values per site id; ids without any value come back as NaN
+        site_ids = np.asarray(site_ids)
+        values = np.asarray(values, dtype=float)
+        matched = (site_ids >= 0) & ~np.isnan(values)
+        totals = np.bincount(site_ids[matched], weights=values[matched], minlength=len(self))
+        counts = np.bincount(site_ids[matched], minlength=len(self))
+        return np.where(counts > 0, totals, np.nan), counts
+
+    def gather(self, site_ids, values, fill_value=np.nan):
+        # Aligns per-id values with rows that carry the given ids
+        values = np.asarray(values)
+        site_ids = np.asarray(site_ids)
+        out = np.full(len(site_ids), fill_value, dtype=np.result_type(values.dtype, type(fill_value)))
+        matched = site_ids >= 0
+        out[matched] = values[site_ids[matched]]
+        return out
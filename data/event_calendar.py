@@ -0,0 +1,177 @@
+import numpy as np
+import pandas as pd
+
+from utils.helpers import dataframe_fingerprint
+
+EVENT_COLUMNS = ['name', 'state', 'start', 'end', 'expected_visitors', 'source']
+
+
+def _day_number(dates):
+    return pd.to_datetime(pd.Series(dates)).to_numpy(dtype='datetime64[D]').astype(np.int64)
+
+
+def _day_of(date):
+    return (pd.Timestamp(date).normalize() - pd.Timestamp(0)).days
+
+
+class EventCalendar:
+    def __init__(self, df_festivals=None, df_events=None, df_tourism=None, start_date=None, horizon_days=730):
+        self.start_date = pd.Timestamp(start_date if start_date is not None else pd.Timestamp.today()).normalize()
+        self.first_day = _day_of(self.start_date)
+        self.n_days = horizon_days
+        self.version = self.fingerprint(df_festivals, df_events, df_tourism, self.start_date, horizon_days)
+
+        events = pd.concat([self._festival_events(df_festivals), self._cultural_events(df_events)],
+                           ignore_index=True)
+        tourism_states = [] if df_tourism is None or 'state' not in df_tourism else df_tourism['state'].dropna()
+        self.states = pd.Index(sorted(set(events['state']).union(tourism_states)))
+
+        state_codes = self.states.get_indexer(events['state'])
+        order = np.lexsort((events['start'].to_numpy(), state_codes))
+        self.events = events.iloc[order].reset_index(drop=True)
+        self.state_codes = state_codes[order]
+        self.offsets = np.searchsorted(self.state_codes, np.arange(len(self.states) + 1))
+        self.state_lookup = {state: code for code, state in enumerate(self.states)}
+        self.names = self.events['name'].to_numpy()
+
+        # Within each state, starts are sorted and the running maximum of ends is non-decreasing,
+        # so any window query is two binary searches plus a scan over the matches
+        self.starts = self.events['start'].to_numpy(dtype=np.int64)
+        self.ends = self.events['end'].to_numpy(dtype=np.int64)
+        self.max_ends = (pd.Series(self.ends).groupby(self.state_codes).cummax().to_numpy(dtype=np.int64)
+                         if len(self.ends) else self.ends)
+        self.events['start_date'] = pd.to_datetime(self.starts, unit='D')
+        self.events['end_date'] = pd.to_datetime(self.ends, unit='D')
+
+        self.attendance = self._daily_attendance()
+        self.crowding = self._daily_crowding(df_tourism)
+
+    @staticmethod
+    def fingerprint(df_festivals=None, df_events=None, df_tourism=None, start_date=None, horizon_days=730):
+        version = f'{pd.Timestamp(start_date if start_date is not None else pd.Timestamp.today()).date()}:{horizon_days}'
+        if df_festivals is not None:
+            version += dataframe_fingerprint(df_festivals, ['festival', 'state', 'month', 'duration_days',
+                                                            'expected_visitors'])
+        if df_events is not None:
+            version += dataframe_fingerprint(df_events, ['event_name', 'state', 'start_date', 'end_date',
+                                                         'expected_attendance'])
+        if df_tourism is not None:
+            version += dataframe_fingerprint(df_tourism, ['state', 'date', 'crowding_index'])
+        return version
+
+    def _festival_events(self, df_festivals):
+        if df_festivals is None or df_festivals.empty:
+            return pd.DataFrame(columns=EVENT_COLUMNS)
+
+        # Festivals only carry a month, so each one is centred on mid-month and repeated for every
+        # year the calendar covers
+        years = range(self.start_date.year, (self.start_date + pd.Timedelta(days=self.n_days)).year + 1)
+        festivals = df_festivals.dropna(subset=['state', 'month'])
+        duration = festivals['duration_days'].fillna(1).clip(lower=1).astype(int).to_numpy()
+        frames = []
+        for year in years:
+            middle = _day_number(pd.to_datetime(pd.DataFrame({'year': year, 'month': festivals['month'].astype(int),
+                                                              'day': 15})))
+            start = middle - duration // 2
+            frames.append(pd.DataFrame({
+                'name': festivals['festival'].to_numpy(),
+                'state': festivals['state'].to_numpy(),
+                'start': start,
+                'end': start + duration - 1,
+                'expected_visitors': festivals['expected_visitors'].fillna(0).to_numpy(dtype=float),
+                'source': 'festival'
+            }))
+        return pd.concat(frames, ignore_index=True)
+
+    def _cultural_events(self, df_events):
+        if df_events is None or df_events.empty:
+            return pd.DataFrame(columns=EVENT_COLUMNS)
+
+        events = df_events.dropna(subset=['state', 'start_date'])
+        start = _day_number(events['start_date'])
+        end = _day_number(events['end_date'].fillna(events['start_date']))
+        return pd.DataFrame({
+            'name': events['event_name'].to_numpy(),
+            'state': events['state'].to_numpy(),
+            'start': start,
+            'end': np.maximum(end, start),
+            'expected_visitors': events['expected_attendance'].fillna(0).to_numpy(dtype=float),
+            'source': 'event'
+        })
+
+    def _daily_attendance(self):
+        # Difference array over (state, day): each event adds its daily visitors on every day it runs
+        attendance = np.zeros((len(self.states), self.n_days + 1))
+        start = self.starts - self.first_day
+        end = self.ends - self.first_day + 1
+        visible = (end > 0) & (start < self.n_days)
+        duration = (self.ends - self.starts + 1)[visible]
+        daily = self.events['expected_visitors'].to_numpy(dtype=float)[visible] / duration
+
+        np.add.at(attendance, (self.state_codes[visible], np.clip(start[visible], 0, self.n_days)), daily)
+        np.add.at(attendance, (self.state_codes[visible], np.clip(end[visible], 0, self.n_days)), -daily)
+        return np.cumsum(attendance, axis=1)[:, :self.n_days]
+
+    def _daily_crowding(self, df_tourism):
+        # Expected crowding is the state's average for that month of the year, nudged up by event attendance
+        months = pd.DatetimeIndex(self.dates()).month.to_numpy()
+        monthly = np.full((len(self.states), 12), 0.5)
+        self.national_crowding = np.full(self.n_days, 0.5)
+        if df_tourism is not None and {'state', 'date', 'crowding_index'}.issubset(df_tourism.columns):
+            month_of_year = pd.to_datetime(df_tourism['date']).dt.month
+            national = df_tourism.groupby(month_of_year)['crowding_index'].mean().reindex(range(1, 13))
+            by_state = df_tourism.groupby([df_tourism['state'], month_of_year])['crowding_index'].mean().unstack()
+            by_state = by_state.reindex(index=self.states, columns=range(1, 13))
+            monthly = by_state.fillna(national).fillna(0.5).to_numpy()
+            self.national_crowding = national.fillna(0.5).to_numpy()[months - 1]
+
+        peak = self.attendance.max()
+        pressure = self.attendance / peak if peak > 0 else self.attendance
+        return np.clip(monthly[:, months - 1] + 0.3 * pressure, 0, 1)
+
+    def dates(self):
+        return pd.date_range(self.start_date, periods=self.n_days, freq='D')
+
+    def day_index(self, date):
+        return _day_of(date) - self.first_day
+
+    def covers(self, date, n_days=1):
+        first = self.day_index(date)
+        return first >= 0 and first + n_days <= self.n_days
+
+    def positions_between(self, state, first_day, last_day):
+        code = self.state_lookup.get(state)
+        if code is None:
+            return np.empty(0, dtype=np.int64)
+
+        lo, hi = self.offsets[code], self.offsets[code + 1]
+        stop = lo + np.searchsorted(self.starts[lo:hi], last_day, side='right')
+        begin = lo + np.searchsorted(self.max_ends[lo:stop], first_day, side='left')
+        return begin + np.flatnonzero(self.ends[begin:stop] >= first_day)
+
+    def events_between(self, state, start, end):
+        return self.events.iloc[self.positions_between(state, _day_of(start), _day_of(end))]
+
+    def events_on(self, state, date):
+        return self.events_between(state, date, date)
+
+    def lookup(self, states, day_indices):
+        # Vectorized daily lookup for any (state, day) grid; states without data fall back to the national
+        # crowding profile. Days outside the horizon have no data, so they are rejected rather than scored
+        # as empty
+        # Itinerary-sized state lists resolve faster through the dict than by building an Index per call
+        states = np.asarray(states)
+        codes = np.fromiter((self.state_lookup.get(state, -1) for state in states.ravel()), dtype=np.int64,
+                            count=states.size).reshape(states.shape)
+        days = np.asarray(day_indices)
+        if days.size and (days.min() < 0 or days.max() >= self.n_days):
+            raise ValueError(f"Days {days.min()} to {days.max()} are outside the calendar horizon "
+                             f"({self.start_date:%Y-%m-%d} + {self.n_days} days)")
+        known = codes >= 0
+        codes = np.where(known, codes, 0)
+
+        if len(self.states) == 0:
+            return np.zeros(np.shape(known)), np.broadcast_to(self.national_crowding[days], np.shape(known)).copy()
+        attendance = np.where(known, self.attendance[codes, days], 0.0)
+        crowding = np.where(known, self.crowding[codes, days], self.national_crowding[days])
+        return attendance, crowding
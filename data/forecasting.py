@@ -0,0 +1,142 @@
+import numpy as np
+import pandas as pd
+
+from utils.helpers import dataframe_fingerprint
+
+
+class TourismForecaster:
+    def __init__(self, season_length=12, ridge=1e-6, log_transform=True):
+        self.season_length = season_length
+        self.ridge = ridge
+        self.log_transform = log_transform
+        self.sites = None
+        self.periods = None
+        self.coef_ = None
+
+    @staticmethod
+    def fingerprint(matrix):
+        return dataframe_fingerprint(matrix.reset_index())
+
+    def _design(self, periods):
+        t = (periods.asi8 - self.origin_) / self.season_length
+        season = np.asarray(periods.month) - 1
+        X = np.zeros((len(periods), 2 + self.season_length - 1))
+        X[:, 0] = 1.0
+        X[:, 1] = t
+        rows = np.flatnonzero(season > 0)
+        X[rows, 1 + season[rows]] = 1.0
+        return X
+
+    def _transform(self, values):
+        values = np.asarray(values, dtype=float)
+        return np.log1p(np.clip(values, 0, None)) if self.log_transform else values
+
+    def _inverse(self, values):
+        return np.expm1(values) if self.log_transform else values
+
+    def fit(self, matrix):
+        self.sites = matrix.index
+        self.periods = pd.PeriodIndex(matrix.columns, freq='M')
+        self.origin_ = self.periods.asi8[0]
+
+        X = self._design(self.periods)
+        Y = self._transform(matrix.to_numpy())
+        W = (~np.isnan(Y)).astype(float)
+        Y = np.nan_to_num(Y)
+
+        n_params = X.shape[1]
+        outer = (X[:, :, None] * X[:, None, :]).reshape(len(X), -1)
+
+        # Sufficient statistics per site, kept so that a new month is a rank-one update
+        self.xtwx_ = (W @ outer).reshape(len(Y), n_params, n_params)
+        self.xtwy_ = (W * Y) @ X
+        self.ytwy_ = (W * Y * Y).sum(axis=1)
+        self.n_obs_ = W.sum(axis=1)
+
+        self._solve()
+        return self
+
+    def _solve(self):
+        n_params = self.xtwx_.shape[1]
+        penalty = self.ridge * np.eye(n_params)
+        self.coef_ = np.linalg.solve(self.xtwx_ + penalty, self.xtwy_[:, :, None])[:, :, 0]
+
+        sse = (
+            self.ytwy_
+            - 2 * np.einsum('sp,sp->s', self.coef_, self.xtwy_)
+            + np.einsum('sp,spq,sq->s', self.coef_, self.xtwx_, self.coef_)
+        )
+        dof = np.maximum(self.n_obs_ - n_params, 1)
+        self.sigma_ = np.sqrt(np.clip(sse, 0, None) / dof)
+
+    def update(self, values, period):
+        # Each month may only be added once; feeding it again would count it twice in the sums
+        period = pd.Period(period, freq='M')
+        if period in self.periods:
+            raise ValueError(f"Period {period} is already part of the model")
+        values = pd.Series(values).reindex(self.sites)
+
+        x = self._design(pd.PeriodIndex([period]))[0]
+        y = self._transform(values.to_numpy())
+        w = (~np.isnan(y)).astype(float)
+        y = np.nan_to_num(y)
+
+        self.xtwx_ += w[:, None, None] * np.outer(x, x)[None, :, :]
+        self.xtwy_ += (w * y)[:, None] * x[None, :]
+        self.ytwy_ += w * y * y
+        self.n_obs_ += w
+
+        self.periods = self.periods.append(pd.PeriodIndex([period])).sort_values()
+        self._solve()
+        return self
+
+    def predict_matrix(self, horizon=12, z=1.96):
+        future = pd.period_range(self.periods[-1] + 1, periods=horizon, freq='M')
+        fitted = self.coef_ @ self._design(future).T
+
+        spread = z * self.sigma_[:, None]
+        forecast = pd.DataFrame(self._inverse(fitted), index=self.sites, columns=future)
+        lower = pd.DataFrame(self._inverse(fitted - spread), index=self.sites, columns=future)
+        upper = pd.DataFrame(self._inverse(fitted + spread), index=self.sites, columns=future)
+        return forecast.clip(lower=0), lower.clip(lower=0), upper
+
+    def forecast(self, horizon=12, z=1.96):
+        forecast, lower, upper = self.predict_matrix(horizon, z)
+
+        result = forecast.stack().rename('forecast').to_frame()
+        result['lower'] = lower.stack()
+        result['upper'] = upper.stack()
+        result.index.names = ['site', 'period']
+        result = result.reset_index()
+        result['date'] = result['period'].dt.to_timestamp(how='end').dt.normalize()
+
+        return result[['site', 'date', 'forecast', 'lower', 'upper']]
+
+    def backtest(self, matrix, horizon=12, n_origins=3, step=None):
+        # Rolling origin: the model is refit on an expanding window ending at each origin and scored on
+        # the following horizon months; errors are averaged over all origins
+        step = step or horizon
+        min_train = self.season_length + 2
+        origins = [matrix.shape[1] - horizon - k * step for k in range(n_origins)]
+        origins = [origin for origin in origins if origin >= min_train] or [matrix.shape[1] - horizon]
+
+        abs_errors, pct_errors = [], []
+        for origin in origins:
+            train, test = matrix.iloc[:, :origin], matrix.iloc[:, origin:origin + horizon]
+            model = TourismForecaster(self.season_length, self.ridge, self.log_transform).fit(train)
+            forecast, _, _ = model.predict_matrix(horizon)
+
+            actual = test.to_numpy(dtype=float)
+            predicted = forecast.to_numpy()
+            with np.errstate(divide='ignore', invalid='ignore'):
+                ape = np.abs(predicted - actual) / np.abs(actual)
+            ape[~np.isfinite(ape)] = np.nan
+            abs_errors.append(np.abs(predicted - actual))
+            pct_errors.append(ape)
+
+        return pd.DataFrame({
+            'site': matrix.index,
+            'mape': np.nanmean(np.concatenate(pct_errors, axis=1), axis=1),
+            'mae': np.nanmean(np.concatenate(abs_errors, axis=1), axis=1),
+            'n_origins': len(origins)
+        })
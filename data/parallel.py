@@ -0,0 +1,89 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from multiprocessing import shared_memory
+
+import numpy as np
+
+
+def _attach(specs):
+    blocks = []
+    arrays = {}
+    for name, (shm_name, shape, dtype) in specs.items():
+        shm = shared_memory.SharedMemory(name=shm_name)
+        blocks.append(shm)
+        arrays[name] = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+    return blocks, arrays
+
+
+def _run_chunk(specs, func, tasks):
+    blocks, arrays = _attach(specs)
+    try:
+        return [func(arrays, task) for task in tasks]
+    finally:
+        # Drop the views before closing, otherwise the buffers are still exported
+        del arrays
+        for shm in blocks:
+            shm.close()
+
+
+def _apply_group(func, arrays, task):
+    group, start, stop = task
+    part = {name: values[start:stop] for name, values in arrays.items()}
+    return func(part, group)
+
+
+class ParallelExecutor:
+    def __init__(self, n_workers=None, min_rows=200000, chunks_per_worker=4, mp_context=None):
+        self.n_workers = n_workers or os.cpu_count() or 1
+        self.min_rows = min_rows
+        self.chunks_per_worker = chunks_per_worker
+        self.mp_context = mp_context
+
+    def run(self, func, arrays, tasks, work_size=None):
+        tasks = list(tasks)
+        arrays = {name: np.ascontiguousarray(values) for name, values in arrays.items()}
+        for name, values in arrays.items():
+            if values.dtype == object:
+                raise TypeError(f"Column '{name}' has object dtype; encode it numerically before sharing")
+
+        if work_size is None:
+            work_size = max((len(values) for values in arrays.values()), default=0)
+        if self.n_workers <= 1 or len(tasks) <= 1 or work_size < self.min_rows:
+            return [func(arrays, task) for task in tasks]
+
+        blocks = []
+        try:
+            specs = {}
+            for name, values in arrays.items():
+                shm = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+                blocks.append(shm)
+                np.ndarray(values.shape, dtype=values.dtype, buffer=shm.buf)[...] = values
+                specs[name] = (shm.name, values.shape, values.dtype.str)
+
+            n_chunks = min(len(tasks), self.n_workers * self.chunks_per_worker)
+            chunks = [list(chunk) for chunk in np.array_split(np.arange(len(tasks)), n_chunks)]
+
+            with ProcessPoolExecutor(max_workers=self.n_workers, mp_context=self.mp_context) as pool:
+                futures = [pool.submit(_run_chunk, specs, func, [tasks[i] for i in chunk]) for chunk in chunks]
+                # Results are collected in submission order so the merge is deterministic
+                results = []
+                for future in futures:
+                    results.extend(future.result())
+            return results
+        finally:
+            for shm in blocks:
+                shm.close()
+                shm.unlink()
+
+    def map_groups(self, func, arrays, keys, n_groups=None):
+        keys = np.asarray(keys)
+        if n_groups is None:
+            n_groups = int(keys.max()) + 1 if len(keys) else 0
+
+        order = np.argsort(keys, kind='stable')
+        bounds = np.searchsorted(keys[order], np.arange(n_groups + 1))
+        sorted_arrays = {name: np.asarray(values)[order] for name, values in arrays.items()}
+
+        tasks = [(group, bounds[group], bounds[group + 1]) for group in range(n_groups)]
+        return self.run(partial(_apply_group, func), sorted_arrays, tasks)
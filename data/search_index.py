@@ -0,0 +1,275 @@
+import difflib
+import re
+import threading
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+MONTH_NAMES = ['', 'January', 'February', 'March', 'April', 'May', 'June', 'July', 'August', 'September',
+               'October', 'November', 'December']
+
+# Dataset -> (title column, body columns); columns missing from a frame are skipped
+SEARCH_FIELDS = {
+    'art_forms': ('art_form', ['category', 'state', 'risk_level', 'description']),
+    'sites': ('site_name', ['type', 'state', 'unesco_status', 'conservation_status', 'description']),
+    'festivals': ('festival', ['state', 'month_name', 'description']),
+    'tourism': ('site', ['state'])
+}
+
+
+def clean_text(texts):
+    texts = pd.Series(texts, dtype=object).fillna('').astype(str)
+    return (
+        texts.str.normalize('NFKD').str.encode('ascii', 'ignore').str.decode('ascii').str.lower()
+        .str.replace(r'[^a-z0-9]+', ' ', regex=True).str.strip()
+    )
+
+
+def tokenize(text):
+    # Same normalization as clean_text for a single query string, without the pandas overhead
+    text = unicodedata.normalize('NFKD', str(text)).encode('ascii', 'ignore').decode('ascii').lower()
+    return re.sub(r'[^a-z0-9]+', ' ', text).split()
+
+
+def _split_tokens(texts):
+    # Joining and splitting once is much faster than a Python-level split per document
+    cleaned = clean_text(texts)
+    lengths = np.where(cleaned.to_numpy() != '', cleaned.str.count(' ').to_numpy(dtype=np.int64) + 1, 0)
+    return np.array(' '.join(cleaned[lengths > 0]).split(' ') if lengths.any() else [], dtype=object), lengths
+
+
+class _Segment:
+    def __init__(self, term_ids, docs, tf):
+        order = np.lexsort((docs, term_ids))
+        self.term_ids = term_ids[order]
+        self.docs = docs[order]
+        self.tf = tf[order]
+
+    def postings(self, term_id):
+        start, stop = np.searchsorted(self.term_ids, [term_id, term_id + 1])
+        return self.docs[start:stop], self.tf[start:stop]
+
+
+class SearchIndex:
+    def __init__(self, k1=1.2, b=0.75, title_weight=2.0, max_segments=8, max_expansions=50):
+        self.k1 = k1
+        self.b = b
+        self.title_weight = title_weight
+        self.max_segments = max_segments
+        self.max_expansions = max_expansions
+
+        self.terms = {}
+        self.vocabulary = []
+        self.df = np.zeros(0, dtype=np.int64)
+        self._sorted_terms = None
+        self._fuzzy_cache = {}
+
+        self.segments = []
+        self.sources = []
+        self.doc_source = np.zeros(0, dtype=np.int16)
+        self.doc_ref = np.zeros(0, dtype=np.int64)
+        self.doc_title = np.zeros(0, dtype=object)
+        self.doc_length = np.zeros(0, dtype=np.float32)
+        self.alive = np.zeros(0, dtype=bool)
+        self.doc_keys = {}
+        self.doc_hashes = {}
+        # Shared across sessions by the app: updates and searches run one at a time
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return int(self.alive.sum())
+
+    def _term_ids(self, tokens):
+        codes, uniques = pd.factorize(tokens)
+        ids = np.empty(len(uniques), dtype=np.int64)
+        for code, token in enumerate(uniques):
+            term_id = self.terms.get(token)
+            if term_id is None:
+                term_id = self.terms[token] = len(self.vocabulary)
+                self.vocabulary.append(token)
+            ids[code] = term_id
+        if len(self.vocabulary) > len(self.df):
+            self.df = np.concatenate([self.df, np.zeros(len(self.vocabulary) - len(self.df), dtype=np.int64)])
+            self._sorted_terms = None
+            self._fuzzy_cache = {}
+        return ids[codes]
+
+    def add(self, source, refs, titles, bodies=None):
+        # Adding a (source, ref) that is already indexed replaces the old document
+        refs = np.asarray(refs, dtype=np.int64)
+        self.remove(source, refs)
+        if source not in self.sources:
+            self.sources.append(source)
+
+        first = len(self.doc_ref)
+        n_docs = len(refs)
+        title_tokens, title_lengths = _split_tokens(titles)
+        body_tokens, body_lengths = _split_tokens(bodies if bodies is not None else [''] * n_docs)
+
+        # Title terms count more than body terms towards a document's term frequency
+        tokens = np.concatenate([title_tokens, body_tokens])
+        docs = np.concatenate([np.repeat(np.arange(n_docs), title_lengths),
+                               np.repeat(np.arange(n_docs), body_lengths)])
+        weights = np.concatenate([np.full(len(title_tokens), self.title_weight), np.ones(len(body_tokens))])
+
+        if len(tokens):
+            term_ids = self._term_ids(tokens)
+            pairs, inverse = np.unique(term_ids * n_docs + docs, return_inverse=True)
+            tf = np.bincount(inverse.reshape(-1), weights=weights).astype(np.float32)
+            pair_terms, pair_docs = np.divmod(pairs, n_docs)
+            self.df += np.bincount(pair_terms, minlength=len(self.df))
+            self.segments.append(_Segment(pair_terms, pair_docs + first, tf))
+
+        source_code = self.sources.index(source)
+        self.doc_source = np.concatenate([self.doc_source, np.full(n_docs, source_code, dtype=np.int16)])
+        self.doc_ref = np.concatenate([self.doc_ref, refs])
+        self.doc_title = np.concatenate([self.doc_title, pd.Series(titles, dtype=object).fillna('').to_numpy()])
+        self.doc_length = np.concatenate([self.doc_length, (self.title_weight * title_lengths + body_lengths)
+                                          .astype(np.float32)])
+        self.alive = np.concatenate([self.alive, np.ones(n_docs, dtype=bool)])
+        self.doc_keys.update(zip(zip([source] * n_docs, refs.tolist()), range(first, first + n_docs)))
+
+        if len(self.segments) > self.max_segments:
+            self.merge()
+
+    def remove(self, source, refs):
+        keys = [(source, ref) for ref in np.asarray(refs).tolist()]
+        docs = [self.doc_keys.pop(key) for key in keys if key in self.doc_keys]
+        if docs:
+            # Removed documents stay in their segments until the next merge but never match again
+            self.alive[docs] = False
+
+    def update(self, source, refs, titles, bodies=None):
+        # Only documents whose text changed since the last update of this source are re-added, and refs
+        # that are gone are tombstoned, so reloading mostly unchanged data touches few postings
+        refs = np.asarray(refs, dtype=np.int64)
+        titles = pd.Series(titles, dtype=object).fillna('').to_numpy()
+        bodies = None if bodies is None else pd.Series(bodies, dtype=object).fillna('').to_numpy()
+        hashes = pd.util.hash_pandas_object(
+            pd.DataFrame({'title': titles, 'body': bodies if bodies is not None else ''}), index=False).to_numpy()
+
+        with self._lock:
+            previous = self.doc_hashes.get(source, pd.Series([], dtype=np.uint64))
+            positions = previous.index.get_indexer(refs)
+            changed = (positions < 0) | (np.append(previous.to_numpy(), 0)[positions] != hashes)
+            self.remove(source, previous.index[~previous.index.isin(refs)])
+            if changed.any():
+                self.add(source, refs[changed], titles[changed], None if bodies is None else bodies[changed])
+            self.doc_hashes[source] = pd.Series(hashes, index=refs)
+            return int(changed.sum())
+
+    def merge(self):
+        if not self.segments:
+            return
+        term_ids = np.concatenate([segment.term_ids for segment in self.segments])
+        docs = np.concatenate([segment.docs for segment in self.segments])
+        tf = np.concatenate([segment.tf for segment in self.segments])
+
+        live = self.alive[docs]
+        self.df = np.bincount(term_ids[live], minlength=len(self.vocabulary))
+        self.segments = [_Segment(term_ids[live], docs[live], tf[live])]
+
+    def _sorted_vocabulary(self):
+        if self._sorted_terms is None:
+            order = np.argsort(np.array(self.vocabulary, dtype=object), kind='stable')
+            self._sorted_terms = (np.array(self.vocabulary, dtype=object)[order], order)
+        return self._sorted_terms
+
+    def _prefix_terms(self, prefix):
+        terms, order = self._sorted_vocabulary()
+        start, stop = np.searchsorted(terms, [prefix, prefix + '\uffff'])
+        matches = order[start:stop]
+        if len(matches) > self.max_expansions:
+            matches = matches[np.argsort(-self.df[matches], kind='stable')[:self.max_expansions]]
+        return matches
+
+    def _fuzzy_terms(self, token, cutoff=0.75, limit=5):
+        if token not in self._fuzzy_cache:
+            # Only terms with the same first letter and a similar length are compared
+            terms, order = self._sorted_vocabulary()
+            start, stop = np.searchsorted(terms, [token[0], token[0] + '\uffff'])
+            block = [term for term in terms[start:stop] if abs(len(term) - len(token)) <= 2]
+            matches = difflib.get_close_matches(token, block, n=limit, cutoff=cutoff)
+            self._fuzzy_cache[token] = np.array([self.terms[term] for term in matches], dtype=np.int64)
+        return self._fuzzy_cache[token]
+
+    def _expand(self, token, prefix):
+        if token in self.terms and not prefix:
+            return np.array([self.terms[token]]), 1.0
+        if prefix:
+            matches = self._prefix_terms(token)
+            if len(matches):
+                return matches, 0.9
+        if len(token) >= 3:
+            return self._fuzzy_terms(token), 0.7
+        return np.zeros(0, dtype=np.int64), 0.0
+
+    def search(self, query, k=10, sources=None, prefix=True):
+        with self._lock:
+            return self._search(query, k, sources, prefix)
+
+    def _search(self, query, k, sources, prefix):
+        tokens = tokenize(query)
+        columns = ['source', 'ref', 'title', 'score']
+        if not tokens or not len(self.doc_ref):
+            return pd.DataFrame(columns=columns)
+
+        n_docs = len(self.doc_ref)
+        live = self.alive.sum()
+        avg_length = self.doc_length[self.alive].mean() if live else 1.0
+        scores = np.zeros(n_docs, dtype=np.float32)
+        matched = np.zeros(n_docs, dtype=np.int8)
+
+        # Every query token must match; the last one is treated as a prefix while the user is typing
+        for position, token in enumerate(tokens):
+            term_ids, boost = self._expand(token, prefix and position == len(tokens) - 1)
+            token_scores = np.zeros(n_docs, dtype=np.float32)
+            for term_id in term_ids:
+                idf = np.log1p((live - self.df[term_id] + 0.5) / (self.df[term_id] + 0.5))
+                for segment in self.segments:
+                    docs, tf = segment.postings(term_id)
+                    norm = self.k1 * (1 - self.b + self.b * self.doc_length[docs] / avg_length)
+                    token_scores[docs] += boost * idf * tf * (self.k1 + 1) / (tf + norm)
+            scores += token_scores
+            matched += token_scores > 0
+
+        candidates = np.flatnonzero((matched == len(tokens)) & self.alive)
+        if sources is not None:
+            codes = [self.sources.index(source) for source in sources if source in self.sources]
+            candidates = candidates[np.isin(self.doc_source[candidates], codes)]
+        if len(candidates) > k:
+            candidates = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+        candidates = candidates[np.lexsort((candidates, -scores[candidates]))]
+
+        return pd.DataFrame({
+            'source': np.array(self.sources, dtype=object)[self.doc_source[candidates]],
+            'ref': self.doc_ref[candidates],
+            'title': self.doc_title[candidates],
+            'score': scores[candidates]
+        }, columns=columns)
+
+
+def build_search_index(df_arts=None, df_sites=None, df_festivals=None, df_tourism=None, index=None):
+    index = index if index is not None else SearchIndex()
+    frames = {'art_forms': df_arts, 'sites': df_sites, 'festivals': df_festivals, 'tourism': df_tourism}
+    for source, df in frames.items():
+        if df is None or df.empty or SEARCH_FIELDS[source][0] not in df:
+            continue
+        title_col, body_cols = SEARCH_FIELDS[source]
+        if source == 'festivals' and 'month' in df:
+            df = df.assign(month_name=df['month'].map(
+                lambda month: MONTH_NAMES[int(month)] if pd.notna(month) else ''))
+
+        # Refs are row positions in the original frame; tourism repeats each site monthly, so it is indexed once
+        positions = np.arange(len(df))
+        if source == 'tourism':
+            positions = np.flatnonzero(~df[title_col].duplicated().to_numpy())
+            df = df.iloc[positions]
+
+        bodies = None
+        for column in [column for column in body_cols if column in df]:
+            values = df[column].fillna('').astype(str)
+            bodies = values if bodies is None else bodies + ' ' + values
+        index.update(source, positions, df[title_col], bodies)
+    return index
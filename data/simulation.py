@@ -0,0 +1,155 @@
+import numpy as np
+import pandas as pd
+
+from data.parallel import ParallelExecutor
+from data.spatial_index import SpatialIndex
+
+DEFAULT_POLICY = {
+    'crowding_threshold': 0.85,
+    'target_utilization': 0.6,
+    'shift_share': 0.3,
+    'uptake_mean': 0.5,
+    'uptake_concentration': 8.0,
+    'cancellation_rate': 0.1,
+    'radius_km': 300,
+    'max_neighbours': 5,
+    'demand_volatility': 0.15
+}
+
+
+def _beta(rng, mean, concentration, size):
+    mean = min(max(mean, 1e-6), 1 - 1e-6)
+    return rng.beta(mean * concentration, (1 - mean) * concentration, size)
+
+
+def _simulate_chunk(arrays, task):
+    seed, n_scenarios, policy = task
+    rng = np.random.default_rng(seed)
+
+    capacity = arrays['capacity']
+    baseline = arrays['baseline']
+    season = arrays['season']
+    neighbours = arrays['neighbours']
+    revenue_per_visitor = arrays['revenue_per_visitor']
+    n_sites, n_months = len(capacity), len(season)
+
+    volatility = policy['demand_volatility']
+    noise = rng.standard_normal((n_scenarios, n_months, n_sites), dtype=np.float32)
+    noise = np.exp(noise * np.float32(volatility) - np.float32(0.5 * volatility ** 2))
+    demand = baseline[None, None, :] * season[None, :, None] * noise
+    uptake = _beta(rng, policy['uptake_mean'], policy['uptake_concentration'], n_scenarios)[:, None, None]
+    cancelled = _beta(rng, policy['cancellation_rate'], policy['uptake_concentration'], n_scenarios)[:, None, None]
+
+    # Overcrowded sites try to bring demand back to the target level by promoting under-utilized neighbours
+    overcrowded = demand > policy['crowding_threshold'] * capacity
+    excess = np.where(overcrowded, demand - policy['target_utilization'] * capacity, 0.0)
+    offered = excess * policy['shift_share'] * uptake
+
+    # Only overcrowded site-months take part in the redistribution, so work is gathered sparsely
+    source = np.flatnonzero(offered.ravel() > 0)
+    cell, site = np.divmod(source, n_sites)
+    valid = neighbours[site] >= 0
+    destination = cell[:, None] * n_sites + np.where(valid, neighbours[site], 0)
+
+    spare = np.clip(policy['target_utilization'] * capacity - demand, 0, None).ravel()
+    destination_spare = spare[destination] * valid
+    total_spare = destination_spare.sum(axis=1, keepdims=True)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        weights = np.where(total_spare > 0, destination_spare / total_spare, 0.0)
+    proposals = offered.ravel()[source][:, None] * weights
+
+    requested = np.bincount(destination.ravel(), weights=proposals.ravel(), minlength=demand.size)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        accepted = np.where(requested > 0, np.minimum(1.0, spare / requested), 0.0)
+
+    moved = proposals * accepted[destination]
+    moved_out = np.zeros(demand.size)
+    moved_out[source] = moved.sum(axis=1)
+    moved_out = moved_out.reshape(demand.shape)
+    arrived = np.bincount(destination.ravel(), weights=moved.ravel(), minlength=demand.size).reshape(demand.shape)
+
+    visitors = demand - moved_out + arrived * (1 - cancelled)
+
+    def metrics(load):
+        utilization = load / capacity
+        served = np.minimum(load, capacity)
+        return (
+            utilization.mean(axis=(1, 2)),
+            (utilization > policy['crowding_threshold']).mean(axis=(1, 2)),
+            utilization.max(axis=2).mean(axis=1),
+            (served * revenue_per_visitor).sum(axis=(1, 2)),
+            (load - served).sum(axis=(1, 2))
+        )
+
+    return np.column_stack(metrics(demand) + metrics(visitors) + (moved_out.sum(axis=(1, 2)),))
+
+
+class CrowdSimulator:
+    METRICS = ['mean_utilization', 'overcrowded_share', 'peak_utilization', 'revenue', 'turned_away']
+
+    def __init__(self, df_sites, df_tourism, executor=None, days_per_month=30):
+        self.executor = executor or ParallelExecutor()
+        self.sites = df_sites.reset_index(drop=True)
+
+        self.capacity = self.sites['visitor_capacity'].to_numpy(dtype=float) * days_per_month
+        self.baseline = self.capacity * self.sites['current_utilization'].to_numpy(dtype=float)
+
+        # Monthly crowding relative to the yearly average shapes demand across the simulated year
+        monthly_crowding = df_tourism.groupby(df_tourism['date'].dt.month)['crowding_index'].mean()
+        monthly_crowding = monthly_crowding.reindex(range(1, 13)).fillna(monthly_crowding.mean())
+        self.season = (monthly_crowding / monthly_crowding.mean()).to_numpy()
+
+        total_visitors = df_tourism['total_visitors'].sum()
+        self.revenue_per_visitor = df_tourism['revenue'].sum() / total_visitors if total_visitors else 0.0
+
+    def _neighbours(self, policy):
+        n_sites = len(self.sites)
+        under_utilized = np.flatnonzero(self.sites['current_utilization'].to_numpy() < policy['target_utilization'])
+        if len(under_utilized) == 0 or policy['max_neighbours'] <= 0:
+            return np.full((n_sites, 1), -1)
+
+        # Ask for one extra neighbour because an under-utilized site finds itself first
+        candidates = SpatialIndex(self.sites.iloc[under_utilized])
+        nearest, distances = candidates.query_knn_batch(self.sites['latitude'].to_numpy(dtype=float),
+                                                        self.sites['longitude'].to_numpy(dtype=float),
+                                                        policy['max_neighbours'] + 1)
+        nearest = under_utilized[nearest]
+        keep = (nearest != np.arange(n_sites)[:, None]) & (distances <= policy['radius_km'])
+
+        neighbours = np.full((n_sites, policy['max_neighbours']), -1)
+        rank = np.cumsum(keep, axis=1) - 1
+        rows, cols = np.nonzero(keep & (rank < policy['max_neighbours']))
+        neighbours[rows, rank[rows, cols]] = nearest[rows, cols]
+        return neighbours
+
+    def run(self, policy=None, n_scenarios=2000, seed=42, chunk_size=250):
+        policy = {**DEFAULT_POLICY, **(policy or {})}
+
+        arrays = {
+            'capacity': self.capacity,
+            'baseline': self.baseline,
+            'season': self.season,
+            'neighbours': self._neighbours(policy),
+            'revenue_per_visitor': np.full(len(self.capacity), self.revenue_per_visitor)
+        }
+
+        sizes = [min(chunk_size, n_scenarios - start) for start in range(0, n_scenarios, chunk_size)]
+        seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+        tasks = [(child, size, policy) for child, size in zip(seeds, sizes)]
+
+        results = self.executor.run(_simulate_chunk, arrays, tasks,
+                                    work_size=n_scenarios * len(self.season) * len(self.capacity))
+
+        columns = ([f'baseline_{name}' for name in self.METRICS] + [f'policy_{name}' for name in self.METRICS]
+                   + ['visitors_shifted'])
+        scenarios = pd.DataFrame(np.vstack(results), columns=columns)
+        scenarios['revenue_change'] = scenarios['policy_revenue'] - scenarios['baseline_revenue']
+        scenarios['overcrowded_change'] = scenarios['policy_overcrowded_share'] - scenarios['baseline_overcrowded_share']
+        scenarios.index.name = 'scenario'
+
+        return scenarios
+
+    def summarize(self, scenarios, percentiles=(0.05, 0.5, 0.95)):
+        columns = ['baseline_overcrowded_share', 'policy_overcrowded_share', 'overcrowded_change',
+                   'baseline_revenue', 'policy_revenue', 'revenue_change', 'visitors_shifted']
+        return scenarios[columns].quantile(list(percentiles)).T
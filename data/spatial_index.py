@@ -0,0 +1,177 @@
+import numpy as np
+import pandas as pd
+from sklearn.neighbors import BallTree
+
+from utils.helpers import EARTH_RADIUS_KM, dataframe_fingerprint
+
+
+class SpatialIndex:
+    def __init__(self, df, lat_col='latitude', lon_col='longitude'):
+        lat = df[lat_col].to_numpy(dtype=float)
+        lon = df[lon_col].to_numpy(dtype=float)
+        valid = ~(np.isnan(lat) | np.isnan(lon))
+
+        # Positions refer to rows of the indexed frame, so results can be used with df.iloc
+        self.positions = np.flatnonzero(valid)
+        self.lat = lat[valid]
+        self.lon = lon[valid]
+        self.tree = BallTree(np.radians(np.column_stack([self.lat, self.lon])), metric='haversine')
+
+        self.lat_order = np.argsort(self.lat, kind='stable')
+        self.sorted_lat = self.lat[self.lat_order]
+
+    def __len__(self):
+        return len(self.positions)
+
+    def _points(self, lat, lon):
+        return np.radians(np.column_stack([np.atleast_1d(lat), np.atleast_1d(lon)]).astype(float))
+
+    def query_radius(self, lat, lon, radius_km, sort=True):
+        positions, distances = self.query_radius_batch([lat], [lon], radius_km, sort)
+        return positions[0], distances[0]
+
+    def query_radius_batch(self, lats, lons, radius_km, sort=True):
+        ids, distances = self.tree.query_radius(self._points(lats, lons), r=radius_km / EARTH_RADIUS_KM,
+                                                return_distance=True, sort_results=sort)
+        return [self.positions[i] for i in ids], [d * EARTH_RADIUS_KM for d in distances]
+
+    def query_knn(self, lat, lon, k=5):
+        positions, distances = self.query_knn_batch([lat], [lon], k)
+        return positions[0], distances[0]
+
+    def query_knn_batch(self, lats, lons, k=5):
+        k = min(k, len(self.positions))
+        if k == 0:
+            n_queries = len(np.atleast_1d(lats))
+            return np.empty((n_queries, 0), dtype=np.int64), np.empty((n_queries, 0))
+        distances, ids = self.tree.query(self._points(lats, lons), k=k)
+        return self.positions[ids], distances * EARTH_RADIUS_KM
+
+    def query_bbox(self, south, west, north, east):
+        start = np.searchsorted(self.sorted_lat, south, side='left')
+        stop = np.searchsorted(self.sorted_lat, north, side='right')
+        candidates = self.lat_order[start:stop]
+        lon = self.lon[candidates]
+        if west <= east:
+            inside = (lon >= west) & (lon <= east)
+        else:
+            # Box crosses the antimeridian
+            inside = (lon >= west) | (lon <= east)
+        return np.sort(self.positions[candidates[inside]])
+
+
+class HeritageGeoIndex:
+    def __init__(self, df_sites, df_arts):
+        self.version = self.fingerprint(df_sites, df_arts)
+        self.sites = SpatialIndex(df_sites)
+        self.arts = SpatialIndex(df_arts)
+
+    @staticmethod
+    def fingerprint(df_sites, df_arts):
+        columns = ['latitude', 'longitude']
+        return dataframe_fingerprint(df_sites, columns) + dataframe_fingerprint(df_arts, columns)
+
+
+def mercator_xy(lat, lon):
+    # Web Mercator position in [0, 1) for both axes, y growing southwards like map tiles
+    lat = np.radians(np.clip(np.asarray(lat, dtype=float), -85.0511, 85.0511))
+    x = (np.asarray(lon, dtype=float) + 180) / 360
+    y = (1 - np.log(np.tan(lat) + 1 / np.cos(lat)) / np.pi) / 2
+    return x, y
+
+
+def mercator_lat(y):
+    # Inverse of mercator_xy's y
+    return np.degrees(np.arctan(np.sinh(np.pi * (1 - 2 * np.asarray(y, dtype=float)))))
+
+
+class GridPyramid:
+    def __init__(self, df, category_col=None, categories=(), min_zoom=3, street_zoom=13, cell_pixels=64,
+                 lat_col='latitude', lon_col='longitude'):
+        self.version = self.fingerprint(df, category_col, lat_col, lon_col)
+        self.categories = list(categories)
+        self.min_zoom = min_zoom
+        self.street_zoom = street_zoom
+        self.max_zoom = street_zoom - 1
+        # At zoom z the world is 256 * 2^z pixels wide, so one cell covers cell_pixels on screen
+        self.cells_per_tile = 256 // cell_pixels
+
+        self.points = SpatialIndex(df, lat_col, lon_col)
+        lat, lon = self.points.lat, self.points.lon
+        x, y = mercator_xy(lat, lon)
+        scale = self._scale(self.max_zoom)
+        cell_x = np.minimum((x * scale).astype(np.int64), scale - 1)
+        cell_y = np.minimum((y * scale).astype(np.int64), scale - 1)
+
+        # One count column per listed category, everything else is counted as 'other'
+        codes = np.full(len(lat), len(self.categories), dtype=np.int64)
+        if category_col is not None:
+            values = df[category_col].to_numpy()[self.points.positions]
+            for code, category in enumerate(self.categories):
+                codes[values == category] = code
+        counts = np.zeros((len(lat), len(self.categories) + 1), dtype=np.int64)
+        counts[np.arange(len(lat)), codes] = 1
+
+        # The finest level is binned from points, every coarser level from the level below it
+        self.levels = {}
+        cells = self._aggregate(cell_x, cell_y, lat, lon, counts)
+        for zoom in range(self.max_zoom, min_zoom - 1, -1):
+            self.levels[zoom] = cells
+            cells = self._aggregate(cells['x'] >> 1, cells['y'] >> 1, cells['lat_sum'], cells['lon_sum'],
+                                    cells['counts'])
+
+    @staticmethod
+    def fingerprint(df, category_col=None, lat_col='latitude', lon_col='longitude'):
+        return dataframe_fingerprint(df, [lat_col, lon_col] + ([category_col] if category_col else []))
+
+    def _scale(self, zoom):
+        return (1 << zoom) * self.cells_per_tile
+
+    @staticmethod
+    def _aggregate(x, y, lat, lon, counts):
+        keys = (x << 32) | y
+        unique, inverse = np.unique(keys, return_inverse=True)
+        inverse = inverse.reshape(-1)
+        totals = np.zeros((len(unique), counts.shape[1]), dtype=np.int64)
+        np.add.at(totals, inverse, counts)
+        return {
+            'x': unique >> 32,
+            'y': unique & 0xFFFFFFFF,
+            'lat_sum': np.bincount(inverse, weights=lat, minlength=len(unique)),
+            'lon_sum': np.bincount(inverse, weights=lon, minlength=len(unique)),
+            'counts': totals
+        }
+
+    def is_street_level(self, zoom):
+        return zoom >= self.street_zoom
+
+    def cells(self, zoom, bounds=None):
+        # Aggregates for one zoom level, optionally only those overlapping a (south, west, north, east) box
+        zoom = int(np.clip(zoom, self.min_zoom, self.max_zoom))
+        cells = self.levels[zoom]
+        selected = np.ones(len(cells['x']), dtype=bool)
+        if bounds is not None:
+            south, west, north, east = bounds
+            scale = self._scale(zoom)
+            (x0, x1), (y0, y1) = [np.clip((np.asarray(edge) * scale).astype(np.int64), 0, scale - 1)
+                                  for edge in mercator_xy([north, south], [west, east])]
+            in_x = ((cells['x'] >= x0) & (cells['x'] <= x1) if x0 <= x1
+                    else (cells['x'] >= x0) | (cells['x'] <= x1))
+            selected = in_x & (cells['y'] >= y0) & (cells['y'] <= y1)
+
+        counts = cells['counts'][selected]
+        sites = counts.sum(axis=1)
+        result = pd.DataFrame({
+            'latitude': cells['lat_sum'][selected] / sites,
+            'longitude': cells['lon_sum'][selected] / sites,
+            'count': sites
+        })
+        for code, category in enumerate(self.categories + ['other']):
+            result[category] = counts[:, code]
+        return result
+
+    def positions(self, bounds=None):
+        # Row positions of individual points, for street-level zooms
+        if bounds is None:
+            return self.points.positions
+        return self.points.query_bbox(*bounds)
@@ -0,0 +1,109 @@
+import numpy as np
+import pandas as pd
+
+from data.entity_resolution import SiteRegistry
+from utils.helpers import dataframe_fingerprint, get_state_coordinates
+
+
+class TourismHeatCube:
+    def __init__(self, df_tourism, df_sites=None, registry=None, cell_deg=0.25, value_col='total_visitors'):
+        self.cell_deg = cell_deg
+        self.version = self.fingerprint(df_tourism, df_sites, cell_deg, value_col)
+
+        site_codes, site_names = pd.factorize(df_tourism['site'])
+        lat, lon, by_state = self._site_coordinates(df_tourism, site_codes, site_names, df_sites, registry)
+
+        # Sites are binned into a regular lat/lon grid; each cell sits at the mean position of its sites
+        located = ~(np.isnan(lat) | np.isnan(lon))
+        cell_keys = np.where(located, np.floor(lat / cell_deg) * 100000 + np.floor(lon / cell_deg), np.nan)
+        site_cells, cells = pd.factorize(cell_keys)
+        self.n_cells = len(cells)
+        counts = np.bincount(site_cells[located], minlength=self.n_cells)
+        self.lat = np.bincount(site_cells[located], weights=lat[located], minlength=self.n_cells) / counts
+        self.lon = np.bincount(site_cells[located], weights=lon[located], minlength=self.n_cells) / counts
+
+        # Rows land in (month, cell) with one bincount; the cube covers every month between first and last
+        dates = pd.to_datetime(df_tourism['date'])
+        month_numbers = (dates.dt.year * 12 + dates.dt.month - 1).to_numpy(dtype=np.int64)
+        first = int(month_numbers.min()) if len(month_numbers) else 0
+        n_months = int(month_numbers.max()) - first + 1 if len(month_numbers) else 0
+        month_codes = month_numbers - first
+        self.months = pd.period_range(pd.Period(year=first // 12, month=first % 12 + 1, freq='M'), periods=n_months,
+                                      freq='M')
+        row_cells = np.where(site_codes >= 0, site_cells[site_codes], -1)
+        rows = row_cells >= 0
+        values = df_tourism[value_col].to_numpy(dtype=float)
+        self.cube = np.bincount(month_codes[rows] * self.n_cells + row_cells[rows],
+                                weights=np.nan_to_num(values[rows]),
+                                minlength=n_months * self.n_cells
+                                ).reshape(n_months, self.n_cells).astype(np.float32)
+        self.unlocated_sites = int((~located).sum())
+        self.state_located_sites = int(by_state.sum())
+
+    @staticmethod
+    def fingerprint(df_tourism, df_sites=None, cell_deg=0.25, value_col='total_visitors'):
+        version = f'{cell_deg}:' + dataframe_fingerprint(df_tourism, ['site', 'date', value_col, 'latitude',
+                                                                      'longitude'])
+        if df_sites is not None:
+            version += dataframe_fingerprint(df_sites, ['site_name', 'latitude', 'longitude'])
+        return version
+
+    @staticmethod
+    def _site_coordinates(df_tourism, site_codes, site_names, df_sites, registry):
+        # Tourism rows only carry state-level coordinates, so sites that resolve to the heritage
+        # catalog are placed at the catalog's coordinates instead
+        lat = np.full(len(site_names), np.nan)
+        lon = np.full(len(site_names), np.nan)
+        if {'latitude', 'longitude'}.issubset(df_tourism.columns):
+            codes, first_rows = np.unique(site_codes, return_index=True)
+            first_rows = first_rows[codes >= 0]
+            lat = df_tourism['latitude'].to_numpy(dtype=float)[first_rows]
+            lon = df_tourism['longitude'].to_numpy(dtype=float)[first_rows]
+
+        if df_sites is not None and {'latitude', 'longitude'}.issubset(df_sites.columns):
+            registry = registry or SiteRegistry(df_sites)
+            site_ids = registry.resolve(pd.Series(site_names))
+            catalog_lat, counts = registry.aggregate(registry.site_ids, df_sites['latitude'])
+            catalog_lon, _ = registry.aggregate(registry.site_ids, df_sites['longitude'])
+            resolved_lat = registry.gather(site_ids, catalog_lat / np.maximum(counts, 1))
+            resolved_lon = registry.gather(site_ids, catalog_lon / np.maximum(counts, 1))
+            found = ~(np.isnan(resolved_lat) | np.isnan(resolved_lon))
+            lat = np.where(found, resolved_lat, lat)
+            lon = np.where(found, resolved_lon, lon)
+
+        # Sites that are still unplaced fall back to their state's centroid rather than dropping off the map
+        by_state = np.isnan(lat) | np.isnan(lon)
+        if by_state.any() and 'state' in df_tourism.columns:
+            codes, first_rows = np.unique(site_codes, return_index=True)
+            states = pd.Series(df_tourism['state'].to_numpy()[first_rows[codes >= 0]])
+            centroids = get_state_coordinates()
+            lat = np.where(by_state, states.map(lambda state: centroids.get(state, (np.nan, np.nan))[0]), lat)
+            lon = np.where(by_state, states.map(lambda state: centroids.get(state, (np.nan, np.nan))[1]), lon)
+        by_state &= ~(np.isnan(lat) | np.isnan(lon))
+        return lat, lon, by_state
+
+    def month_range(self, start=None, end=None):
+        # Positions of the months between start and end, inclusive; None leaves that side open
+        first = 0 if start is None else self.months.searchsorted(pd.Period(start, freq='M'), side='left')
+        last = len(self.months) if end is None else self.months.searchsorted(pd.Period(end, freq='M'), side='right')
+        return slice(int(first), int(max(first, last)))
+
+    def totals(self, start=None, end=None):
+        return self.cube[self.month_range(start, end)].sum(axis=0)
+
+    def heat_points(self, start=None, end=None):
+        # [lat, lon, weight] for every cell with visitors in the range, weights scaled to the busiest cell
+        totals = self.totals(start, end)
+        active = np.flatnonzero(totals > 0)
+        peak = totals[active].max() if len(active) else 1.0
+        return np.column_stack([self.lat[active], self.lon[active], totals[active] / peak]).round(4).tolist()
+
+    def heat_matrix(self, start=None, end=None):
+        # Month x cell weights for the cells that see visitors in the range, all scaled to the busiest
+        # cell-month so months stay comparable
+        window = self.month_range(start, end)
+        cube = self.cube[window]
+        active = np.flatnonzero(cube.sum(axis=0) > 0) if cube.size else np.zeros(0, dtype=np.int64)
+        peak = cube.max() if cube.size else 0.0
+        weights = cube[:, active] / (peak or 1.0)
+        return self.lat[active], self.lon[active], weights, [str(period) for period in self.months[window]]
@@ -2,7 +2,7 @@ import pandas as pd
 import snowflake.connector
 from datetime import datetime, timedelta
 import random
-from config import SNOWFLAKE_CONFIG
+from config import SNOWFLAKE_CONFIG, TILE_CONFIG
 
 
 class EnhancedDataLoader:
@@ -500,10 +500,29 @@ class EnhancedDataLoader:
         self.conn.commit()
         print("Additional tables created successfully")
 
+    def fetch_table(self, table):
+        self.cursor.execute(f"SELECT * FROM {table}")
+        columns = [desc[0] for desc in self.cursor.description]
+        return pd.DataFrame(self.cursor.fetchall(), columns=columns).rename(columns=str.lower)
+
     def close(self):
         self.cursor.close()
         self.conn.close()
         print("Connection closed")
+
+
+def render_tiles(loader):
+    # The map layers only change here, so their tiles are rebuilt from the rows just written, read back
+    # over the same connection; unchanged tiles are kept as they are
+    from components.tiles import build_tiles
+    print("Rendering map tiles...")
+    df_arts = loader.fetch_table("ART_FORMS")
+    df_sites = loader.fetch_table("CULTURAL_SITES")
+    stats = build_tiles(df_arts, df_sites, TILE_CONFIG['tile_dir'], TILE_CONFIG['min_zoom'], TILE_CONFIG['max_zoom'])
+    for layer, counts in stats.items():
+        print(f"{layer}: {counts['written']} of {counts['tiles']} tiles rewritten, {counts['removed']} removed")
+
+
 def main():
     print("Starting to load enhanced cultural heritage data into Snowflake...")
     loader = EnhancedDataLoader()
@@ -521,6 +540,13 @@ def main():
         print("- Festivals: 37 major festivals with regional variations")
     except Exception as e:
         print(f"Error loading data: {e}")
+        loader.close()
+        return
+    # A tile failure leaves the loaded data in place, so it is reported on its own
+    try:
+        render_tiles(loader)
+    except Exception as e:
+        print(f"Error rendering map tiles: {e}")
     finally:
         loader.close()
 if __name__ == "__main__":
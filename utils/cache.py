@@ -0,0 +1,155 @@
+import gzip
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+from collections import OrderedDict
+
+
+def cache_key(*parts):
+    return hashlib.sha1(repr(parts).encode()).hexdigest()
+
+
+def _size_of(value):
+    if isinstance(value, str):
+        return len(value.encode())
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+class LRUCache:
+    def __init__(self, max_bytes=64 * 2 ** 20, spill_dir=None, max_spill_bytes=512 * 2 ** 20):
+        self.max_bytes = max_bytes
+        self.spill_dir = spill_dir
+        self.max_spill_bytes = max_spill_bytes
+        if spill_dir:
+            os.makedirs(spill_dir, exist_ok=True)
+
+        self.entries = OrderedDict()
+        self.sizes = {}
+        self.size = 0
+        self.hits = self.disk_hits = self.misses = self.evictions = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key):
+        return key in self.entries or (self.spill_dir is not None and os.path.exists(self._spill_path(key)))
+
+    def _spill_path(self, key):
+        return os.path.join(self.spill_dir, f'{key}.pkl.gz')
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return self.entries[key]
+
+        value = self._load_spilled(key)
+        if value is None:
+            with self._lock:
+                self.misses += 1
+            return default
+        with self._lock:
+            self.disk_hits += 1
+        self.put(key, value)
+        return value
+
+    def put(self, key, value):
+        size = _size_of(value)
+        spilled = []
+        with self._lock:
+            if key in self.entries:
+                self.size -= self.sizes.pop(key)
+                del self.entries[key]
+            if size > self.max_bytes:
+                # Larger than the whole memory budget: it can only live on disk
+                spilled.append((key, value))
+            else:
+                self.entries[key] = value
+                self.sizes[key] = size
+                self.size += size
+            while self.size > self.max_bytes:
+                old_key, old_value = self.entries.popitem(last=False)
+                self.size -= self.sizes.pop(old_key)
+                self.evictions += 1
+                spilled.append((old_key, old_value))
+
+        for old_key, old_value in spilled:
+            self._spill(old_key, old_value)
+
+    def get_or_create(self, key, factory):
+        value = self.get(key)
+        if value is None:
+            value = factory()
+            self.put(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self.entries.clear()
+            self.sizes.clear()
+            self.size = 0
+
+    def stats(self):
+        return {'entries': len(self.entries), 'bytes': self.size, 'hits': self.hits, 'disk_hits': self.disk_hits,
+                'misses': self.misses, 'evictions': self.evictions}
+
+    def _spill(self, key, value):
+        if not self.spill_dir:
+            return
+        # Keys are derived from everything that shapes the value, so a file already on disk is still valid
+        path = self._spill_path(key)
+        try:
+            os.utime(path)
+            return
+        except FileNotFoundError:
+            pass
+        # Written to a temporary file of its own first, so concurrent writers never share a file and a
+        # reader never sees a partial one
+        fd, tmp_path = tempfile.mkstemp(dir=self.spill_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as raw, gzip.GzipFile(fileobj=raw, mode='wb', compresslevel=3) as handle:
+                pickle.dump(value, handle, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        self._trim_spill()
+
+    def _load_spilled(self, key):
+        if not self.spill_dir:
+            return None
+        try:
+            with gzip.open(self._spill_path(key), 'rb') as handle:
+                return pickle.load(handle)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+
+    def _trim_spill(self):
+        if self.max_spill_bytes is None:
+            return
+        files = []
+        for entry in os.scandir(self.spill_dir):
+            if not entry.name.endswith('.pkl.gz'):
+                continue
+            # Another process may remove a file between the listing and the stat
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in files)
+        # Least recently written files go first
+        for _, size, path in sorted(files):
+            if total <= self.max_spill_bytes:
+                break
+            total -= size
+            try:
+                os.remove(path)
+            except OSError:
+                pass
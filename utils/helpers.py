@@ -1,8 +1,12 @@
+import hashlib
+
 import pandas as pd
 import numpy as np
 from datetime import datetime
 import streamlit as st
 
+EARTH_RADIUS_KM = 6371.0
+
 
 def format_number(num):
     if num >= 1_000_000:
@@ -68,6 +72,91 @@ def calculate_distance(coord1, coord2):
     return R * c
 
 
+def _haversine(lat1, lon1, lat2, lon2):
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+def haversine_one_to_many(coord, lats, lons, dtype=np.float64):
+    lat1, lon1 = np.radians(np.asarray(coord, dtype=dtype))
+    lats = np.radians(np.asarray(lats, dtype=dtype))
+    lons = np.radians(np.asarray(lons, dtype=dtype))
+    return _haversine(lat1, lon1, lats, lons)
+
+
+def haversine_pairwise(lats1, lons1, lats2=None, lons2=None, chunk_size=2048, dtype=np.float32):
+    lats1 = np.radians(np.asarray(lats1, dtype=dtype))
+    lons1 = np.radians(np.asarray(lons1, dtype=dtype))
+    lats2 = lats1 if lats2 is None else np.radians(np.asarray(lats2, dtype=dtype))
+    lons2 = lons1 if lons2 is None else np.radians(np.asarray(lons2, dtype=dtype))
+
+    # Row blocks bound the temporaries to chunk_size x len(lats2) elements
+    distances = np.empty((len(lats1), len(lats2)), dtype=dtype)
+    for start in range(0, len(lats1), chunk_size):
+        stop = start + chunk_size
+        distances[start:stop] = _haversine(lats1[start:stop, None], lons1[start:stop, None],
+                                           lats2[None, :], lons2[None, :])
+    return distances
+
+
+def haversine_condensed(lats, lons, chunk_size=2048, dtype=np.float32):
+    lats = np.radians(np.asarray(lats, dtype=dtype))
+    lons = np.radians(np.asarray(lons, dtype=dtype))
+    n = len(lats)
+
+    # Same layout as scipy.spatial.distance.pdist: row i holds pairs (i, i+1) ... (i, n-1)
+    condensed = np.empty(n * (n - 1) // 2, dtype=dtype)
+    for start in range(0, n, chunk_size):
+        stop = min(start + chunk_size, n)
+        block = _haversine(lats[start:stop, None], lons[start:stop, None], lats[None, start:], lons[None, start:])
+        rows, cols = np.triu_indices(stop - start, k=1, m=n - start)
+        offset = start * n - start * (start + 1) // 2
+        condensed[offset:offset + len(rows)] = block[rows, cols]
+    return condensed
+
+
+def dataframe_digest(df, columns=None, digest=None):
+    # Row hashes do not depend on other rows, so feeding appended rows into the digest of the earlier
+    # frame gives the same fingerprint as hashing the combined frame
+    if columns is not None:
+        df = df[[column for column in columns if column in df.columns]]
+    if digest is None:
+        digest = hashlib.sha1(str(tuple(df.columns)).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return digest
+
+
+def dataframe_fingerprint(df, columns=None):
+    return dataframe_digest(df, columns).hexdigest()
+
+
+def lttb_indices(x, y, n_out):
+    # Largest-Triangle-Three-Buckets: keeps the first and last points and, from each bucket in between,
+    # the point forming the largest triangle with the previous pick and the next bucket's mean, so peaks
+    # and dips survive the downsampling
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    counts = np.diff(edges)
+    mean_x = np.append(np.add.reduceat(x[:n - 1], edges[:-1]) / counts, x[n - 1])
+    mean_y = np.append(np.add.reduceat(y[:n - 1], edges[:-1]) / counts, y[n - 1])
+
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    previous = 0
+    for bucket in range(n_out - 2):
+        start, stop = edges[bucket], edges[bucket + 1]
+        area = np.abs((x[previous] - mean_x[bucket + 1]) * (y[start:stop] - y[previous])
+                      - (x[previous] - x[start:stop]) * (mean_y[bucket + 1] - y[previous]))
+        previous = start + int(np.argmax(area))
+        selected[bucket + 1] = previous
+    return selected
+
+
 def create_download_link(df, filename):
     csv = df.to_csv(index=False)
     return st.download_button(